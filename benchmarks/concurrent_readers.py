@@ -0,0 +1,149 @@
+"""
+Нагрузочный тест конкурентного чтения кулинарной книги.
+
+Несколько потоков-читателей выполняют запросы (поиск по ингредиентам и
+категориям, список покупок, калорийность), пока поток-писатель пакетами
+добавляет и удаляет рецепты. Сравниваются два режима:
+
+- lock: обычный Cookbook, все обращения под одной блокировкой;
+- versioned: VersionedCookbook, читатели берут неизменяемую версию без блокировок.
+
+Для каждого числа читателей печатается пропускная способность чтения,
+число записанных пакетов и среднее время записи пакета. Читатели заодно
+проверяют согласованность результатов: каждый найденный рецепт
+действительно содержит искомый ингредиент и находится по названию.
+
+На интерпретаторе с GIL потоки не читают параллельно, и пропускная
+способность чтения в основном отражает то, как GIL передается между
+читателями и писателем; это не мера масштабирования чтения. Показательнее
+время записи пакета: в режиме versioned оно растет примерно как корень из
+размера книги, потому что новая версия копирует только затронутые части
+словарей.
+
+Запуск: python benchmarks/concurrent_readers.py [секунд на замер] [рецептов]
+"""
+
+import random
+import sys
+import threading
+import time
+
+from recipebook import Cookbook, Ingredient, Recipe, VersionedCookbook
+
+CATEGORIES = ["Основное", "Завтрак", "Суп", "Салат", "Десерт", "Выпечка", "Напиток", "Закуска"]
+VOCABULARY = [f"Ингредиент {i}" for i in range(500)]
+WRITE_BATCH = 50
+
+
+def make_recipe(number: int, rng: random.Random) -> Recipe:
+    """
+    Создает синтетический рецепт.
+    :param number: номер рецепта (входит в название)
+    :param rng: генератор случайных чисел
+    :return: рецепт
+    """
+    return Recipe(f"Рецепт {number}",
+                  [Ingredient(name, rng.randint(1, 500), "г", round(rng.uniform(0, 9), 2))
+                   for name in rng.sample(VOCABULARY, 8)],
+                  category=rng.choice(CATEGORIES))
+
+
+def query(book, rng: random.Random, names) -> None:
+    """
+    Выполняет один набор запросов чтения и проверяет согласованность результатов.
+    :param book: Cookbook или CookbookVersion
+    :param rng: генератор случайных чисел
+    :param names: названия рецептов для списков покупок
+    """
+    ingredient = rng.choice(VOCABULARY)
+    found = book.find_recipes_by_ingredient(ingredient)
+    book.find_recipes_by_category(rng.choice(CATEGORIES))
+    plan = rng.sample(names, 5)
+    book.generate_shopping_list(plan)
+    book.calculate_total_calories(plan)
+    for recipe in found:
+        if book.get_recipe(recipe.name) is not recipe or ingredient not in recipe.get_ingredient_names():
+            raise AssertionError(f"Несогласованный результат: {recipe.name}")
+
+
+def run(mode: str, readers: int, duration: float, size: int):
+    """
+    Проводит один замер.
+    :param mode: 'lock' или 'versioned'
+    :param readers: число потоков-читателей
+    :param duration: длительность замера в секундах
+    :param size: начальное число рецептов
+    :return: (чтений в секунду, записанных пакетов, среднее время записи пакета в мс)
+    """
+    rng = random.Random(1)
+    initial = [make_recipe(number, rng) for number in range(size)]
+    names = [recipe.name for recipe in initial]
+    if mode == 'lock':
+        book = Cookbook()
+        book.add_recipes(initial)
+        lock = threading.Lock()
+    else:
+        book = VersionedCookbook(initial)
+        lock = None
+    stop = threading.Event()
+    reads = [0] * readers
+    batches = [0]
+    write_seconds = [0.0]
+
+    def reader(slot: int):
+        local_rng = random.Random(slot)
+        while not stop.is_set():
+            if lock is not None:
+                with lock:
+                    query(book, local_rng, names)
+            else:
+                query(book.snapshot(), local_rng, names)
+            reads[slot] += 1
+
+    def writer():
+        writer_rng = random.Random(99)
+        next_number = size
+        while not stop.is_set():
+            added = [make_recipe(number, writer_rng) for number in range(next_number, next_number + WRITE_BATCH)]
+            removed = [f"Рецепт {number}" for number in range(next_number - size, next_number - size + WRITE_BATCH)]
+            next_number += WRITE_BATCH
+            start = time.perf_counter()
+            if lock is not None:
+                with lock:
+                    for name in removed:
+                        book.remove_recipe(name)
+                    book.add_recipes(added)
+            else:
+                with book.batch() as batch:
+                    for name in removed:
+                        batch.remove_recipe(name)
+                    for recipe in added:
+                        batch.add_recipe(recipe)
+            write_seconds[0] += time.perf_counter() - start
+            batches[0] += 1
+            time.sleep(0.001)
+
+    threads = [threading.Thread(target=reader, args=(slot,)) for slot in range(readers)]
+    threads.append(threading.Thread(target=writer))
+    for thread in threads:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return sum(reads) / duration, batches[0], write_seconds[0] * 1000 / max(batches[0], 1)
+
+
+def main():
+    duration = float(sys.argv[1]) if len(sys.argv) > 1 else 2.0
+    size = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+    print(f"Рецептов: {size}, пакет записи: {WRITE_BATCH}, замер: {duration} с")
+    print(f"{'режим':<10}{'читателей':>10}{'чтений/с':>12}{'пакетов':>10}{'мс/пакет':>10}")
+    for mode in ('lock', 'versioned'):
+        for readers in (1, 2, 4, 8):
+            throughput, batches, batch_ms = run(mode, readers, duration, size)
+            print(f"{mode:<10}{readers:>10}{throughput:>12.0f}{batches:>10}{batch_ms:>10.2f}")
+
+
+if __name__ == '__main__':
+    main()
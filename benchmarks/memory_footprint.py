@@ -0,0 +1,72 @@
+"""
+Замер памяти на рецепт для синтетической кулинарной книги.
+
+Рецепты собираются из JSON (как при загрузке из файла: каждая строка -
+отдельный объект str), затем сообщается число байт на рецепт по данным
+tracemalloc. Замеряются сами объекты Recipe/Ingredient, без индексов
+Cookbook. Если у Recipe есть pack, замер повторяется для упакованного
+представления.
+
+Запуск: python benchmarks/memory_footprint.py [число ингредиентов]
+"""
+
+import gc
+import json
+import random
+import sys
+import tracemalloc
+
+from recipebook import Recipe
+
+UNITS = ["г", "шт", "мл", "ст.л.", "ч.л."]
+CATEGORIES = ["Основное", "Завтрак", "Суп", "Салат", "Десерт", "Выпечка", "Напиток", "Закуска"]
+INGREDIENTS_PER_RECIPE = 10
+
+
+def synthetic_lines(total_ingredients: int, seed: int = 1):
+    """
+    Генерирует рецепты в виде строк JSON.
+    :param total_ingredients: общее число ингредиентов в книге
+    :param seed: зерно генератора
+    :return: итератор строк
+    """
+    rng = random.Random(seed)
+    vocabulary = [f"Ингредиент {i}" for i in range(2000)]
+    for number in range(total_ingredients // INGREDIENTS_PER_RECIPE):
+        yield json.dumps({
+            'name': f"Рецепт {number}",
+            'category': rng.choice(CATEGORIES),
+            'description': "",
+            'instructions': "",
+            'ingredients': [{'name': rng.choice(vocabulary),
+                             'quantity': rng.randint(1, 500),
+                             'unit': rng.choice(UNITS),
+                             'calories_per_unit': round(rng.uniform(0, 9), 2)}
+                            for _ in range(INGREDIENTS_PER_RECIPE)],
+        }, ensure_ascii=False)
+
+
+def measure(total_ingredients: int):
+    """
+    Печатает байты на рецепт для обычного и упакованного представления.
+    :param total_ingredients: общее число ингредиентов в книге
+    """
+    lines = list(synthetic_lines(total_ingredients))
+    gc.collect()
+    tracemalloc.start()
+    recipes = [Recipe.from_dict(json.loads(line)) for line in lines]
+    gc.collect()
+    objects_size = tracemalloc.get_traced_memory()[0]
+    print(f"рецептов: {len(recipes)}, ингредиентов: {total_ingredients}")
+    print(f"объекты:   {objects_size / len(recipes):8.0f} байт/рецепт")
+    if hasattr(Recipe, 'pack'):
+        for recipe in recipes:
+            recipe.pack()
+        gc.collect()
+        packed_size = tracemalloc.get_traced_memory()[0]
+        print(f"упаковано: {packed_size / len(recipes):8.0f} байт/рецепт")
+    tracemalloc.stop()
+
+
+if __name__ == "__main__":
+    measure(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
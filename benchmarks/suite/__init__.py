@@ -0,0 +1,15 @@
+"""
+Набор замеров производительности RecipeBook.
+
+Синтетические книги строит CookbookGenerator (популярность продуктов по
+закону Ципфа, разные единицы и категории, от 1 тыс. до 1 млн рецептов).
+run_suite замеряет операции Cookbook и Recipe, сохранение и загрузку и
+возвращает результаты для JSON; compare сравнивает два запуска.
+Запуск из корня репозитория: python -m benchmarks.suite --help
+"""
+
+from .compare import compare
+from .generator import CookbookGenerator
+from .runner import run_suite
+
+__all__ = ['CookbookGenerator', 'run_suite', 'compare']
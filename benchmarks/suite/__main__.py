@@ -0,0 +1,90 @@
+"""
+Командная строка набора замеров.
+
+    python -m benchmarks.suite run --sizes 1000,10000 --output before.json
+    python -m benchmarks.suite run --sizes 1000,10000 --output after.json
+    python -m benchmarks.suite compare before.json after.json
+
+compare завершается с кодом 1, если найдены регрессии.
+"""
+
+import argparse
+import json
+import sys
+
+from .compare import compare, format_changes
+from .runner import run_suite
+
+
+def _run(args) -> int:
+    """
+    Выполняет команду run.
+    :param args: аргументы командной строки
+    :return: код завершения
+    """
+    sizes = [int(size) for size in args.sizes.split(',')]
+    patterns = args.cases.split(',') if args.cases else None
+
+    def select(name: str) -> bool:
+        return any(pattern in name for pattern in patterns)
+
+    results = run_suite(sizes, seed=args.seed, min_time=args.min_time, memory=not args.no_memory,
+                        select=select if patterns else None,
+                        progress=lambda line: print(line, file=sys.stderr, flush=True))
+    with open(args.output, 'w', encoding='utf-8') as file:
+        json.dump(results, file, ensure_ascii=False, indent=1, allow_nan=False)
+    print(f"Результаты сохранены в {args.output}")
+    return 0
+
+
+def _compare(args) -> int:
+    """
+    Выполняет команду compare.
+    :param args: аргументы командной строки
+    :return: 1, если есть регрессии, иначе 0
+    """
+    with open(args.old, encoding='utf-8') as file:
+        old = json.load(file)
+    with open(args.new, encoding='utf-8') as file:
+        new = json.load(file)
+    changes = compare(old, new, args.threshold, args.min_delta_us)
+    print(format_changes(changes))
+    regressions = sum(change.regression for change in changes)
+    print(f"Регрессий: {regressions}")
+    return 1 if regressions else 0
+
+
+def main(argv=None) -> int:
+    """
+    Разбирает аргументы и выполняет команду.
+    :param argv: аргументы (по умолчанию - sys.argv)
+    :return: код завершения
+    """
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.suite',
+                                     description="Замеры производительности RecipeBook")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run = commands.add_parser('run', help="прогнать замеры и сохранить результаты в JSON")
+    run.add_argument('--sizes', default='1000,10000',
+                     help="размеры книг через запятую (от 1000 до 1000000)")
+    run.add_argument('--seed', type=int, default=1, help="зерно генератора")
+    run.add_argument('--min-time', type=float, default=0.3, help="секунд на каждый случай")
+    run.add_argument('--cases', help="подстроки имен случаев через запятую")
+    run.add_argument('--no-memory', action='store_true', help="не замерять память")
+    run.add_argument('--output', default='benchmark-results.json', help="файл результатов")
+    run.set_defaults(handler=_run)
+
+    diff = commands.add_parser('compare', help="сравнить два файла результатов")
+    diff.add_argument('old', help="базовые результаты")
+    diff.add_argument('new', help="новые результаты")
+    diff.add_argument('--threshold', type=float, default=0.1, help="допустимый рост p50 (доля)")
+    diff.add_argument('--min-delta-us', type=float, default=1.0,
+                      help="допустимый рост p50 в микросекундах")
+    diff.set_defaults(handler=_compare)
+
+    args = parser.parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
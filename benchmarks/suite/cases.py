@@ -0,0 +1,406 @@
+"""
+Замеряемые операции Cookbook и Recipe.
+
+Каждый случай (Case) получает контекст с уже построенной книгой и
+возвращает операцию op(i) - один замеряемый вызов - и, если операция
+меняет книгу, функцию, возвращающую книгу в исходное состояние.
+Параметры запросов выбираются заранее, чтобы в замер попадал только вызов.
+"""
+
+import os
+import random
+from typing import Any, Callable, List, NamedTuple, Optional, Tuple
+
+from recipebook import Cookbook, Recipe
+
+from .generator import CATEGORIES, CookbookGenerator
+
+Operation = Callable[[int], Any]
+Prepared = Tuple[Operation, Optional[Callable[[], None]]]
+
+
+class Context:
+    """Данные, общие для всех случаев одного размера книги."""
+
+    def __init__(self, generator: CookbookGenerator, book: Cookbook, workdir: str, seed: int):
+        """
+        Создает контекст.
+        :param generator: генератор, которым построена книга
+        :param book: книга
+        :param workdir: каталог для временных файлов
+        :param seed: зерно для выбора параметров запросов
+        """
+        self.generator = generator
+        self.book = book
+        self.workdir = workdir
+        self.seed = seed
+        self.names = [recipe.name for recipe in book.recipes]
+
+    def rng(self, salt: str) -> random.Random:
+        """
+        Возвращает генератор случайных чисел, свой для каждого случая.
+        :param salt: имя случая
+        :return: генератор
+        """
+        return random.Random(f"{self.seed}:{salt}")
+
+    def extra_dicts(self, count: int, salt: str, offset: int = 0) -> List[dict]:
+        """
+        Создает рецепты, которых нет в книге.
+        :param count: число рецептов
+        :param salt: имя случая
+        :param offset: сдвиг номеров, чтобы рецепты разных вызовов не совпадали по названию
+        :return: словари рецептов
+        """
+        rng = self.rng(salt)
+        first = len(self.names) + 1_000_000 + offset
+        return [self.generator.recipe_dict(first + number, rng) for number in range(count)]
+
+
+class Case(NamedTuple):
+    """Замеряемая операция."""
+
+    name: str
+    prepare: Callable[[Context, int], Prepared]
+    max_iterations: int
+
+
+CASES: List[Case] = []
+
+
+def case(name: str, max_iterations: int = 2000):
+    """
+    Регистрирует случай замера.
+    :param name: имя случая (группа.операция)
+    :param max_iterations: наибольшее число вызовов
+    :return: декоратор функции подготовки
+    """
+    def register(prepare: Callable[[Context, int], Prepared]):
+        CASES.append(Case(name, prepare, max_iterations))
+        return prepare
+    return register
+
+
+def _cycle(values: list) -> Callable[[int], Any]:
+    """
+    Возвращает функцию, выбирающую значение по номеру вызова по кругу.
+    :param values: значения
+    :return: i -> values[i % len(values)]
+    """
+    return lambda i: values[i % len(values)]
+
+
+def _product_queries(context: Context, salt: str, count: int = 256, per_query: int = 1) -> List[List[str]]:
+    """
+    Выбирает продукты для запросов с учетом их популярности.
+    :param context: контекст
+    :param salt: имя случая
+    :param count: число запросов
+    :param per_query: продуктов в запросе
+    :return: списки названий продуктов
+    """
+    rng = context.rng(salt)
+    return [[product.name for product in context.generator.sample_products(rng, per_query)]
+            for _ in range(count)]
+
+
+def _plans(context: Context, salt: str, size: int, count: int = 256) -> List[List[str]]:
+    """
+    Выбирает наборы рецептов для списков покупок.
+    :param context: контекст
+    :param salt: имя случая
+    :param size: рецептов в наборе
+    :param count: число наборов
+    :return: списки названий
+    """
+    rng = context.rng(salt)
+    return [rng.sample(context.names, min(size, len(context.names))) for _ in range(count)]
+
+
+@case('cookbook.add_recipe')
+def _add_recipe(context: Context, iterations: int) -> Prepared:
+    recipes = [Recipe.from_dict(data) for data in context.extra_dicts(iterations, 'add_recipe')]
+    book = context.book
+
+    def cleanup():
+        for recipe in recipes:
+            book.remove_recipe(recipe.name)
+    return (lambda i: book.add_recipe(recipes[i])), cleanup
+
+
+@case('cookbook.add_recipes_100', max_iterations=50)
+def _add_recipes(context: Context, iterations: int) -> Prepared:
+    batches = [[Recipe.from_dict(data) for data in context.extra_dicts(100, 'add_recipes', number * 100)]
+               for number in range(iterations)]
+    book = context.book
+
+    def cleanup():
+        for batch in batches:
+            for recipe in batch:
+                book.remove_recipe(recipe.name)
+    return (lambda i: book.add_recipes(batches[i])), cleanup
+
+
+@case('cookbook.remove_recipe')
+def _remove_recipe(context: Context, iterations: int) -> Prepared:
+    names = context.rng('remove_recipe').sample(context.names, min(iterations, len(context.names)))
+    book = context.book
+    removed = []
+
+    def op(i):
+        recipe = book.get_recipe(names[i % len(names)])
+        if recipe is not None:
+            removed.append(recipe)
+        return book.remove_recipe(names[i % len(names)])
+
+    def cleanup():
+        book.add_recipes(removed)
+    return op, cleanup
+
+
+@case('cookbook.get_recipe', max_iterations=20000)
+def _get_recipe(context: Context, iterations: int) -> Prepared:
+    names = _cycle([name.upper() for name in context.rng('get_recipe').sample(context.names, min(1000, len(context.names)))])
+    return (lambda i: context.book.get_recipe(names(i))), None
+
+
+@case('cookbook.search_recipes_by_prefix')
+def _search_prefix(context: Context, iterations: int) -> Prepared:
+    rng = context.rng('prefix')
+    prefixes = _cycle([name[:rng.randint(2, 8)] for name in rng.sample(context.names, min(256, len(context.names)))])
+    return (lambda i: context.book.search_recipes_by_prefix(prefixes(i))), None
+
+
+@case('cookbook.search_recipes_fuzzy', max_iterations=500)
+def _search_fuzzy(context: Context, iterations: int) -> Prepared:
+    rng = context.rng('fuzzy')
+    queries = []
+    for name in rng.sample(context.names, min(256, len(context.names))):
+        position = rng.randrange(len(name))
+        queries.append(name[:position] + name[position + 1:])
+    queries = _cycle(queries)
+    return (lambda i: context.book.search_recipes_fuzzy(queries(i))), None
+
+
+@case('cookbook.search_recipes_text', max_iterations=500)
+def _search_text(context: Context, iterations: int) -> Prepared:
+    queries = _cycle([" ".join(query) for query in _product_queries(context, 'text', per_query=2)])
+    return (lambda i: context.book.search_recipes_text(queries(i))), None
+
+
+@case('cookbook.find_similar_recipes', max_iterations=200)
+def _find_similar(context: Context, iterations: int) -> Prepared:
+    names = _cycle(context.rng('similar').sample(context.names, min(256, len(context.names))))
+    return (lambda i: context.book.find_similar_recipes(names(i))), None
+
+
+@case('cookbook.find_recipes_by_ingredient')
+def _by_ingredient(context: Context, iterations: int) -> Prepared:
+    queries = _cycle([query[0] for query in _product_queries(context, 'by_ingredient')])
+    return (lambda i: context.book.find_recipes_by_ingredient(queries(i))), None
+
+
+@case('cookbook.find_recipes_by_all_ingredients')
+def _by_all(context: Context, iterations: int) -> Prepared:
+    queries = _cycle(_product_queries(context, 'by_all', per_query=2))
+    return (lambda i: context.book.find_recipes_by_all_ingredients(queries(i))), None
+
+
+@case('cookbook.find_recipes_by_any_ingredient')
+def _by_any(context: Context, iterations: int) -> Prepared:
+    queries = _cycle(_product_queries(context, 'by_any', per_query=3))
+    return (lambda i: context.book.find_recipes_by_any_ingredient(queries(i))), None
+
+
+@case('cookbook.rank_recipes_by_pantry', max_iterations=500)
+def _rank_pantry(context: Context, iterations: int) -> Prepared:
+    pantries = _cycle(_product_queries(context, 'pantry', count=64, per_query=10))
+    return (lambda i: context.book.rank_recipes_by_pantry(pantries(i), limit=10)), None
+
+
+@case('cookbook.find_recipes_by_category', max_iterations=500)
+def _by_category(context: Context, iterations: int) -> Prepared:
+    categories = _cycle(CATEGORIES)
+    return (lambda i: context.book.find_recipes_by_category(categories(i))), None
+
+
+@case('cookbook.count_recipes_in_category', max_iterations=20000)
+def _count_category(context: Context, iterations: int) -> Prepared:
+    categories = _cycle(CATEGORIES)
+    return (lambda i: context.book.count_recipes_in_category(categories(i))), None
+
+
+@case('cookbook.get_all_categories', max_iterations=20000)
+def _all_categories(context: Context, iterations: int) -> Prepared:
+    return (lambda i: context.book.get_all_categories()), None
+
+
+@case('cookbook.get_category_counts', max_iterations=500)
+def _category_counts(context: Context, iterations: int) -> Prepared:
+    queries = _cycle(_product_queries(context, 'category_counts'))
+    return (lambda i: context.book.get_category_counts(queries(i))), None
+
+
+@case('cookbook.find_recipes_by_calories', max_iterations=500)
+def _by_calories(context: Context, iterations: int) -> Prepared:
+    rng = context.rng('calories')
+    windows = _cycle([(low, low + rng.uniform(10, 100)) for low in (rng.uniform(0, 3000) for _ in range(256))])
+    return (lambda i: context.book.find_recipes_by_calories(*windows(i))), None
+
+
+@case('cookbook.lowest_calorie_recipes')
+def _lowest(context: Context, iterations: int) -> Prepared:
+    categories = _cycle(CATEGORIES)
+    return (lambda i: context.book.lowest_calorie_recipes(10, category=categories(i))), None
+
+
+@case('cookbook.highest_calorie_recipes')
+def _highest(context: Context, iterations: int) -> Prepared:
+    queries = _cycle(_product_queries(context, 'highest'))
+    return (lambda i: context.book.highest_calorie_recipes(10, ingredient_names=queries(i))), None
+
+
+@case('cookbook.find_recipes_faceted', max_iterations=500)
+def _faceted(context: Context, iterations: int) -> Prepared:
+    queries = _cycle(_product_queries(context, 'faceted'))
+    categories = _cycle(CATEGORIES)
+    return (lambda i: context.book.find_recipes_faceted(categories(i), queries(i), 100, 1500)), None
+
+
+@case('cookbook.generate_shopping_list')
+def _shopping_list(context: Context, iterations: int) -> Prepared:
+    plans = _cycle(_plans(context, 'shopping', 10))
+    return (lambda i: context.book.generate_shopping_list(plans(i))), None
+
+
+@case('cookbook.build_shopping_list')
+def _build_shopping_list(context: Context, iterations: int) -> Prepared:
+    rng = context.rng('build_shopping')
+    plans = _cycle([[(name, rng.choice((1, 2, 0.5))) for name in plan]
+                    for plan in _plans(context, 'build_shopping', 10)])
+    return (lambda i: context.book.build_shopping_list(plans(i))), None
+
+
+@case('cookbook.calculate_total_calories')
+def _total_calories(context: Context, iterations: int) -> Prepared:
+    plans = _plans(context, 'total_calories', 7, count=max(iterations, 1))
+    return (lambda i: context.book.calculate_total_calories(plans[i])), None
+
+
+@case('cookbook.plan_meals', max_iterations=10)
+def _plan_meals(context: Context, iterations: int) -> Prepared:
+    return (lambda i: context.book.plan_meals(1800, 2200, count=3, time_budget=0.2)), None
+
+
+@case('cookbook.rename_recipe', max_iterations=1000)
+def _rename(context: Context, iterations: int) -> Prepared:
+    recipes = [context.book.get_recipe(name)
+               for name in context.rng('rename').sample(context.names, min(iterations, len(context.names)))]
+    originals = [recipe.name for recipe in recipes]
+
+    def op(i):
+        recipe = recipes[i % len(recipes)]
+        recipe.name = f"{originals[i % len(recipes)]} ({i})"
+
+    def cleanup():
+        for recipe, name in zip(recipes, originals):
+            recipe.name = name
+    return op, cleanup
+
+
+@case('cookbook.ingredient_quantity_change')
+def _quantity_change(context: Context, iterations: int) -> Prepared:
+    rng = context.rng('quantity')
+    ingredients = [rng.choice(context.book.get_recipe(name).ingredients)
+                   for name in rng.sample(context.names, min(256, len(context.names)))]
+
+    def op(i):
+        ingredient = ingredients[i % len(ingredients)]
+        ingredient.quantity = ingredient.quantity
+    return op, None
+
+
+def _standalone_recipes(context: Context, salt: str, count: int = 256) -> List[Recipe]:
+    """
+    Создает рецепты вне книги для замеров операций Recipe.
+    :param context: контекст
+    :param salt: имя случая
+    :param count: число рецептов
+    :return: рецепты
+    """
+    return [Recipe.from_dict(data) for data in context.extra_dicts(count, salt)]
+
+
+@case('recipe.calculate_calories', max_iterations=20000)
+def _calories(context: Context, iterations: int) -> Prepared:
+    recipes = _cycle(_standalone_recipes(context, 'calories'))
+    return (lambda i: recipes(i).calculate_calories()), None
+
+
+@case('recipe.calculate_calories_after_edit', max_iterations=20000)
+def _calories_after_edit(context: Context, iterations: int) -> Prepared:
+    recipes = _cycle(_standalone_recipes(context, 'calories_edit'))
+
+    def op(i):
+        recipe = recipes(i)
+        ingredient = recipe.ingredients[0]
+        ingredient.quantity = ingredient.quantity
+        return recipe.calculate_calories()
+    return op, None
+
+
+@case('recipe.add_remove_ingredient', max_iterations=20000)
+def _add_remove_ingredient(context: Context, iterations: int) -> Prepared:
+    recipes = _cycle(_standalone_recipes(context, 'add_remove'))
+    rng = context.rng('add_remove')
+    extras = _cycle([context.generator.ingredient(rng) for _ in range(256)])
+
+    def op(i):
+        recipe = recipes(i)
+        ingredient = extras(i)
+        recipe.add_ingredient(ingredient)
+        recipe.remove_ingredient(ingredient.name)
+    return op, None
+
+
+@case('recipe.get_ingredient_names', max_iterations=20000)
+def _ingredient_names(context: Context, iterations: int) -> Prepared:
+    recipes = _cycle(_standalone_recipes(context, 'names'))
+    return (lambda i: recipes(i).get_ingredient_names()), None
+
+
+@case('recipe.contains_ingredient', max_iterations=20000)
+def _contains(context: Context, iterations: int) -> Prepared:
+    recipes = _cycle(_standalone_recipes(context, 'contains'))
+    queries = _cycle([query[0] for query in _product_queries(context, 'contains')])
+    return (lambda i: recipes(i).contains_ingredient(queries(i))), None
+
+
+@case('recipe.to_dict', max_iterations=20000)
+def _to_dict(context: Context, iterations: int) -> Prepared:
+    recipes = _cycle(_standalone_recipes(context, 'to_dict'))
+    return (lambda i: recipes(i).to_dict()), None
+
+
+@case('recipe.from_dict', max_iterations=20000)
+def _from_dict(context: Context, iterations: int) -> Prepared:
+    dicts = _cycle(context.extra_dicts(256, 'from_dict'))
+    return (lambda i: Recipe.from_dict(dicts(i))), None
+
+
+@case('io.save', max_iterations=3)
+def _save(context: Context, iterations: int) -> Prepared:
+    filename = os.path.join(context.workdir, 'save.jsonl')
+    return (lambda i: context.book.save(filename)), None
+
+
+@case('io.load', max_iterations=3)
+def _load(context: Context, iterations: int) -> Prepared:
+    filename = os.path.join(context.workdir, 'load.jsonl')
+    context.book.save(filename)
+    return (lambda i: Cookbook(filename).load()), None
+
+
+@case('io.dict_roundtrip', max_iterations=3)
+def _dict_roundtrip(context: Context, iterations: int) -> Prepared:
+    return (lambda i: list(Recipe.from_dicts(recipe.to_dict() for recipe in context.book.recipes))), None
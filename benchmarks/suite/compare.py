@@ -0,0 +1,59 @@
+"""
+Сравнение двух файлов результатов и поиск регрессий.
+
+Случай считается регрессией, если медианная задержка (p50) выросла больше
+чем на порог и при этом больше чем на min_delta_us микросекунд: так
+шум очень быстрых операций не поднимает ложную тревогу.
+"""
+
+from typing import List, NamedTuple
+
+
+class Change(NamedTuple):
+    """Изменение одного случая между запусками."""
+
+    size: str
+    case: str
+    old_p50_us: float
+    new_p50_us: float
+    ratio: float
+    regression: bool
+
+
+def compare(old: dict, new: dict, threshold: float = 0.1, min_delta_us: float = 1.0) -> List[Change]:
+    """
+    Сравнивает результаты двух запусков по общим размерам и случаям.
+    :param old: результаты базового запуска
+    :param new: результаты нового запуска
+    :param threshold: допустимый относительный рост p50 (0.1 - на 10%)
+    :param min_delta_us: допустимый абсолютный рост p50 в микросекундах
+    :return: список изменений
+    """
+    changes = []
+    for size, new_size in new['sizes'].items():
+        old_size = old['sizes'].get(size)
+        if old_size is None:
+            continue
+        for name, measured in new_size['cases'].items():
+            baseline = old_size['cases'].get(name)
+            if baseline is None:
+                continue
+            old_p50, new_p50 = baseline['p50_us'], measured['p50_us']
+            ratio = new_p50 / old_p50 if old_p50 else float('inf')
+            regression = new_p50 > old_p50 * (1 + threshold) and new_p50 - old_p50 > min_delta_us
+            changes.append(Change(size, name, old_p50, new_p50, ratio, regression))
+    return changes
+
+
+def format_changes(changes: List[Change]) -> str:
+    """
+    Оформляет изменения таблицей.
+    :param changes: изменения
+    :return: текст таблицы
+    """
+    lines = [f"{'размер':>8}  {'случай':<44}{'было p50':>12}{'стало p50':>12}{'отношение':>11}"]
+    for change in changes:
+        mark = "  РЕГРЕССИЯ" if change.regression else ""
+        lines.append(f"{change.size:>8}  {change.case:<44}{change.old_p50_us:>10.1f}мкс"
+                     f"{change.new_p50_us:>9.1f}мкс{change.ratio:>10.2f}x{mark}")
+    return "\n".join(lines)
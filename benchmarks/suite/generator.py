@@ -0,0 +1,184 @@
+"""
+Генератор синтетических кулинарных книг для замеров.
+
+Популярность ингредиентов и категорий подчиняется закону Ципфа: немногие
+продукты (соль, вода, яйца) входят в большую долю рецептов, а длинный хвост
+встречается редко. У каждого продукта своя размерность (масса, объем, штуки),
+и количества записываются в разных единицах этой размерности (г и кг, мл,
+ложки и стаканы), чтобы списки покупок пересчитывали единицы. Один и тот же
+seed всегда дает одну и ту же книгу.
+"""
+
+import bisect
+import itertools
+import random
+from typing import Iterator, List, NamedTuple, Tuple
+
+from recipebook import Ingredient, Recipe
+
+CATEGORIES = ["Основное", "Суп", "Салат", "Завтрак", "Выпечка", "Десерт", "Закуска", "Напиток",
+              "Соус", "Гарнир", "Каша", "Заготовка"]
+
+_UNITS = {
+    'масса': [("г", 1.0, (5, 500)), ("кг", 1000.0, (0.2, 2)), ("мг", 0.001, (100, 900))],
+    'объем': [("мл", 1.0, (10, 500)), ("л", 1000.0, (0.2, 2)), ("ст.л.", 15.0, (1, 4)),
+              ("ч.л.", 5.0, (1, 3)), ("стакан", 250.0, (0.5, 2))],
+    'штуки': [("шт", 1.0, (1, 6)), ("десяток", 10.0, (1, 2))],
+}
+
+_DIMENSIONS = [('масса', 0.6), ('объем', 0.3), ('штуки', 0.1)]
+
+_ROOTS = ["мука", "сахар", "соль", "молоко", "яйцо", "масло", "лук", "морковь", "картофель",
+          "свекла", "капуста", "рис", "гречка", "курица", "говядина", "свинина", "рыба",
+          "сыр", "творог", "сметана", "томат", "огурец", "перец", "чеснок", "укроп",
+          "петрушка", "яблоко", "груша", "мед", "орех", "изюм", "какао", "кефир", "грибы"]
+
+_QUALIFIERS = ["", "свежий", "сушеный", "молотый", "домашний", "копченый", "мороженый",
+               "тертый", "соленый", "печеный"]
+
+_DISH_ADJECTIVES = ["Домашний", "Быстрый", "Праздничный", "Летний", "Зимний", "Бабушкин",
+                    "Острый", "Легкий", "Сытный", "Пряный"]
+
+_DISHES = ["суп", "салат", "пирог", "рагу", "омлет", "запеканка", "плов", "борщ", "блины",
+           "котлеты", "каша", "соус", "кекс", "рулет", "жаркое", "компот"]
+
+_WORDS = ["нарезать", "обжарить", "смешать", "варить", "запекать", "посолить", "остудить",
+          "подавать", "взбить", "тушить", "до", "готовности", "минут", "на", "среднем", "огне",
+          "с", "добавить", "перемешать", "процедить"]
+
+
+class Product(NamedTuple):
+    """Продукт словаря генератора."""
+
+    name: str
+    dimension: str
+    calories_per_base_unit: float
+
+
+def _zipf_cumulative(count: int, exponent: float) -> List[float]:
+    """
+    Строит накопленные веса распределения Ципфа.
+    :param count: число элементов
+    :param exponent: показатель распределения
+    :return: накопленные веса для random.choices
+    """
+    return list(itertools.accumulate(1.0 / (rank ** exponent) for rank in range(1, count + 1)))
+
+
+class CookbookGenerator:
+    """Воспроизводимый генератор синтетических рецептов."""
+
+    def __init__(self, seed: int = 1, vocabulary: int = 5000, zipf_exponent: float = 1.07,
+                 ingredients_per_recipe: Tuple[int, int] = (4, 14)):
+        """
+        Создает генератор.
+        :param seed: зерно генератора случайных чисел
+        :param vocabulary: число разных продуктов
+        :param zipf_exponent: показатель распределения популярности продуктов
+        :param ingredients_per_recipe: наименьшее и наибольшее число ингредиентов в рецепте
+        """
+        self._seed = seed
+        self._ingredients_per_recipe = ingredients_per_recipe
+        rng = random.Random(seed)
+        dimensions, weights = zip(*_DIMENSIONS)
+        names = self._product_names(vocabulary)
+        self.products = [Product(name, rng.choices(dimensions, weights)[0], round(rng.uniform(0, 9), 2))
+                         for name in names]
+        self._product_weights = _zipf_cumulative(vocabulary, zipf_exponent)
+        self._category_weights = _zipf_cumulative(len(CATEGORIES), 0.8)
+
+    @staticmethod
+    def _product_names(count: int) -> List[str]:
+        """
+        Придумывает названия продуктов: сначала простые, затем с уточнениями и номерами сорта.
+        :param count: сколько названий нужно
+        :return: уникальные названия
+        """
+        names = []
+        for variant in itertools.count():
+            for qualifier in _QUALIFIERS:
+                for root in _ROOTS:
+                    name = f"{root} {qualifier}".strip()
+                    if variant:
+                        name = f"{name} сорт {variant}"
+                    names.append(name)
+                    if len(names) == count:
+                        return names
+        return names
+
+    def popular_products(self, count: int) -> List[str]:
+        """
+        Возвращает самые популярные продукты.
+        :param count: сколько продуктов
+        :return: названия по убыванию популярности
+        """
+        return [product.name for product in self.products[:count]]
+
+    def sample_products(self, rng: random.Random, count: int) -> List[Product]:
+        """
+        Выбирает разные продукты с учетом популярности.
+        :param rng: генератор случайных чисел
+        :param count: сколько продуктов
+        :return: продукты без повторов
+        """
+        chosen = {}
+        weights = self._product_weights
+        total = weights[-1]
+        while len(chosen) < count:
+            position = bisect.bisect_left(weights, rng.random() * total)
+            chosen[position] = self.products[position]
+        return list(chosen.values())
+
+    def recipe_dict(self, number: int, rng: random.Random) -> dict:
+        """
+        Создает словарь одного рецепта (как у Recipe.to_dict).
+        :param number: номер рецепта; входит в название и делает его уникальным
+        :param rng: генератор случайных чисел
+        :return: словарь рецепта
+        """
+        ingredients = []
+        for product in self.sample_products(rng, rng.randint(*self._ingredients_per_recipe)):
+            unit, factor, (low, high) = rng.choice(_UNITS[product.dimension])
+            ingredients.append({
+                'name': product.name,
+                'quantity': round(rng.uniform(low, high), 2),
+                'unit': unit,
+                'calories_per_unit': round(product.calories_per_base_unit * factor, 4),
+            })
+        title = f"{rng.choice(_DISH_ADJECTIVES)} {rng.choice(_DISHES)} №{number}"
+        return {
+            'name': title,
+            'ingredients': ingredients,
+            'description': f"{title} из {ingredients[0]['name']}",
+            'instructions': " ".join(rng.choice(_WORDS) for _ in range(rng.randint(8, 30))),
+            'category': rng.choices(CATEGORIES, cum_weights=self._category_weights)[0],
+        }
+
+    def recipe_dicts(self, count: int) -> Iterator[dict]:
+        """
+        Генерирует словари рецептов.
+        :param count: число рецептов
+        :return: итератор словарей
+        """
+        rng = random.Random(self._seed * 1_000_003 + 17)
+        for number in range(count):
+            yield self.recipe_dict(number, rng)
+
+    def recipes(self, count: int) -> Iterator[Recipe]:
+        """
+        Генерирует рецепты.
+        :param count: число рецептов
+        :return: итератор рецептов
+        """
+        return Recipe.from_dicts(self.recipe_dicts(count))
+
+    def ingredient(self, rng: random.Random) -> Ingredient:
+        """
+        Создает один случайный ингредиент.
+        :param rng: генератор случайных чисел
+        :return: ингредиент
+        """
+        product = self.sample_products(rng, 1)[0]
+        unit, factor, (low, high) = rng.choice(_UNITS[product.dimension])
+        return Ingredient(product.name, round(rng.uniform(low, high), 2), unit,
+                          round(product.calories_per_base_unit * factor, 4))
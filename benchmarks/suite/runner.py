@@ -0,0 +1,189 @@
+"""
+Запуск замеров: построение книги, прогон случаев, сбор результатов в JSON.
+
+Для каждого случая сначала идет замер времени (без tracemalloc, чтобы не
+искажать задержки), затем, если включен замер памяти, - короткий повторный
+прогон под tracemalloc, из которого берется пиковый прирост памяти.
+"""
+
+import gc
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from recipebook import Cookbook
+
+from .cases import CASES, Case, Context
+from .generator import CookbookGenerator
+
+MIN_ITERATIONS = 3
+MEMORY_ITERATIONS = 20
+
+
+def _percentile(ordered: List[int], fraction: float) -> int:
+    """
+    Находит процентиль по отсортированной выборке (метод ближайшего ранга).
+    :param ordered: отсортированные значения
+    :param fraction: доля от 0 до 1
+    :return: значение процентиля
+    """
+    rank = max(1, int(round(fraction * len(ordered) + 0.5)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def _result_size(result) -> Optional[int]:
+    """
+    Определяет размер результата операции, если он есть.
+    :param result: результат
+    :return: длина списка или словаря, иначе None
+    """
+    if isinstance(result, (list, dict, set, tuple)):
+        return len(result)
+    return None
+
+
+def run_case(case: Case, context: Context, min_time: float, memory: bool) -> dict:
+    """
+    Замеряет один случай.
+    :param case: случай
+    :param context: контекст с построенной книгой
+    :param min_time: сколько секунд вызывать операцию (не меньше MIN_ITERATIONS раз)
+    :param memory: замерять ли пиковую память
+    :return: словарь с результатами замера
+    """
+    op, cleanup = case.prepare(context, case.max_iterations)
+    latencies: List[int] = []
+    sizes: List[int] = []
+    gc.collect()
+    deadline = time.perf_counter() + min_time
+    try:
+        for i in range(case.max_iterations):
+            if i >= MIN_ITERATIONS and time.perf_counter() > deadline:
+                break
+            start = time.perf_counter_ns()
+            result = op(i)
+            latencies.append(time.perf_counter_ns() - start)
+            size = _result_size(result)
+            if size is not None:
+                sizes.append(size)
+    finally:
+        if cleanup is not None:
+            cleanup()
+    ordered = sorted(latencies)
+    total = sum(latencies)
+    measured = {
+        'iterations': len(latencies),
+        # Слишком быстрые для таймера операции дают нулевое время: JSON не
+        # допускает бесконечность, поэтому пропускная способность - None.
+        'ops_per_sec': len(latencies) / (total / 1e9) if total else None,
+        'mean_us': total / len(latencies) / 1000,
+        'p50_us': _percentile(ordered, 0.50) / 1000,
+        'p99_us': _percentile(ordered, 0.99) / 1000,
+    }
+    if sizes:
+        measured['mean_result_size'] = sum(sizes) / len(sizes)
+    if memory:
+        measured['peak_kib'] = _peak_memory(case, context, min(len(latencies), MEMORY_ITERATIONS))
+    return measured
+
+
+def _peak_memory(case: Case, context: Context, iterations: int) -> float:
+    """
+    Повторяет операцию под tracemalloc и измеряет пиковый прирост памяти.
+    :param case: случай
+    :param context: контекст
+    :param iterations: сколько раз вызвать операцию
+    :return: пиковый прирост в КиБ
+    """
+    op, cleanup = case.prepare(context, case.max_iterations)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        baseline = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        for i in range(iterations):
+            op(i)
+        peak = tracemalloc.get_traced_memory()[1] - baseline
+    finally:
+        tracemalloc.stop()
+        if cleanup is not None:
+            cleanup()
+    return max(peak, 0) / 1024
+
+
+def build_book(generator: CookbookGenerator, size: int, memory: bool) -> Tuple[Cookbook, dict]:
+    """
+    Строит книгу из сгенерированных рецептов и замеряет построение.
+    :param generator: генератор
+    :param size: число рецептов
+    :param memory: замерять ли память (книга строится второй раз под tracemalloc)
+    :return: книга и результаты замера построения
+    """
+    dicts = list(generator.recipe_dicts(size))
+    gc.collect()
+    start = time.perf_counter()
+    book = Cookbook()
+    book.add_recipes(dicts)
+    seconds = time.perf_counter() - start
+    measured = {'seconds': seconds, 'recipes_per_sec': size / seconds if seconds else float('inf')}
+    if memory:
+        del book
+        gc.collect()
+        tracemalloc.start()
+        try:
+            book = Cookbook()
+            book.add_recipes(dicts)
+            current, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        measured['retained_kib'] = current / 1024
+        measured['peak_kib'] = peak / 1024
+    return book, measured
+
+
+def run_suite(sizes: Iterable[int], seed: int = 1, min_time: float = 0.3, memory: bool = True,
+              select: Optional[Callable[[str], bool]] = None,
+              progress: Optional[Callable[[str], None]] = None) -> dict:
+    """
+    Прогоняет все выбранные случаи для каждого размера книги.
+    :param sizes: размеры книг (число рецептов)
+    :param seed: зерно генератора
+    :param min_time: сколько секунд замерять каждый случай
+    :param memory: замерять ли пиковую память
+    :param select: фильтр имен случаев
+    :param progress: вызывается со строкой о каждом завершенном замере
+    :return: результаты, готовые для сохранения в JSON
+    """
+    generator = CookbookGenerator(seed)
+    results: Dict[str, dict] = {}
+    for size in sizes:
+        book, build = build_book(generator, size, memory)
+        if progress is not None:
+            progress(f"{size}: построение {build['seconds']:.2f} с")
+        cases: Dict[str, dict] = {}
+        with tempfile.TemporaryDirectory(prefix='recipebook-bench-') as workdir:
+            context = Context(generator, book, workdir, seed)
+            for case in CASES:
+                if select is not None and not select(case.name):
+                    continue
+                cases[case.name] = measured = run_case(case, context, min_time, memory)
+                if progress is not None:
+                    ops = measured['ops_per_sec']
+                    progress(f"{size}: {case.name}: {'-' if ops is None else f'{ops:.0f}'} оп/с, "
+                             f"p50 {measured['p50_us']:.1f} мкс, p99 {measured['p99_us']:.1f} мкс")
+        results[str(size)] = {'build': build, 'cases': cases}
+        del book, context
+        gc.collect()
+    return {
+        'meta': {
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'python': sys.version,
+            'platform': platform.platform(),
+            'seed': seed,
+            'min_time': min_time,
+        },
+        'sizes': results,
+    }
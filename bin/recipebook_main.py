@@ -1,11 +1,20 @@
 """
 Главный исполняемый модуль RecipeBook.
+
+Без аргументов показывает работу пакета. С --serve загружает книгу из
+файла и обслуживает запросы к ней по Unix-сокету (--socket) или TCP на
+localhost (--port).
 """
+import argparse
+import asyncio
+
 from recipebook.cookbook import Cookbook
 from recipebook.recipe import Recipe
 from recipebook.ingredient import Ingredient
+from recipebook.server import DEFAULT_MAX_CONCURRENCY, serve
 
-if __name__ == "__main__":
+
+def demo():
     """Основная функция - демонстрация работы пакета."""
 
     # Создаем кулинарную книгу
@@ -39,9 +48,45 @@ if __name__ == "__main__":
 
     # Демонстрация списка покупок
     print("\n5. Список покупок для рецепта:")
-    shopping_list = cookbook.generate_shopping_list(["Омлет классический"])
-    for ingredient, quantity in shopping_list.items():
-        print(f"   {ingredient}: {quantity} г")
+    shopping_list = cookbook.build_shopping_list(["Омлет классический"])
+    for (ingredient, unit), quantity in shopping_list.items():
+        print(f"   {ingredient}: {quantity} {unit}")
+
+
+def run_server(args):
+    """Загружает книгу и запускает сервер запросов.
 
+    :param args: аргументы командной строки
+    """
+    cookbook = Cookbook(args.book)
+    print(f"Загружено рецептов: {cookbook.load()}")
 
+    def ready(server):
+        print(f"Сервер слушает {server.address}", flush=True)
 
+    try:
+        asyncio.run(serve(cookbook, path=args.socket, host=args.host, port=args.port,
+                          max_concurrency=args.max_concurrency, ready=ready))
+    except KeyboardInterrupt:
+        pass
+
+
+def main():
+    """Разбирает аргументы командной строки и запускает демонстрацию или сервер."""
+    parser = argparse.ArgumentParser(description="Кулинарная книга RecipeBook")
+    parser.add_argument("--serve", metavar="BOOK", dest="book",
+                        help="обслуживать запросы к книге из файла BOOK (JSON Lines)")
+    parser.add_argument("--socket", help="путь Unix-сокета сервера")
+    parser.add_argument("--host", default="127.0.0.1", help="адрес TCP сервера")
+    parser.add_argument("--port", type=int, default=8765, help="порт TCP сервера")
+    parser.add_argument("--max-concurrency", type=int, default=DEFAULT_MAX_CONCURRENCY,
+                        help="сколько запросов обрабатывается одновременно")
+    args = parser.parse_args()
+    if args.book is None:
+        demo()
+    else:
+        run_server(args)
+
+
+if __name__ == "__main__":
+    main()
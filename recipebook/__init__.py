@@ -3,8 +3,16 @@
 
 from .ingredient import Ingredient
 from .recipe import Recipe
-from .cookbook import Cookbook
+from .cookbook import Cookbook, ImportReport
+from .sqlite_cookbook import SQLiteCookbook
+from .snapshot import SnapshotCookbook
+from .nutrition import NutritionEngine
+from .batch import process_plans
+from .versioned import VersionedCookbook, CookbookVersion
+from .server import CookbookServer
+from .client import CookbookClient
 
 
-__all__ = ['Ingredient', 'Recipe', 'Cookbook']
+__all__ = ['Ingredient', 'Recipe', 'Cookbook', 'ImportReport', 'SQLiteCookbook', 'SnapshotCookbook', 'NutritionEngine', 'process_plans',
+           'VersionedCookbook', 'CookbookVersion', 'CookbookServer', 'CookbookClient']
 
@@ -0,0 +1,117 @@
+"""
+Модуль для пакетной обработки планов питания в пуле процессов.
+Содержит функцию process_plans
+"""
+
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+from .shopping import PlanEntry
+from .snapshot import SnapshotCookbook, write_snapshot
+
+
+class PlanResult(NamedTuple):
+    """Результат обработки одного плана."""
+
+    shopping_list: Dict[Tuple[str, str], float]
+    calories: float
+
+
+# Снимок книги, открытый в процессе-обработчике.
+_worker_cookbook: Optional[SnapshotCookbook] = None
+
+
+def _open_snapshot(filename: str):
+    """
+    Инициализатор процесса пула: один раз открывает снимок через mmap.
+    :param filename: путь к снимку
+    """
+    global _worker_cookbook
+    _worker_cookbook = SnapshotCookbook(filename)
+
+
+def _plan_result(cookbook, plan: Sequence[PlanEntry]) -> PlanResult:
+    """
+    Считает список покупок и калорийность одного плана.
+    :param cookbook: книга
+    :param plan: названия рецептов или пары (название, порции)
+    :return: результат плана
+    """
+    calories = 0.0
+    for entry in plan:
+        name, servings = (entry, 1) if isinstance(entry, str) else entry
+        calories += cookbook.calculate_total_calories([name]) * servings
+    return PlanResult(cookbook.build_shopping_list(plan), calories)
+
+
+def _run_chunk(plans: List[Sequence[PlanEntry]]) -> List[PlanResult]:
+    """
+    Обрабатывает часть планов в процессе пула.
+    :param plans: планы
+    :return: результаты в том же порядке
+    """
+    return [_plan_result(_worker_cookbook, plan) for plan in plans]
+
+
+def _chunks(plans: Iterable[Sequence[PlanEntry]], chunk_size: int) -> Iterable[List[Sequence[PlanEntry]]]:
+    """
+    Делит поток планов на части.
+    :param plans: планы
+    :param chunk_size: размер части
+    :return: итератор частей
+    """
+    chunk = []
+    for plan in plans:
+        chunk.append(list(plan))
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def process_plans(cookbook, plans: Iterable[Sequence[PlanEntry]],
+                  max_workers: Optional[int] = None, chunk_size: int = 64) -> List[PlanResult]:
+    """
+    Считает списки покупок и калорийность для многих планов в пуле процессов.
+
+    Книга передается обработчикам один раз - как бинарный снимок, который
+    каждый процесс открывает через mmap только для чтения; в задачах
+    передаются лишь сами планы.
+
+    :param cookbook: Cookbook или SnapshotCookbook
+    :param plans: планы: названия рецептов или пары (название, порции)
+    :param max_workers: число процессов (по умолчанию - по числу процессоров)
+    :param chunk_size: сколько планов отправлять в процесс за одну задачу
+    :return: результаты в порядке входных планов
+    """
+    if chunk_size < 1:
+        raise ValueError("Размер части должен быть положительным")
+    if isinstance(cookbook, SnapshotCookbook):
+        return _process_snapshot(cookbook.filename, plans, max_workers, chunk_size)
+    fd, filename = tempfile.mkstemp(prefix='recipebook-', suffix='.snapshot')
+    os.close(fd)
+    try:
+        write_snapshot(filename, cookbook.recipes)
+        return _process_snapshot(filename, plans, max_workers, chunk_size)
+    finally:
+        os.unlink(filename)
+
+
+def _process_snapshot(filename: str, plans: Iterable[Sequence[PlanEntry]],
+                      max_workers: Optional[int], chunk_size: int) -> List[PlanResult]:
+    """
+    Распределяет планы по процессам, открывающим общий снимок.
+    :param filename: путь к снимку
+    :param plans: планы
+    :param max_workers: число процессов
+    :param chunk_size: размер части
+    :return: результаты в порядке входных планов
+    """
+    results: List[PlanResult] = []
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_open_snapshot,
+                             initargs=(filename,)) as executor:
+        for chunk_results in executor.map(_run_chunk, _chunks(plans, chunk_size)):
+            results.extend(chunk_results)
+    return results
@@ -0,0 +1,94 @@
+"""
+Модуль кеша результатов запросов к кулинарной книге. Содержит класс ResultCache
+
+Запись кеша помнит версию книги, для которой посчитан результат: любое
+изменение книги (рецепты, их поля и ингредиенты) увеличивает версию, и
+старые записи при следующем обращении считаются промахом. Размер кеша
+ограничен (вытесняются давно не использованные записи), а время жизни
+записи можно ограничить ttl.
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, NamedTuple, Optional, Tuple
+
+
+class CacheStats(NamedTuple):
+    """Статистика кеша результатов."""
+
+    hits: int
+    misses: int
+    evictions: int
+    invalidations: int
+    expirations: int
+    size: int
+
+
+class ResultCache:
+    """LRU-кеш результатов с версиями и временем жизни записей."""
+
+    def __init__(self, max_size: int = 1024, ttl: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Создает пустой кеш.
+        :param max_size: сколько записей хранить
+        :param ttl: время жизни записи в секундах (None - без ограничения)
+        :param clock: источник времени в секундах
+        """
+        if max_size <= 0:
+            raise ValueError("Размер кеша должен быть положительным")
+        if ttl is not None and ttl <= 0:
+            raise ValueError("Время жизни записи должно быть положительным")
+        self._max_size = max_size
+        self._ttl = ttl
+        self._clock = clock
+        self._entries: 'OrderedDict[Hashable, Tuple[int, float, Any]]' = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._invalidations = 0
+        self._expirations = 0
+
+    def get_or_compute(self, key: Hashable, version: int, compute: Callable[[], Any]) -> Any:
+        """
+        Возвращает запомненный результат или вычисляет и запоминает новый.
+        :param key: нормализованный запрос
+        :param version: текущая версия книги
+        :param compute: функция, вычисляющая результат
+        :return: результат (общий для всех обращений, не изменять)
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            entry_version, expires_at, value = entry
+            if entry_version != version:
+                self._invalidations += 1
+            elif expires_at < self._clock():
+                self._expirations += 1
+            else:
+                self._hits += 1
+                self._entries.move_to_end(key)
+                return value
+        self._misses += 1
+        value = compute()
+        expires_at = self._clock() + self._ttl if self._ttl is not None else float('inf')
+        self._entries[key] = (version, expires_at, value)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self._max_size:
+            self._entries.popitem(last=False)
+            self._evictions += 1
+        return value
+
+    def clear(self):
+        """
+        Удаляет все записи (статистика сохраняется).
+        """
+        self._entries.clear()
+
+    def stats(self) -> CacheStats:
+        """
+        Возвращает статистику кеша.
+        :return: попадания, промахи, вытеснения по размеру, устаревшие по версии
+            и по времени записи, текущий размер
+        """
+        return CacheStats(self._hits, self._misses, self._evictions, self._invalidations,
+                          self._expirations, len(self._entries))
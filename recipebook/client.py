@@ -0,0 +1,239 @@
+"""
+Модуль асинхронного клиента сервера кулинарной книги. Содержит класс CookbookClient
+
+Клиент держит пул соединений и отправляет запросы, не дожидаясь ответов
+на предыдущие (pipelining): каждое соединение читает ответы в отдельной
+задаче и сопоставляет их с запросами по id.
+"""
+
+import asyncio
+import itertools
+import json
+from typing import Any, Dict, List, Optional
+from .recipe import Recipe
+from .server import MAX_LINE
+
+
+class CookbookServerError(Exception):
+    """Ошибка, которую вернул сервер в ответ на запрос."""
+
+
+class _Connection:
+    """Одно соединение с сервером с конвейерной отправкой запросов."""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """
+        Запускает чтение ответов.
+        :param reader: поток чтения
+        :param writer: поток записи
+        """
+        self._reader = reader
+        self._writer = writer
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._ids = itertools.count(1)
+        self._closed = False
+        self._reading = asyncio.ensure_future(self._read_responses())
+
+    @property
+    def load(self) -> int:
+        """Возвращает число запросов, ждущих ответа.
+
+        :return: число запросов
+        """
+        return len(self._pending)
+
+    @property
+    def closed(self) -> bool:
+        """Закрыто ли соединение.
+
+        :return: True, если соединение больше нельзя использовать
+        """
+        return self._closed
+
+    async def request(self, method: str, params: list) -> Any:
+        """
+        Отправляет запрос и ждет ответа.
+        :param method: имя метода
+        :param params: позиционные аргументы
+        :return: результат
+        """
+        if self._closed:
+            raise ConnectionError("Соединение с сервером закрыто")
+        request_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        line = json.dumps({'id': request_id, 'method': method, 'params': params},
+                          ensure_ascii=False, separators=(',', ':'))
+        try:
+            self._writer.write(line.encode('utf-8') + b'\n')
+            await self._writer.drain()
+        except ConnectionError:
+            self._pending.pop(request_id, None)
+            await self.close()
+            raise
+        return await future
+
+    async def _read_responses(self):
+        """
+        Читает ответы и передает их ожидающим запросам.
+        """
+        error: Exception = ConnectionError("Сервер закрыл соединение")
+        try:
+            while True:
+                line = await self._reader.readline()
+                if not line:
+                    break
+                response = json.loads(line)
+                future = self._pending.pop(response.get('id'), None)
+                if future is None or future.done():
+                    continue
+                if 'error' in response:
+                    future.set_exception(CookbookServerError(response['error']))
+                else:
+                    future.set_result(response.get('result'))
+        except (ConnectionError, ValueError) as failure:
+            error = failure
+        finally:
+            self._closed = True
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(error)
+            self._pending.clear()
+
+    async def close(self):
+        """
+        Закрывает соединение.
+        """
+        self._closed = True
+        self._writer.close()
+        try:
+            await self._writer.wait_closed()
+        except ConnectionError:
+            pass
+        await asyncio.gather(self._reading, return_exceptions=True)
+
+
+class CookbookClient:
+    """Асинхронный клиент сервера кулинарной книги с пулом соединений.
+
+    Запрос уходит в наименее загруженное соединение; новые соединения
+    открываются, пока их меньше pool_size и все открытые заняты.
+    """
+
+    def __init__(self, path: Optional[str] = None, host: str = '127.0.0.1', port: int = 0,
+                 pool_size: int = 4):
+        """
+        Создает клиент; соединения открываются при первых запросах.
+        :param path: путь Unix-сокета сервера; если не указан, используется TCP
+        :param host: адрес TCP
+        :param port: порт TCP
+        :param pool_size: максимальное число соединений
+        """
+        if pool_size <= 0:
+            raise ValueError("Размер пула соединений должен быть положительным")
+        self._path = path
+        self._host = host
+        self._port = port
+        self._pool_size = pool_size
+        self._connections: List[_Connection] = []
+        self._connecting = 0
+
+    async def _connect(self) -> _Connection:
+        """
+        Открывает новое соединение.
+        :return: соединение
+        """
+        if self._path is not None:
+            reader, writer = await asyncio.open_unix_connection(self._path, limit=MAX_LINE)
+        else:
+            reader, writer = await asyncio.open_connection(self._host, self._port, limit=MAX_LINE)
+        return _Connection(reader, writer)
+
+    async def _acquire(self) -> _Connection:
+        """
+        Выбирает соединение для запроса.
+        :return: соединение
+        """
+        self._connections = [connection for connection in self._connections if not connection.closed]
+        idle = min(self._connections, key=lambda connection: connection.load, default=None)
+        if idle is not None and (idle.load == 0 or
+                                 len(self._connections) + self._connecting >= self._pool_size):
+            return idle
+        self._connecting += 1
+        try:
+            connection = await self._connect()
+        finally:
+            self._connecting -= 1
+        self._connections.append(connection)
+        return connection
+
+    async def call(self, method: str, *params) -> Any:
+        """
+        Вызывает метод сервера.
+        :param method: имя метода
+        :param params: аргументы
+        :return: результат
+        """
+        connection = await self._acquire()
+        return await connection.request(method, list(params))
+
+    async def get_recipe(self, recipe_name: str) -> Optional[Recipe]:
+        """
+        Находит рецепт по названию.
+        :param recipe_name: название рецепта
+        :return: рецепт или None
+        """
+        data = await self.call('get_recipe', recipe_name)
+        return Recipe.from_dict(data) if data is not None else None
+
+    async def find_recipes_by_ingredient(self, ingredient_name: str) -> List[str]:
+        """
+        Находит рецепты с ингредиентом.
+        :param ingredient_name: название ингредиента
+        :return: названия рецептов в порядке книги
+        """
+        return await self.call('find_recipes_by_ingredient', ingredient_name)
+
+    async def find_recipes_by_category(self, category: str) -> List[str]:
+        """
+        Находит рецепты категории.
+        :param category: категория
+        :return: названия рецептов в порядке книги
+        """
+        return await self.call('find_recipes_by_category', category)
+
+    async def generate_shopping_list(self, recipe_names: List[str]) -> Dict[str, float]:
+        """
+        Генерирует список покупок для указанных рецептов.
+        :param recipe_names: названия рецептов
+        :return: список покупок
+        """
+        return await self.call('generate_shopping_list', list(recipe_names))
+
+    async def calculate_total_calories(self, recipe_names: List[str]) -> float:
+        """
+        Вычисляет общую калорийность для указанных рецептов.
+        :param recipe_names: названия рецептов
+        :return: общая калорийность
+        """
+        return await self.call('calculate_total_calories', list(recipe_names))
+
+    async def close(self):
+        """
+        Закрывает все соединения пула.
+        """
+        connections, self._connections = self._connections, []
+        await asyncio.gather(*(connection.close() for connection in connections))
+
+    async def __aenter__(self) -> 'CookbookClient':
+        """
+        Начинает блок async with.
+        :return: этот же клиент
+        """
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        """
+        Закрывает соединения при выходе из блока.
+        """
+        await self.close()
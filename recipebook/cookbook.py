@@ -2,9 +2,29 @@
 Модуль для работы с кулинарной книгой. Содержит класс Cookbook
 """
 
-from typing import List, Dict, Optional
+import heapq
+from typing import Iterable, List, Dict, NamedTuple, Optional, Set, Tuple, Union
 from .recipe import Recipe
 from .ingredient import Ingredient
+from .fulltext import FullTextIndex
+from .index import CalorieIndex, CategoryIndex, IngredientIndex, NamePrefixIndex, NameTrigramIndex
+from . import journal, metrics, snapshot, storage
+from .cache import CacheStats, ResultCache
+from .planner import MealPlan, plan_meals
+from .shopping import PlanEntry, ShoppingListAggregator
+from .similarity import SimilarityIndex
+from .text import fold
+
+
+# Сколько разных наборов рецептов помнит кеш калорийности.
+_PLAN_CACHE_SIZE = 1024
+
+
+class ImportReport(NamedTuple):
+    """Итог массового добавления рецептов."""
+
+    added: int
+    rejected: List[str]
 
 
 class Cookbook:
@@ -14,9 +34,25 @@ class Cookbook:
     def __init__(self, filename: str = "cookbook.json"):
         """
         Инициализирует кулинарную книгу.
-        :param recipes: кулинарная книга
+        :param filename: файл для load/save (формат JSON Lines)
         """
-        self._recipes: List[Recipe] = []
+        self._filename = filename
+        self._recipes: Dict[Recipe, int] = {}
+        self._by_name: Dict[str, Recipe] = {}
+        self._next_position = 0
+        self._ingredient_index = IngredientIndex()
+        self._category_index = CategoryIndex()
+        self._calorie_index = CalorieIndex()
+        self._prefix_index = NamePrefixIndex()
+        self._indexes = [self._ingredient_index, self._category_index, self._calorie_index,
+                         self._prefix_index]
+        # Индексы поиска с опечатками, полнотекстового поиска и похожих рецептов
+        # дороги в построении и строятся при первом запросе к ним.
+        self._lazy_indexes: Dict[type, object] = {}
+        self._plan_calories: Dict[Tuple[str, ...], float] = {}
+        self._journal: Optional[journal.Journal] = None
+        self._version = 0
+        self._cache: Optional[ResultCache] = None
 
     @property
     def recipes(self) -> List[Recipe]:
@@ -24,7 +60,23 @@ class Cookbook:
 
         :return: список рецептов
         """
-        return self._recipes
+        return list(self._recipes)
+
+    @property
+    def filename(self) -> str:
+        """Возвращает путь к файлу кулинарной книги.
+
+        :return: путь к файлу
+        """
+        return self._filename
+
+    @property
+    def version(self) -> int:
+        """Возвращает номер версии книги; растет при каждом изменении рецептов.
+
+        :return: номер версии
+        """
+        return self._version
 
     @property
     def count(self) -> int:
@@ -39,87 +91,568 @@ class Cookbook:
 
         :param recipe: рецепт в кулинарной книге
         """
-        if any(r.name.lower() == recipe.name.lower() for r in self._recipes):
+        key = fold(recipe.name)
+        if key in self._by_name:
             return False
 
-        self._recipes.append(recipe)
+        self._by_name[key] = recipe
+        self._recipes[recipe] = self._next_position
+        self._next_position += 1
+        for index in self._indexes:
+            index.add(recipe)
+        recipe._attach(self)
+        self._plan_calories.clear()
+        self._version += 1
+        if self._journal is not None:
+            self._journal.append({'op': 'add', 'recipe': recipe.to_dict()})
+        return True
+
+    def add_recipes(self, recipes: Iterable[Union[Recipe, dict]]) -> ImportReport:
+        """Добавляет много рецептов за один проход.
+
+        Дубликаты (в книге или внутри самого потока) отклоняются по индексу
+        названий, а все индексы книги обновляются один раз для всей партии.
+        Партия добавляется целиком: если поток рецептов прерывается ошибкой
+        (например, испорченная строка файла), книга не меняется.
+
+        :param recipes: рецепты или их словари (как у Recipe.to_dict); может быть генератором
+        :return: сколько добавлено и названия отклоненных рецептов
+        """
+        added: List[Recipe] = []
+        rejected: List[str] = []
+        batch: Dict[str, Recipe] = {}
+        for recipe in recipes:
+            if isinstance(recipe, dict):
+                recipe = Recipe.from_dict(recipe)
+            key = fold(recipe.name)
+            if key in self._by_name or key in batch:
+                rejected.append(recipe.name)
+                continue
+            batch[key] = recipe
+            added.append(recipe)
+        self._by_name.update(batch)
+        for recipe in added:
+            self._recipes[recipe] = self._next_position
+            self._next_position += 1
+        for index in self._indexes:
+            index.add_many(added)
+        for recipe in added:
+            recipe._attach(self)
+            if self._journal is not None:
+                self._journal.append({'op': 'add', 'recipe': recipe.to_dict()})
+        if added:
+            self._plan_calories.clear()
+            self._version += 1
+        return ImportReport(len(added), rejected)
+
+    def append_recipe(self, recipe: Recipe) -> bool:
+        """Добавляет рецепт и дописывает его в конец файла книги,
+        не перезаписывая остальные рецепты.
+
+        :param recipe: рецепт
+        :return: добавлен ли рецепт
+        """
+        if not self.add_recipe(recipe):
+            return False
+        storage.append_recipe(self._filename, recipe)
         return True
 
+    def load(self, filename: Optional[str] = None) -> int:
+        """Загружает рецепты из файла, читая их по одному.
+        Рецепты с уже существующими названиями пропускаются.
+
+        :param filename: путь к файлу (по умолчанию - файл книги)
+        :return: количество добавленных рецептов
+        """
+        return self.add_recipes(storage.iter_recipes(filename or self._filename)).added
+
+    def save(self, filename: Optional[str] = None):
+        """Атомарно сохраняет все рецепты в файл.
+        При открытом журнале сохранение в файл книги заодно очищает журнал,
+        а без журнала в файле книги сохраняется отметка уже учтенных сегментов.
+
+        :param filename: путь к файлу (по умолчанию - файл книги)
+        """
+        if filename in (None, self._filename):
+            if self._journal is not None:
+                self._journal.checkpoint(self._recipes)
+                return
+            storage.write_recipes(self._filename, self._recipes, storage.read_meta(self._filename) or None)
+            return
+        storage.write_recipes(filename, self._recipes)
+
+    def open_journal(self, journal_filename: Optional[str] = None,
+                     compact_threshold: int = journal.DEFAULT_COMPACT_THRESHOLD,
+                     commit_interval: float = journal.DEFAULT_COMMIT_INTERVAL,
+                     sync: bool = False) -> int:
+        """Загружает книгу из файла и журнала изменений и начинает журналировать изменения.
+
+        Добавление и удаление рецептов, правка рецептов и их ингредиентов
+        дописываются в журнал вместо перезаписи файла книги; когда журнал
+        вырастает, он в фоне сворачивается в файл книги.
+
+        :param journal_filename: базовый путь журнала (по умолчанию - файл книги + '.journal')
+        :param compact_threshold: размер сегмента журнала в байтах, после которого он сворачивается
+        :param commit_interval: сколько секунд копить записи перед общим fsync
+        :param sync: ждать ли фиксации каждой записи на диске
+        :return: количество загруженных рецептов
+        """
+        if self._journal is not None:
+            raise ValueError("Журнал уже открыт")
+        if self._recipes:
+            raise ValueError("Журнал можно открыть только для пустой кулинарной книги")
+        path = journal_filename or self._filename + '.journal'
+        added = self.add_recipes(journal.replay(self._filename, path)).added
+        self._journal = journal.Journal(self._filename, path, compact_threshold, commit_interval, sync)
+        return added
+
+    def flush_journal(self):
+        """Дожидается записи на диск всех изменений, попавших в журнал.
+        """
+        if self._journal is not None:
+            self._journal.flush()
+
+    def close_journal(self):
+        """Фиксирует оставшиеся записи, сворачивает журнал в файл книги и закрывает его.
+        """
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+
+    def enable_cache(self, max_size: int = 1024, ttl: Optional[float] = None):
+        """Включает кеш результатов поиска по ингредиентам и категориям и списков покупок.
+
+        Результаты запоминаются вместе с версией книги, поэтому любое изменение
+        рецептов или ингредиентов делает их устаревшими.
+
+        :param max_size: сколько результатов хранить
+        :param ttl: время жизни результата в секундах (None - без ограничения)
+        """
+        self._cache = ResultCache(max_size, ttl)
+
+    def disable_cache(self):
+        """Выключает кеш результатов и освобождает его память.
+        """
+        self._cache = None
+
+    def cache_stats(self) -> Optional[CacheStats]:
+        """Возвращает статистику кеша результатов.
+
+        :return: статистика или None, если кеш выключен
+        """
+        return self._cache.stats() if self._cache is not None else None
+
+    def _cached(self, key: tuple, compute):
+        """Возвращает результат запроса из кеша или вычисляет его.
+
+        :param key: нормализованный запрос
+        :param compute: функция, вычисляющая результат (список или словарь)
+        :return: собственная копия результата для вызывающего
+        """
+        if self._cache is None:
+            return compute()
+        return self._cache.get_or_compute(key, self._version, compute).copy()
+
+    def save_snapshot(self, filename: str):
+        """Сохраняет книгу в бинарный снимок для быстрого открытия через SnapshotCookbook.
+
+        :param filename: путь к файлу снимка
+        """
+        snapshot.write_snapshot(filename, self._recipes)
+
+    def pack(self):
+        """Переводит ингредиенты всех рецептов в компактное хранилище на массивах.
+        """
+        for recipe in self._recipes:
+            recipe.pack()
+
     def remove_recipe(self, recipe_name: str) -> bool:
         """Удаляет рецепт по названию.
 
         :return: найден ли рецепт при попытке его удалить
         """
-        for i, recipe in enumerate(self._recipes):
-            if recipe.name.lower() == recipe_name.lower():
-                del self._recipes[i]
-                return True
-        return False
+        recipe = self._by_name.pop(fold(recipe_name), None)
+        if recipe is None:
+            return False
+        del self._recipes[recipe]
+        for index in self._indexes:
+            index.discard(recipe)
+        recipe._detach(self)
+        self._plan_calories.clear()
+        self._version += 1
+        if self._journal is not None:
+            self._journal.append({'op': 'remove', 'name': recipe.name})
+        return True
 
     def get_recipe(self, recipe_name: str) -> Optional[Recipe]:
         """Находит рецепт по названию.
 
         :return: название рецепта
         """
-        for recipe in self._recipes:
-            if recipe.name.lower() == recipe_name.lower():
-                return recipe
-        return None
+        return self._by_name.get(fold(recipe_name))
+
+    def search_recipes_by_prefix(self, prefix: str, limit: int = 10) -> List[Recipe]:
+        """Находит рецепты, названия которых начинаются с префикса (для автодополнения).
+
+        :param prefix: начало названия, без учета регистра
+        :param limit: сколько рецептов вернуть
+        :return: рецепты в алфавитном порядке названий
+        """
+        return self._prefix_index.search(prefix, limit)
+
+    def search_recipes_fuzzy(self, query: str, limit: int = 10,
+                             min_similarity: float = 0.3) -> List[Tuple[Recipe, float]]:
+        """Находит рецепты с похожими названиями, допуская опечатки.
+
+        :param query: запрос
+        :param limit: сколько рецептов вернуть
+        :param min_similarity: минимальное сходство по триграммам, от 0 до 1
+        :return: список (рецепт, сходство) по убыванию сходства
+        """
+        return self._lazy_index(NameTrigramIndex).search(query, limit, min_similarity)
+
+    def search_recipes_text(self, query: str, limit: int = 10) -> List[Tuple[Recipe, float]]:
+        """Ищет рецепты по словам в названии, описании и инструкциях (ранжирование BM25).
+
+        :param query: запрос; слова приводятся к основам, регистр не важен
+        :param limit: сколько рецептов вернуть
+        :return: список (рецепт, оценка) по убыванию оценки
+        """
+        return self._lazy_index(FullTextIndex).search(query, limit)
+
+    def find_similar_recipes(self, recipe_name: str, limit: int = 10,
+                             min_similarity: float = 0.0) -> List[Tuple[Recipe, float]]:
+        """Находит рецепты, похожие на данный по набору ингредиентов.
+
+        Кандидаты отбираются по MinHash/LSH и ранжируются по точному
+        коэффициенту Жаккара; очень непохожие рецепты могут не попасть в выдачу.
+
+        :param recipe_name: название рецепта
+        :param limit: сколько рецептов вернуть
+        :param min_similarity: минимальное сходство от 0 до 1
+        :return: список (рецепт, сходство) по убыванию сходства
+        """
+        recipe = self.get_recipe(recipe_name)
+        if recipe is None:
+            return []
+        return self._lazy_index(SimilarityIndex).similar(recipe, limit, min_similarity)
+
+    def build_similarity_graph(self, min_similarity: float = 0.5) -> Dict[Recipe, List[Tuple[Recipe, float]]]:
+        """Строит граф похожих рецептов для всей книги.
+
+        :param min_similarity: минимальное сходство для ребра
+        :return: рецепт -> список (похожий рецепт, сходство)
+        """
+        return self._lazy_index(SimilarityIndex).graph(min_similarity)
+
+    def _lazy_index(self, cls: type):
+        """Возвращает индекс, который строится по всей книге при первом обращении
+        и затем обновляется вместе с остальными индексами.
+
+        :param cls: класс индекса
+        :return: индекс
+        """
+        index = self._lazy_indexes.get(cls)
+        if index is None:
+            index = self._lazy_indexes[cls] = cls()
+            index.add_many(list(self._recipes))
+            self._indexes.append(index)
+        return index
+
+    def _check_rename(self, recipe: Recipe, new_name: str):
+        """Проверяет, что рецепт можно переименовать без конфликта в книге.
+
+        :param recipe: переименовываемый рецепт
+        :param new_name: новое название
+        """
+        other = self._by_name.get(fold(new_name))
+        if other is not None and other is not recipe:
+            raise ValueError(f"Рецепт '{new_name}' уже есть в кулинарной книге")
+
+    def _on_recipe_changed(self, recipe: Recipe, event: str, old_value):
+        """Обновляет индексы после изменения рецепта.
+
+        :param recipe: измененный рецепт
+        :param event: что изменилось
+        :param old_value: прежнее значение
+        """
+        if event == 'name':
+            self._by_name.pop(fold(old_value), None)
+            self._by_name[fold(recipe.name)] = recipe
+        if event in ('name', 'ingredients', 'calories'):
+            self._plan_calories.clear()
+        self._version += 1
+        for index in self._indexes:
+            index.on_change(recipe, event, old_value)
+        if self._journal is not None:
+            for record in journal.records_for_change(recipe, event, old_value):
+                self._journal.append(record)
+
+    def _in_book_order(self, recipes: Iterable[Recipe]) -> List[Recipe]:
+        """Упорядочивает рецепты в порядке их добавления в книгу.
+
+        :param recipes: рецепты из книги
+        :return: упорядоченный список
+        """
+        return sorted(recipes, key=self._recipes.__getitem__)
 
     def find_recipes_by_ingredient(self, ingredient_name: str) -> List[Recipe]:
         """Находит рецепты, содержащие указанный ингредиент.
 
         :return: рецепт с ингридиентом
         """
-        return [recipe for recipe in self._recipes
-                if recipe.contains_ingredient(ingredient_name)]
+        return self._cached(('ingredient', fold(ingredient_name)),
+                            lambda: self._in_book_order(self._ingredient_index.recipes_with(ingredient_name)))
+
+    def find_recipes_by_all_ingredients(self, ingredient_names: List[str]) -> List[Recipe]:
+        """Находит рецепты, содержащие все указанные ингредиенты.
+
+        :param ingredient_names: названия ингредиентов
+        :return: рецепты со всеми ингредиентами
+        """
+        return self._cached(('all_ingredients', frozenset(map(fold, ingredient_names))),
+                            lambda: self._in_book_order(self._ingredient_index.recipes_with_all(ingredient_names)))
+
+    def find_recipes_by_any_ingredient(self, ingredient_names: List[str]) -> List[Recipe]:
+        """Находит рецепты, содержащие хотя бы один из указанных ингредиентов.
+
+        :param ingredient_names: названия ингредиентов
+        :return: рецепты хотя бы с одним ингредиентом
+        """
+        return self._cached(('any_ingredient', frozenset(map(fold, ingredient_names))),
+                            lambda: self._in_book_order(self._ingredient_index.recipes_with_any(ingredient_names)))
+
+    def rank_recipes_by_pantry(self, pantry: List[str],
+                               limit: Optional[int] = None) -> List[Tuple[Recipe, int, int]]:
+        """Ранжирует рецепты по тому, сколько продуктов из кладовой они используют.
+
+        Выше стоят рецепты, использующие больше продуктов; при равенстве -
+        те, которым не хватает меньшего числа ингредиентов.
+        Рецепты, не использующие ни одного продукта, не возвращаются.
+
+        :param pantry: названия имеющихся продуктов
+        :param limit: сколько лучших рецептов вернуть (все, если не указано)
+        :return: список (рецепт, использовано продуктов, не хватает ингредиентов)
+        """
+        index = self._ingredient_index
+        ranked = [(recipe, used, index.distinct_count(recipe) - used)
+                  for recipe, used in index.count_matches(pantry).items()]
+
+        def rank(item):
+            return -item[1], item[2], self._recipes[item[0]]
+
+        if limit is not None:
+            return heapq.nsmallest(limit, ranked, key=rank)
+        return sorted(ranked, key=rank)
 
     def find_recipes_by_category(self, category: str) -> List[Recipe]:
         """Находит рецепты по категории.
 
         :return: рецепт
         """
-        return [recipe for recipe in self._recipes
-                if recipe.category.lower() == category.lower()]
+        return self._cached(('category', fold(category)),
+                            lambda: self._in_book_order(self._category_index.recipes_in(category)))
+
+    def count_recipes_in_category(self, category: str) -> int:
+        """Возвращает число рецептов в категории.
+
+        :param category: категория, без учета регистра
+        :return: число рецептов
+        """
+        return self._category_index.count(category)
+
+    def _facet_filter(self, category: Optional[str], ingredient_names: Optional[List[str]],
+                      min_calories: Optional[float], max_calories: Optional[float]) -> Iterable[Recipe]:
+        """Отбирает рецепты по категории, ингредиентам и диапазону калорий.
+
+        :param category: категория или None
+        :param ingredient_names: ингредиенты, которые должны быть все, или None
+        :param min_calories: нижняя граница калорий или None
+        :param max_calories: верхняя граница калорий или None
+        :return: подходящие рецепты
+        """
+        selected = self._select(category, ingredient_names)
+        if min_calories is None and max_calories is None:
+            return self._recipes.keys() if selected is None else selected
+        calorie_index = self._calorie_index
+        if selected is None:
+            return list(calorie_index.between(min_calories, max_calories))
+        if len(selected) <= calorie_index.count_between(min_calories, max_calories):
+            low = float('-inf') if min_calories is None else min_calories
+            high = float('inf') if max_calories is None else max_calories
+            return [recipe for recipe in selected if low <= recipe.calculate_calories() <= high]
+        return [recipe for recipe in calorie_index.between(min_calories, max_calories)
+                if recipe in selected]
+
+    def _select(self, category: Optional[str],
+                ingredient_names: Optional[List[str]]) -> Optional[Set[Recipe]]:
+        """Пересекает рецепты категории и рецепты со всеми ингредиентами.
+
+        :param category: категория или None
+        :param ingredient_names: ингредиенты или None
+        :return: множество рецептов или None, если фильтров нет
+        """
+        candidates = []
+        if category is not None:
+            candidates.append(self._category_index.recipes_in(category))
+        if ingredient_names:
+            candidates.append(self._ingredient_index.recipes_with_all(ingredient_names))
+        if not candidates:
+            return None
+        candidates.sort(key=len)
+        return set(candidates[0]).intersection(*candidates[1:])
+
+    def find_recipes_by_calories(self, min_calories: Optional[float] = None,
+                                 max_calories: Optional[float] = None) -> List[Recipe]:
+        """Находит рецепты с калорийностью в диапазоне.
+
+        :param min_calories: минимальная калорийность включительно
+        :param max_calories: максимальная калорийность включительно
+        :return: рецепты по возрастанию калорийности
+        """
+        return list(self._calorie_index.between(min_calories, max_calories))
+
+    def lowest_calorie_recipes(self, limit: int, category: Optional[str] = None,
+                               ingredient_names: Optional[List[str]] = None) -> List[Recipe]:
+        """Возвращает самые низкокалорийные рецепты, при желании - из категории и с ингредиентами.
+
+        :param limit: сколько рецептов вернуть
+        :param category: категория (без учета регистра)
+        :param ingredient_names: ингредиенты, которые должны быть в рецепте все
+        :return: рецепты по возрастанию калорийности
+        """
+        return self._calorie_index.top(limit, self._select(category, ingredient_names))
+
+    def highest_calorie_recipes(self, limit: int, category: Optional[str] = None,
+                                ingredient_names: Optional[List[str]] = None) -> List[Recipe]:
+        """Возвращает самые калорийные рецепты, при желании - из категории и с ингредиентами.
+
+        :param limit: сколько рецептов вернуть
+        :param category: категория (без учета регистра)
+        :param ingredient_names: ингредиенты, которые должны быть в рецепте все
+        :return: рецепты по убыванию калорийности
+        """
+        return self._calorie_index.top(limit, self._select(category, ingredient_names), descending=True)
+
+    def find_recipes_faceted(self, category: Optional[str] = None,
+                             ingredient_names: Optional[List[str]] = None,
+                             min_calories: Optional[float] = None,
+                             max_calories: Optional[float] = None) -> List[Recipe]:
+        """Находит рецепты по сочетанию категории, ингредиентов и диапазона калорий.
+
+        :param category: категория (без учета регистра)
+        :param ingredient_names: ингредиенты, которые должны быть в рецепте все
+        :param min_calories: минимальная калорийность включительно
+        :param max_calories: максимальная калорийность включительно
+        :return: рецепты в порядке добавления
+        """
+        return self._in_book_order(self._facet_filter(category, ingredient_names,
+                                                      min_calories, max_calories))
+
+    def get_category_counts(self, ingredient_names: Optional[List[str]] = None,
+                            min_calories: Optional[float] = None,
+                            max_calories: Optional[float] = None) -> Dict[str, int]:
+        """Возвращает число рецептов по категориям, при желании - среди отфильтрованных.
+
+        Без фильтров счетчики берутся из индекса категорий без перебора рецептов.
+
+        :param ingredient_names: ингредиенты, которые должны быть в рецепте все
+        :param min_calories: минимальная калорийность включительно
+        :param max_calories: максимальная калорийность включительно
+        :return: категория -> число рецептов
+        """
+        if not ingredient_names and min_calories is None and max_calories is None:
+            return self._category_index.counts()
+        return self._category_index.counts_within(
+            self._facet_filter(None, ingredient_names, min_calories, max_calories))
 
     def generate_shopping_list(self, recipe_names: List[str]) -> Dict[str, float]:
         """Генерирует список покупок для указанных рецептов.
         
         :return: список покупок
 
+        """
+        recipe_names = list(recipe_names)
+        return self._cached(('shopping_list', tuple(map(fold, recipe_names))),
+                            lambda: self._shopping_list(recipe_names))
+
+    def _shopping_list(self, recipe_names: List[str]) -> Dict[str, float]:
+        """Складывает количества ингредиентов указанных рецептов.
+
+        :param recipe_names: названия рецептов
+        :return: список покупок
         """
         shopping_list = {}
+        scanned = 0
 
         for recipe_name in recipe_names:
             recipe = self.get_recipe(recipe_name)
             if recipe:
-                for ingredient in recipe.ingredients:
-                    if ingredient.name in shopping_list:
-                        shopping_list[ingredient.name] += ingredient.quantity
+                for name, quantity, _, _ in recipe._ingredient_rows():
+                    scanned += 1
+                    if name in shopping_list:
+                        shopping_list[name] += quantity
                     else:
-                        shopping_list[ingredient.name] = ingredient.quantity
+                        shopping_list[name] = quantity
 
+        if metrics.enabled:
+            metrics.add_scanned(scanned)
         return shopping_list
 
+    def build_shopping_list(self, plan: Iterable[PlanEntry]) -> Dict[Tuple[str, str], float]:
+        """Генерирует список покупок с учетом единиц измерения и порций.
+
+        В отличие от generate_shopping_list, количества в разных единицах
+        пересчитываются в базовые (г, мл, шт), а несовместимые не складываются.
+
+        :param plan: названия рецептов или пары (название, порции); может быть генератором
+        :return: (ингредиент, единица) -> количество
+        """
+        return ShoppingListAggregator(self).consume(plan).result()
+
     def calculate_total_calories(self, recipe_names: List[str]) -> float:
         """Вычисляет общую калорийность для указанных рецептов.
+        Итог для набора названий запоминается до любого изменения книги.
         :return: общая каллорийность
                                """
+        key = tuple(map(fold, recipe_names))
+        total = self._plan_calories.get(key)
+        if total is not None:
+            return total
         total = 0.0
-        for recipe_name in recipe_names:
-            recipe = self.get_recipe(recipe_name)
+        for recipe_key in key:
+            recipe = self._by_name.get(recipe_key)
             if recipe:
                 total += recipe.calculate_calories()
+        if len(self._plan_calories) >= _PLAN_CACHE_SIZE:
+            del self._plan_calories[next(iter(self._plan_calories))]
+        self._plan_calories[key] = total
         return total
 
+    def plan_meals(self, min_calories: float, max_calories: float,
+                   count: Optional[int] = None, categories: Optional[List[str]] = None,
+                   pantry: Iterable[str] = (), objective: str = 'items',
+                   time_budget: float = 1.0, beam: int = 500) -> Optional[MealPlan]:
+        """Подбирает рецепты с суммарной калорийностью в заданном окне.
+
+        :param min_calories: нижняя граница калорий включительно
+        :param max_calories: верхняя граница калорий включительно
+        :param count: число рецептов (если categories не заданы)
+        :param categories: по одному рецепту из каждой категории
+        :param pantry: продукты, которые уже есть
+        :param objective: 'items' - меньше разных покупок, 'pantry' - больше продуктов из кладовой
+        :param time_budget: ограничение времени в секундах
+        :param beam: сколько кандидатов на место перебирать в первом, быстром проходе
+        :return: рацион или None
+        """
+        return plan_meals(self, min_calories, max_calories, count, categories,
+                          pantry, objective, time_budget, beam)
+
     def get_all_categories(self) -> List[str]:
         """Возвращает список всех категорий рецептов.
         :return: список всех категорий рецептов
         """
-        categories = set()
-        for recipe in self._recipes:
-            categories.add(recipe.category)
-        return list(categories)
+        return self._category_index.categories()
 
     def __str__(self) -> str:
         """Строковое представление кулинарной книги.
@@ -137,15 +670,15 @@ class Cookbook:
         """Печатает список покупок для указанных рецептов.
         :return: список покупок для указанных рецептов
         """
-        shopping_list = self.generate_shopping_list(recipe_names)
+        shopping_list = self.build_shopping_list(recipe_names)
 
         if not shopping_list:
             print("Список покупок пуст")
             return
 
         print("Список покупок:")
-        for ingredient, quantity in shopping_list.items():
-            print(f"{ingredient}: {quantity} г")
+        for (ingredient, unit), quantity in shopping_list.items():
+            print(f"{ingredient}: {quantity} {unit}")
 
 
 
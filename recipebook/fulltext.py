@@ -0,0 +1,113 @@
+"""
+Модуль полнотекстового поиска по рецептам. Содержит класс FullTextIndex
+"""
+
+import heapq
+import math
+from typing import Dict, List, Tuple
+from .recipe import Recipe
+from .text import tokenize
+
+
+class FullTextIndex:
+    """Обратный индекс по названию, описанию и инструкциям с ранжированием BM25.
+
+    Для каждого слова хранится список рецептов с частотой слова, поэтому
+    запрос просматривает только рецепты, содержащие слова запроса.
+    Слова названия считаются с весом NAME_WEIGHT.
+    """
+
+    K1 = 1.2
+    B = 0.75
+    NAME_WEIGHT = 2
+
+    def __init__(self):
+        """
+        Инициализирует пустой индекс.
+        """
+        self._postings: Dict[str, Dict[Recipe, int]] = {}
+        self._terms: Dict[Recipe, Dict[str, int]] = {}
+        self._lengths: Dict[Recipe, int] = {}
+        self._total_length = 0
+
+    def _count_terms(self, recipe: Recipe) -> Dict[str, int]:
+        """
+        Считает частоты слов рецепта.
+        :param recipe: рецепт
+        :return: основа слова -> частота
+        """
+        counts: Dict[str, int] = {}
+        for term in tokenize(recipe.name):
+            counts[term] = counts.get(term, 0) + self.NAME_WEIGHT
+        for term in tokenize(recipe.description) + tokenize(recipe.instructions):
+            counts[term] = counts.get(term, 0) + 1
+        return counts
+
+    def add(self, recipe: Recipe):
+        """
+        Добавляет рецепт в индекс.
+        :param recipe: рецепт
+        """
+        counts = self._count_terms(recipe)
+        self._terms[recipe] = counts
+        length = sum(counts.values())
+        self._lengths[recipe] = length
+        self._total_length += length
+        for term, frequency in counts.items():
+            self._postings.setdefault(term, {})[recipe] = frequency
+
+    def add_many(self, recipes: List[Recipe]):
+        """
+        Добавляет много рецептов сразу.
+        :param recipes: рецепты
+        """
+        for recipe in recipes:
+            self.add(recipe)
+
+    def discard(self, recipe: Recipe):
+        """
+        Удаляет рецепт из индекса.
+        :param recipe: рецепт
+        """
+        counts = self._terms.pop(recipe, None)
+        if counts is None:
+            return
+        self._total_length -= self._lengths.pop(recipe)
+        for term in counts:
+            posting = self._postings[term]
+            del posting[recipe]
+            if not posting:
+                del self._postings[term]
+
+    def on_change(self, recipe: Recipe, event: str, old_value):
+        """
+        Переиндексирует рецепт при изменении названия, описания или инструкций.
+        :param recipe: измененный рецепт
+        :param event: что изменилось
+        :param old_value: прежнее значение
+        """
+        if event in ('name', 'description', 'instructions'):
+            self.discard(recipe)
+            self.add(recipe)
+
+    def search(self, query: str, limit: int = 10) -> List[Tuple[Recipe, float]]:
+        """
+        Находит рецепты по словам запроса.
+        :param query: запрос
+        :param limit: сколько рецептов вернуть
+        :return: список (рецепт, оценка BM25) по убыванию оценки
+        """
+        count = len(self._terms)
+        if not count:
+            return []
+        average_length = self._total_length / count or 1.0
+        scores: Dict[Recipe, float] = {}
+        for term in set(tokenize(query)):
+            posting = self._postings.get(term)
+            if not posting:
+                continue
+            idf = math.log(1 + (count - len(posting) + 0.5) / (len(posting) + 0.5))
+            for recipe, frequency in posting.items():
+                norm = self.K1 * (1 - self.B + self.B * self._lengths[recipe] / average_length)
+                scores[recipe] = scores.get(recipe, 0.0) + idf * frequency * (self.K1 + 1) / (frequency + norm)
+        return heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
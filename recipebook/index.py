@@ -0,0 +1,737 @@
+"""
+Модуль с индексами кулинарной книги. Содержит классы IngredientIndex,
+CategoryIndex, CalorieIndex, NamePrefixIndex и NameTrigramIndex
+
+Каждый индекс поддерживает add, add_many, discard и on_change: кулинарная
+книга вызывает их при добавлении, массовой загрузке, удалении и изменении
+рецептов.
+"""
+
+import heapq
+import math
+from bisect import bisect_left, insort
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
+from . import metrics
+from .recipe import Recipe
+from .sortedlist import SortedList
+from .text import fold, trigrams
+
+
+class IngredientIndex:
+    """Обратный индекс: ингредиент -> рецепты, в которые он входит."""
+
+    def __init__(self):
+        """
+        Инициализирует пустой индекс.
+        """
+        self._postings: Dict[str, Set[Recipe]] = {}
+        self._keys: Dict[Recipe, Dict[str, int]] = {}
+
+    @staticmethod
+    def _collect(recipe: Recipe) -> Dict[str, int]:
+        """
+        Считает нормализованные названия ингредиентов рецепта.
+        :param recipe: рецепт
+        :return: название -> сколько раз встречается в рецепте
+        """
+        keys: Dict[str, int] = {}
+        for name in recipe.get_ingredient_names():
+            key = fold(name)
+            keys[key] = keys.get(key, 0) + 1
+        return keys
+
+    def add(self, recipe: Recipe):
+        """
+        Добавляет рецепт в индекс.
+        :param recipe: рецепт
+        """
+        keys = self._collect(recipe)
+        self._keys[recipe] = keys
+        for key in keys:
+            self._postings.setdefault(key, set()).add(recipe)
+
+    def add_many(self, recipes: List[Recipe]):
+        """
+        Добавляет много рецептов сразу.
+        :param recipes: рецепты
+        """
+        for recipe in recipes:
+            self.add(recipe)
+
+    def discard(self, recipe: Recipe):
+        """
+        Удаляет рецепт из индекса.
+        :param recipe: рецепт
+        """
+        for key in self._keys.pop(recipe, {}):
+            self._unlink(key, recipe)
+
+    def on_change(self, recipe: Recipe, event: str, old_value):
+        """
+        Переиндексирует рецепт, если изменился состав ингредиентов.
+        :param recipe: измененный рецепт
+        :param event: что изменилось
+        :param old_value: прежнее значение
+        """
+        if event != 'ingredients':
+            return
+        old_keys = self._keys.get(recipe, {})
+        new_keys = self._collect(recipe)
+        for key in old_keys.keys() - new_keys.keys():
+            self._unlink(key, recipe)
+        for key in new_keys.keys() - old_keys.keys():
+            self._postings.setdefault(key, set()).add(recipe)
+        self._keys[recipe] = new_keys
+
+    def _unlink(self, key: str, recipe: Recipe):
+        """
+        Убирает рецепт из списка для ингредиента.
+        :param key: нормализованное название ингредиента
+        :param recipe: рецепт
+        """
+        posting = self._postings.get(key)
+        if posting is None:
+            return
+        posting.discard(recipe)
+        if not posting:
+            del self._postings[key]
+
+    def recipes_with(self, ingredient_name: str) -> Set[Recipe]:
+        """
+        Возвращает рецепты с ингредиентом.
+        :param ingredient_name: название ингредиента
+        :return: множество рецептов (не изменять)
+        """
+        posting = self._postings.get(fold(ingredient_name), set())
+        if metrics.enabled:
+            metrics.add_scanned(len(posting))
+        return posting
+
+    def recipes_with_all(self, ingredient_names: Iterable[str]) -> Set[Recipe]:
+        """
+        Возвращает рецепты, содержащие все ингредиенты.
+        :param ingredient_names: названия ингредиентов
+        :return: множество рецептов
+        """
+        postings = [self._postings.get(name, set()) for name in set(map(fold, ingredient_names))]
+        if not postings:
+            return set()
+        postings.sort(key=len)
+        result = set(postings[0])
+        scanned = len(result)
+        for posting in postings[1:]:
+            if not result:
+                break
+            scanned += len(result)
+            result &= posting
+        if metrics.enabled:
+            metrics.add_scanned(scanned)
+        return result
+
+    def recipes_with_any(self, ingredient_names: Iterable[str]) -> Set[Recipe]:
+        """
+        Возвращает рецепты, содержащие хотя бы один из ингредиентов.
+        :param ingredient_names: названия ингредиентов
+        :return: множество рецептов
+        """
+        result: Set[Recipe] = set()
+        scanned = 0
+        for name in set(map(fold, ingredient_names)):
+            posting = self._postings.get(name, set())
+            scanned += len(posting)
+            result |= posting
+        if metrics.enabled:
+            metrics.add_scanned(scanned)
+        return result
+
+    def count_matches(self, ingredient_names: Iterable[str]) -> Dict[Recipe, int]:
+        """
+        Считает, сколько из указанных ингредиентов входит в каждый рецепт.
+        Рецепты без совпадений не попадают в результат.
+        :param ingredient_names: названия ингредиентов
+        :return: рецепт -> число совпавших ингредиентов
+        """
+        matches: Dict[Recipe, int] = {}
+        scanned = 0
+        for name in set(map(fold, ingredient_names)):
+            posting = self._postings.get(name, ())
+            scanned += len(posting)
+            for recipe in posting:
+                matches[recipe] = matches.get(recipe, 0) + 1
+        if metrics.enabled:
+            metrics.add_scanned(scanned)
+        return matches
+
+    def distinct_count(self, recipe: Recipe) -> int:
+        """
+        Возвращает число разных ингредиентов рецепта.
+        :param recipe: рецепт
+        :return: число разных ингредиентов
+        """
+        return len(self._keys.get(recipe, ()))
+
+    def keys_of(self, recipe: Recipe) -> Iterable[str]:
+        """
+        Возвращает нормализованные названия ингредиентов рецепта.
+        :param recipe: рецепт
+        :return: названия без повторов (не изменять)
+        """
+        return self._keys.get(recipe, {}).keys()
+
+
+class CategoryIndex:
+    """Индекс категория -> рецепты с числом рецептов в каждой категории."""
+
+    def __init__(self):
+        """
+        Инициализирует пустой индекс.
+        """
+        self._members: Dict[str, Set[Recipe]] = {}
+        self._spellings: Dict[str, Dict[str, int]] = {}
+
+    def add(self, recipe: Recipe):
+        """
+        Добавляет рецепт в индекс.
+        :param recipe: рецепт
+        """
+        self._link(recipe.category, recipe)
+
+    def add_many(self, recipes: List[Recipe]):
+        """
+        Добавляет много рецептов сразу.
+        :param recipes: рецепты
+        """
+        for recipe in recipes:
+            self.add(recipe)
+
+    def discard(self, recipe: Recipe):
+        """
+        Удаляет рецепт из индекса.
+        :param recipe: рецепт
+        """
+        self._unlink(recipe.category, recipe)
+
+    def on_change(self, recipe: Recipe, event: str, old_value):
+        """
+        Переносит рецепт в новую категорию.
+        :param recipe: измененный рецепт
+        :param event: что изменилось
+        :param old_value: прежнее значение
+        """
+        if event == 'category':
+            self._unlink(old_value, recipe)
+            self._link(recipe.category, recipe)
+
+    def _link(self, category: str, recipe: Recipe):
+        """
+        Добавляет рецепт в категорию.
+        :param category: категория в исходном написании
+        :param recipe: рецепт
+        """
+        key = fold(category)
+        self._members.setdefault(key, set()).add(recipe)
+        spellings = self._spellings.setdefault(key, {})
+        spellings[category] = spellings.get(category, 0) + 1
+
+    def _unlink(self, category: str, recipe: Recipe):
+        """
+        Убирает рецепт из категории.
+        :param category: категория в исходном написании
+        :param recipe: рецепт
+        """
+        key = fold(category)
+        members = self._members.get(key)
+        if members is None or recipe not in members:
+            return
+        members.discard(recipe)
+        spellings = self._spellings[key]
+        spellings[category] -= 1
+        if not spellings[category]:
+            del spellings[category]
+        if not members:
+            del self._members[key]
+            del self._spellings[key]
+
+    def recipes_in(self, category: str) -> Set[Recipe]:
+        """
+        Возвращает рецепты категории.
+        :param category: категория, без учета регистра
+        :return: множество рецептов (не изменять)
+        """
+        members = self._members.get(fold(category), set())
+        if metrics.enabled:
+            metrics.add_scanned(len(members))
+        return members
+
+    def count(self, category: str) -> int:
+        """
+        Возвращает число рецептов в категории.
+        :param category: категория, без учета регистра
+        :return: число рецептов
+        """
+        return len(self._members.get(fold(category), ()))
+
+    def categories(self) -> List[str]:
+        """
+        Возвращает все написания категорий, встречающиеся в книге.
+        :return: список категорий
+        """
+        return [category for spellings in self._spellings.values() for category in spellings]
+
+    def display_name(self, key: str) -> str:
+        """
+        Возвращает написание категории для показа.
+        :param key: нормализованная категория
+        :return: одно из написаний категории
+        """
+        return next(iter(self._spellings[key]))
+
+    def counts(self) -> Dict[str, int]:
+        """
+        Возвращает число рецептов по категориям.
+        :return: категория -> число рецептов
+        """
+        return {self.display_name(key): len(members) for key, members in self._members.items()}
+
+    def counts_within(self, recipes: Iterable[Recipe]) -> Dict[str, int]:
+        """
+        Считает рецепты из набора по категориям (фасет для отфильтрованной выдачи).
+        :param recipes: рецепты
+        :return: категория -> число рецептов
+        """
+        counts: Dict[str, int] = {}
+        for recipe in recipes:
+            key = fold(recipe.category)
+            counts[key] = counts.get(key, 0) + 1
+        return {self.display_name(key): count for key, count in counts.items()}
+
+
+class CalorieIndex:
+    """Рецепты, упорядоченные по калорийности, для запросов по диапазону и top-k."""
+
+    def __init__(self):
+        """
+        Инициализирует пустой индекс.
+        """
+        self._entries = SortedList()
+        self._keys: Dict[Recipe, Tuple[float, int]] = {}
+        self._recipes: Dict[int, Recipe] = {}
+        self._serial = 0
+
+    def add(self, recipe: Recipe):
+        """
+        Добавляет рецепт в индекс.
+        :param recipe: рецепт
+        """
+        key = (recipe.calculate_calories(), self._serial)
+        self._serial += 1
+        self._keys[recipe] = key
+        self._recipes[key[1]] = recipe
+        self._entries.add(key)
+
+    def add_many(self, recipes: List[Recipe]):
+        """
+        Добавляет много рецептов сразу: индекс пересобирается одной сортировкой.
+        :param recipes: рецепты
+        """
+        keys = []
+        for recipe in recipes:
+            key = (recipe.calculate_calories(), self._serial)
+            self._serial += 1
+            self._keys[recipe] = key
+            self._recipes[key[1]] = recipe
+            keys.append(key)
+        self._entries.update(keys)
+
+    def discard(self, recipe: Recipe):
+        """
+        Удаляет рецепт из индекса.
+        :param recipe: рецепт
+        """
+        key = self._keys.pop(recipe, None)
+        if key is not None:
+            del self._recipes[key[1]]
+            self._entries.remove(key)
+
+    def on_change(self, recipe: Recipe, event: str, old_value):
+        """
+        Перемещает рецепт, если изменилась его калорийность.
+        :param recipe: измененный рецепт
+        :param event: что изменилось
+        :param old_value: прежнее значение
+        """
+        if event not in ('ingredients', 'calories'):
+            return
+        key = self._keys.get(recipe)
+        if key is None:
+            return
+        calories = recipe.calculate_calories()
+        if calories != key[0]:
+            self._entries.remove(key)
+            key = (calories, key[1])
+            self._keys[recipe] = key
+            self._entries.add(key)
+
+    def between(self, low: Optional[float] = None, high: Optional[float] = None) -> Iterator[Recipe]:
+        """
+        Перебирает рецепты с калорийностью в диапазоне по возрастанию калорий.
+        :param low: нижняя граница включительно (None - без границы)
+        :param high: верхняя граница включительно (None - без границы)
+        :return: итератор рецептов
+        """
+        start = self._entries if low is None else self._entries.irange((low, -1))
+        for calories, serial in start:
+            if high is not None and calories > high:
+                return
+            yield self._recipes[serial]
+
+    def count_between(self, low: Optional[float] = None, high: Optional[float] = None) -> int:
+        """
+        Считает рецепты с калорийностью в диапазоне.
+        :param low: нижняя граница включительно (None - без границы)
+        :param high: верхняя граница включительно (None - без границы)
+        :return: число рецептов
+        """
+        below = 0 if low is None else self._entries.rank((low, -1))
+        upto = len(self._entries) if high is None else self._entries.rank((high, math.inf), right=True)
+        return max(0, upto - below)
+
+    def _ordered(self, descending: bool) -> Iterator[Recipe]:
+        """
+        Перебирает все рецепты по калорийности.
+        :param descending: по убыванию
+        :return: итератор рецептов
+        """
+        entries = reversed(self._entries) if descending else iter(self._entries)
+        return (self._recipes[serial] for _, serial in entries)
+
+    def top(self, limit: int, within: Optional[Set[Recipe]] = None,
+            descending: bool = False) -> List[Recipe]:
+        """
+        Возвращает рецепты с наименьшей (или наибольшей) калорийностью.
+
+        Если задан набор within, выбирается более дешевый путь: обход индекса
+        с фильтром (когда набор большой) или частичная сортировка самого набора.
+
+        :param limit: сколько рецептов вернуть
+        :param within: ограничить выбор этими рецептами
+        :param descending: брать самые калорийные
+        :return: рецепты по возрастанию (убыванию) калорий
+        """
+        if within is None:
+            return list(islice(self._ordered(descending), limit))
+        if limit * len(self._keys) < len(within) ** 2:
+            return list(islice((recipe for recipe in self._ordered(descending) if recipe in within), limit))
+        select = heapq.nlargest if descending else heapq.nsmallest
+        return select(limit, (recipe for recipe in within if recipe in self._keys),
+                      key=self._keys.__getitem__)
+
+
+class _TrieNode:
+    """Узел префиксного дерева: дочерние узлы или отсортированные корзины суффиксов."""
+
+    __slots__ = ('children', 'terminal')
+
+    def __init__(self):
+        self.children: Dict[str, Union['_TrieNode', List[str]]] = {}
+        self.terminal = False
+
+
+class NamePrefixIndex:
+    """Префиксное дерево (burst trie) по нормализованным названиям рецептов.
+
+    Пока под узлом немного названий, их хвосты лежат в отсортированной
+    корзине; переполненная корзина превращается в узел. Это дает поиск
+    по префиксу за длину префикса плюс k и в разы меньше памяти, чем
+    по узлу на каждую букву.
+    """
+
+    _BUCKET_SIZE = 64
+
+    def __init__(self):
+        """
+        Инициализирует пустой индекс.
+        """
+        self._root = _TrieNode()
+        self._recipes: Dict[str, Recipe] = {}
+
+    def add(self, recipe: Recipe):
+        """
+        Добавляет рецепт в индекс.
+        :param recipe: рецепт
+        """
+        key = fold(recipe.name)
+        self._recipes[key] = recipe
+        self._insert(key)
+
+    def add_many(self, recipes: List[Recipe]):
+        """
+        Добавляет много рецептов сразу. Ключи вставляются по алфавиту,
+        поэтому новые суффиксы дописываются в конец корзин.
+        :param recipes: рецепты
+        """
+        keyed = sorted((fold(recipe.name), recipe) for recipe in recipes)
+        for key, recipe in keyed:
+            self._recipes[key] = recipe
+            self._insert(key)
+
+    def discard(self, recipe: Recipe):
+        """
+        Удаляет рецепт из индекса.
+        :param recipe: рецепт
+        """
+        key = fold(recipe.name)
+        if self._recipes.get(key) is recipe:
+            del self._recipes[key]
+            self._delete(key)
+
+    def on_change(self, recipe: Recipe, event: str, old_value):
+        """
+        Переносит рецепт под новое название при переименовании.
+        :param recipe: измененный рецепт
+        :param event: что изменилось
+        :param old_value: прежнее значение
+        """
+        if event != 'name':
+            return
+        old_key = fold(old_value)
+        if self._recipes.get(old_key) is recipe:
+            del self._recipes[old_key]
+            self._delete(old_key)
+        self.add(recipe)
+
+    def _insert(self, key: str):
+        """
+        Вставляет ключ в дерево.
+        :param key: нормализованное название
+        """
+        node = self._root
+        for i, char in enumerate(key):
+            child = node.children.get(char)
+            if child is None:
+                node.children[char] = [key[i + 1:]]
+                return
+            if isinstance(child, _TrieNode):
+                node = child
+                continue
+            insort(child, key[i + 1:])
+            if len(child) > self._BUCKET_SIZE:
+                node.children[char] = self._burst(child)
+            return
+        node.terminal = True
+
+    @staticmethod
+    def _burst(bucket: List[str]) -> _TrieNode:
+        """
+        Превращает переполненную корзину в узел с корзинами по следующей букве.
+        :param bucket: отсортированные суффиксы
+        :return: новый узел
+        """
+        node = _TrieNode()
+        for suffix in bucket:
+            if not suffix:
+                node.terminal = True
+            else:
+                node.children.setdefault(suffix[0], []).append(suffix[1:])
+        return node
+
+    def _delete(self, key: str):
+        """
+        Удаляет ключ из дерева, убирая опустевшие узлы.
+        :param key: нормализованное название
+        """
+        path: List[Tuple[_TrieNode, str]] = []
+        node = self._root
+        for i, char in enumerate(key):
+            child = node.children.get(char)
+            if child is None:
+                return
+            if isinstance(child, _TrieNode):
+                path.append((node, char))
+                node = child
+                continue
+            position = bisect_left(child, key[i + 1:])
+            if position < len(child) and child[position] == key[i + 1:]:
+                del child[position]
+                if not child:
+                    del node.children[char]
+            break
+        else:
+            node.terminal = False
+        while path and not node.terminal and not node.children:
+            node, char = path.pop()
+            del node.children[char]
+
+    def _walk(self, node: _TrieNode, prefix: str) -> Iterator[str]:
+        """
+        Перебирает ключи поддерева в лексикографическом порядке.
+        :param node: узел
+        :param prefix: префикс, соответствующий узлу
+        :return: итератор ключей
+        """
+        if node.terminal:
+            yield prefix
+        for char in sorted(node.children):
+            child = node.children[char]
+            if isinstance(child, _TrieNode):
+                yield from self._walk(child, prefix + char)
+            else:
+                for suffix in child:
+                    yield prefix + char + suffix
+
+    def _keys_with_prefix(self, prefix: str) -> Iterator[str]:
+        """
+        Перебирает ключи с указанным префиксом в лексикографическом порядке.
+        :param prefix: нормализованный префикс
+        :return: итератор ключей
+        """
+        node = self._root
+        for i, char in enumerate(prefix):
+            child = node.children.get(char)
+            if child is None:
+                return
+            if isinstance(child, _TrieNode):
+                node = child
+                continue
+            rest = prefix[i + 1:]
+            for suffix in child[bisect_left(child, rest):]:
+                if not suffix.startswith(rest):
+                    return
+                yield prefix[:i + 1] + suffix
+            return
+        yield from self._walk(node, prefix)
+
+    def search(self, prefix: str, limit: int = 10) -> List[Recipe]:
+        """
+        Находит рецепты, названия которых начинаются с префикса.
+        :param prefix: префикс (без учета регистра)
+        :param limit: сколько рецептов вернуть
+        :return: рецепты в алфавитном порядке названий
+        """
+        keys = self._keys_with_prefix(fold(prefix))
+        return [self._recipes[key] for key, _ in zip(keys, range(limit))]
+
+
+class NameTrigramIndex:
+    """Триграммный индекс названий рецептов для поиска с опечатками."""
+
+    def __init__(self):
+        """
+        Инициализирует пустой индекс.
+        """
+        self._postings: Dict[str, Set[str]] = {}
+        self._recipes: Dict[str, Recipe] = {}
+
+    def add(self, recipe: Recipe):
+        """
+        Добавляет рецепт в индекс.
+        :param recipe: рецепт
+        """
+        key = fold(recipe.name)
+        self._recipes[key] = recipe
+        for trigram in trigrams(key):
+            self._postings.setdefault(trigram, set()).add(key)
+
+    def add_many(self, recipes: List[Recipe]):
+        """
+        Добавляет много рецептов сразу.
+        :param recipes: рецепты
+        """
+        for recipe in recipes:
+            self.add(recipe)
+
+    def discard(self, recipe: Recipe):
+        """
+        Удаляет рецепт из индекса.
+        :param recipe: рецепт
+        """
+        self._remove_key(fold(recipe.name), recipe)
+
+    def on_change(self, recipe: Recipe, event: str, old_value):
+        """
+        Переиндексирует рецепт при переименовании.
+        :param recipe: измененный рецепт
+        :param event: что изменилось
+        :param old_value: прежнее значение
+        """
+        if event != 'name':
+            return
+        self._remove_key(fold(old_value), recipe)
+        self.add(recipe)
+
+    def _remove_key(self, key: str, recipe: Recipe):
+        """
+        Удаляет ключ рецепта из списков триграмм.
+        :param key: нормализованное название
+        :param recipe: рецепт
+        """
+        if self._recipes.get(key) is not recipe:
+            return
+        del self._recipes[key]
+        for trigram in trigrams(key):
+            posting = self._postings.get(trigram)
+            if posting is not None:
+                posting.discard(key)
+                if not posting:
+                    del self._postings[trigram]
+
+    def search(self, query: str, limit: int = 10, min_similarity: float = 0.3,
+               max_candidates: Optional[int] = 2000) -> List[Tuple[Recipe, float]]:
+        """
+        Находит рецепты с похожими названиями.
+
+        Сходство - коэффициент Жаккара по триграммам. Списки триграмм
+        запроса просматриваются от редких к частым. Название, не найденное
+        в первых i списках, имеет сходство не больше (q - i) / q, где q -
+        число триграмм запроса, поэтому просмотр останавливается, как только
+        эта граница опускается ниже порога или ниже limit-го лучшего
+        найденного сходства. Если кандидатов набирается больше
+        max_candidates, из последнего списка берутся первые по названию,
+        так что результат не зависит от порядка обхода множеств; точное
+        совпадение названия проверяется всегда.
+
+        :param query: запрос
+        :param limit: сколько рецептов вернуть
+        :param min_similarity: минимальное сходство от 0 до 1
+        :param max_candidates: предел числа проверяемых кандидатов (None - без предела)
+        :return: список (рецепт, сходство) по убыванию сходства
+        """
+        query_key = fold(query)
+        query_grams = trigrams(query_key)
+        if not query_grams or limit <= 0:
+            return []
+        count = len(query_grams)
+        grams = sorted(query_grams, key=lambda gram: (len(self._postings.get(gram, ())), gram))
+        seen: Set[str] = set()
+        scored = []
+        top: List[float] = []
+
+        def score(key: str):
+            seen.add(key)
+            key_grams = trigrams(key)
+            shared = len(query_grams & key_grams)
+            similarity = shared / (count + len(key_grams) - shared)
+            if similarity >= min_similarity:
+                scored.append((similarity, key))
+                if len(top) < limit:
+                    heapq.heappush(top, similarity)
+                elif similarity > top[0]:
+                    heapq.heapreplace(top, similarity)
+
+        if query_key in self._recipes:
+            score(query_key)
+        for position, gram in enumerate(grams):
+            bound = (count - position) / count
+            if bound < min_similarity or (len(top) == limit and bound < top[0]):
+                break
+            fresh = [key for key in self._postings.get(gram, ()) if key not in seen]
+            truncated = max_candidates is not None and len(seen) + len(fresh) > max_candidates
+            if truncated:
+                fresh = heapq.nsmallest(max(0, max_candidates - len(seen)), fresh)
+            for key in fresh:
+                score(key)
+            if truncated:
+                break
+        best = heapq.nsmallest(limit, scored, key=lambda item: (-item[0], item[1]))
+        return [(self._recipes[key], similarity) for similarity, key in best]
@@ -1,8 +1,12 @@
 
 #Модуль для работы с ингредиентами.Содержит Ingredient
 
+from sys import intern
+
 
 class Ingredient:
+    __slots__ = ('_name', '_quantity', '_unit', '_calories_per_unit', '_owners')
+
     def __init__(self, name: str, quantity: float, unit: str = "г", calories_per_unit: float = 0.0):
         """
         Инициализирует ингредиент.
@@ -11,10 +15,11 @@ class Ingredient:
         :param unit: единица измерения
         :param calories_per_unit: калории
         """
-        self._name = name
+        self._name = intern(name)
         self._quantity = quantity
-        self._unit = unit
+        self._unit = intern(unit)
         self._calories_per_unit = calories_per_unit
+        self._owners = ()
 
     @property
     def name(self) -> str:
@@ -35,7 +40,9 @@ class Ingredient:
         """
         if not value or not value.strip():
             raise ValueError("Название ингредиента не может быть пустым")
-        self._name = value.strip()
+        old_name = self._name
+        self._name = intern(value.strip())
+        self._notify('name', old_name)
 
     @property
     def quantity(self) -> float:
@@ -56,7 +63,9 @@ class Ingredient:
         """
         if value < 0:
             raise ValueError("Количество не может быть отрицательным")
+        old_quantity = self._quantity
         self._quantity = value
+        self._notify('quantity', old_quantity)
 
     @property
     def unit(self) -> str:
@@ -74,7 +83,9 @@ class Ingredient:
 
         :param value: единица измерения
         """
-        self._unit = value
+        old_unit = self._unit
+        self._unit = intern(value)
+        self._notify('unit', old_unit)
 
     @property
     def calories_per_unit(self) -> float:
@@ -93,7 +104,33 @@ class Ingredient:
         """
         if value < 0:
             raise ValueError("Калории не могут быть отрицательными")
+        old_calories = self._calories_per_unit
         self._calories_per_unit = value
+        self._notify('calories_per_unit', old_calories)
+
+    def _attach(self, owner):
+        """
+        Запоминает рецепт, в который входит ингредиент.
+        :param owner: рецепт
+        """
+        if not any(o is owner for o in self._owners):
+            self._owners += (owner,)
+
+    def _detach(self, owner):
+        """
+        Забывает рецепт, из которого ингредиент удален.
+        :param owner: рецепт
+        """
+        self._owners = tuple(o for o in self._owners if o is not owner)
+
+    def _notify(self, field: str, old_value):
+        """
+        Сообщает рецептам-владельцам об изменении ингредиента.
+        :param field: измененное поле
+        :param old_value: прежнее значение
+        """
+        for owner in self._owners:
+            owner._on_ingredient_changed(self, field, old_value)
 
     def total_calories(self) -> float:
         """
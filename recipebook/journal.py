@@ -0,0 +1,398 @@
+"""
+Модуль журнала изменений кулинарной книги (write-ahead log).
+
+Каждое изменение книги - добавление и удаление рецептов, правка полей
+рецепта, состава и ингредиентов - дописывается в журнал короткой строкой
+JSON, а не переписывает файл книги целиком. Журнал состоит из сегментов
+<журнал>.1, <журнал>.2, ...; при открытии книги сегменты проигрываются
+поверх последнего сохраненного файла книги (снимка). Номер последнего
+вошедшего в снимок сегмента хранится в служебном заголовке файла книги.
+
+Записи пишет фоновый поток: все, что накопилось за commit_interval,
+записывается и фиксируется одним fsync (group commit). Когда активный
+сегмент вырастает больше порога, он закрывается, а в фоне собирается новый
+снимок: файл книги плюс закрытые сегменты, после чего сегменты удаляются.
+"""
+
+import os
+import threading
+from typing import Dict, Iterable, Iterator, List, Optional
+from . import storage
+from .recipe import Recipe
+from .text import fold
+
+
+# Размер активного сегмента, после которого журнал сворачивается в снимок.
+DEFAULT_COMPACT_THRESHOLD = 4 * 1024 * 1024
+
+# Сколько секунд фоновый поток копит записи перед одним общим fsync.
+DEFAULT_COMMIT_INTERVAL = 0.01
+
+_META_FIELD = 'journal'
+
+
+def records_for_change(recipe: Recipe, event: str, old_value) -> List[dict]:
+    """
+    Строит записи журнала для изменения рецепта.
+    :param recipe: измененный рецепт
+    :param event: что изменилось (как в Recipe._notify)
+    :param old_value: прежнее значение или описание изменения состава
+    :return: список записей (пустой, если изменение не нужно журналировать)
+    """
+    if event == 'name':
+        return [{'op': 'set', 'name': old_value, 'field': 'name', 'value': recipe.name}]
+    if event in ('description', 'instructions', 'category'):
+        return [{'op': 'set', 'name': recipe.name, 'field': event, 'value': getattr(recipe, event)}]
+    if not isinstance(old_value, tuple):
+        return []
+    action = old_value[0]
+    if action == 'add':
+        return [{'op': 'add_ingredient', 'name': recipe.name, 'ingredient': old_value[1].to_dict()}]
+    if action == 'remove':
+        return [{'op': 'remove_ingredient', 'name': recipe.name, 'position': old_value[1]}]
+    ingredient, field = old_value[1], old_value[2]
+    value = getattr(ingredient, field)
+    return [{'op': 'set_ingredient', 'name': recipe.name, 'position': position,
+             'field': field, 'value': value}
+            for position, other in enumerate(recipe.ingredients) if other is ingredient]
+
+
+class _State:
+    """Содержимое книги в виде словарей рецептов, к которому применяются записи журнала."""
+
+    def __init__(self):
+        self._recipes: List[Optional[dict]] = []
+        self._positions: Dict[str, int] = {}
+
+    def add(self, data: dict):
+        """
+        Добавляет рецепт, если рецепта с таким названием еще нет.
+        :param data: словарь рецепта
+        """
+        key = fold(data['name'])
+        if key not in self._positions:
+            self._positions[key] = len(self._recipes)
+            self._recipes.append(data)
+
+    def apply(self, record: dict):
+        """
+        Применяет одну запись журнала. Записи о неизвестных рецептах
+        пропускаются, как и дубликаты при загрузке книги.
+        :param record: запись журнала
+        """
+        op = record['op']
+        if op == 'add':
+            self.add(record['recipe'])
+            return
+        key = fold(record['name'])
+        position = self._positions.get(key)
+        if position is None:
+            return
+        data = self._recipes[position]
+        if op == 'remove':
+            del self._positions[key]
+            self._recipes[position] = None
+        elif op == 'set':
+            data[record['field']] = record['value']
+            if record['field'] == 'name':
+                del self._positions[key]
+                self._positions[fold(record['value'])] = position
+        elif op == 'add_ingredient':
+            data['ingredients'].append(record['ingredient'])
+        elif op == 'remove_ingredient':
+            del data['ingredients'][record['position']]
+        elif op == 'set_ingredient':
+            data['ingredients'][record['position']][record['field']] = record['value']
+        else:
+            raise ValueError(f"Неизвестная операция журнала: {op}")
+
+    def values(self) -> Iterator[dict]:
+        """
+        Перебирает рецепты в порядке добавления.
+        :return: итератор словарей рецептов
+        """
+        return (data for data in self._recipes if data is not None)
+
+
+def _segments(path: str) -> List[int]:
+    """
+    Находит номера существующих сегментов журнала.
+    :param path: базовый путь журнала
+    :return: номера по возрастанию
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    prefix = os.path.basename(path) + '.'
+    numbers = []
+    for name in os.listdir(directory):
+        if name.startswith(prefix) and name[len(prefix):].isdigit():
+            numbers.append(int(name[len(prefix):]))
+    return sorted(numbers)
+
+
+def _segment_name(path: str, number: int) -> str:
+    """
+    Возвращает имя файла сегмента журнала.
+    :param path: базовый путь журнала
+    :param number: номер сегмента
+    :return: путь к сегменту
+    """
+    return f"{path}.{number}"
+
+
+def _build_state(filename: str, path: str, upto: Optional[int] = None) -> _State:
+    """
+    Собирает содержимое книги: снимок плюс еще не вошедшие в него сегменты.
+    :param filename: файл книги (снимок)
+    :param path: базовый путь журнала
+    :param upto: последний учитываемый сегмент (по умолчанию - все)
+    :return: состояние книги
+    """
+    state = _State()
+    if os.path.exists(filename):
+        applied = storage.read_meta(filename).get(_META_FIELD, 0)
+        for data in storage.iter_recipe_dicts(filename):
+            state.add(data)
+    else:
+        applied = 0
+    for number in _segments(path):
+        if number <= applied or (upto is not None and number > upto):
+            continue
+        for record in storage.iter_records(_segment_name(path, number)):
+            state.apply(record)
+    return state
+
+
+def replay(filename: str, path: str) -> Iterator[dict]:
+    """
+    Восстанавливает содержимое книги по снимку и журналу.
+    :param filename: файл книги (снимок); может отсутствовать
+    :param path: базовый путь журнала
+    :return: словари рецептов в порядке добавления
+    """
+    return _build_state(filename, path).values()
+
+
+def _fsync_directory(path: str):
+    """
+    Фиксирует на диске содержимое каталога (создание и удаление файлов).
+    :param path: путь к файлу в каталоге
+    """
+    try:
+        fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+class Journal:
+    """Журнал изменений книги с групповой фиксацией и фоновым сворачиванием.
+    """
+
+    def __init__(self, filename: str, path: str,
+                 compact_threshold: int = DEFAULT_COMPACT_THRESHOLD,
+                 commit_interval: float = DEFAULT_COMMIT_INTERVAL,
+                 sync: bool = False):
+        """
+        Открывает журнал и новый активный сегмент.
+        :param filename: файл книги, в который сворачивается журнал
+        :param path: базовый путь журнала
+        :param compact_threshold: размер сегмента в байтах, после которого журнал сворачивается
+        :param commit_interval: сколько секунд копить записи перед общим fsync
+        :param sync: ждать ли в append фиксации записи на диске
+        """
+        if compact_threshold <= 0:
+            raise ValueError("Порог сворачивания журнала должен быть положительным")
+        if commit_interval < 0:
+            raise ValueError("Интервал фиксации не может быть отрицательным")
+        self._filename = filename
+        self._path = path
+        self._compact_threshold = compact_threshold
+        self._commit_interval = commit_interval
+        self._sync = sync
+        applied = storage.read_meta(filename).get(_META_FIELD, 0)
+        self._segment = max(_segments(path) + [applied]) + 1
+        self._file = open(_segment_name(path, self._segment), 'ab')
+        self._size = 0
+        _fsync_directory(path)
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._io_lock = threading.Lock()
+        self._checkpoint_lock = threading.Lock()
+        self._pending: List[bytes] = []
+        self._appended = 0
+        self._durable = 0
+        self._error: Optional[BaseException] = None
+        self._closing = False
+        self._compaction: Optional[threading.Thread] = None
+        self._writer = threading.Thread(target=self._run, name='recipebook-journal', daemon=True)
+        self._writer.start()
+
+    @property
+    def path(self) -> str:
+        """Возвращает базовый путь журнала.
+
+        :return: путь
+        """
+        return self._path
+
+    def append(self, record: dict):
+        """
+        Дописывает запись в журнал. Без sync запись попадает на диск
+        не позже чем через commit_interval.
+        :param record: запись журнала
+        """
+        line = (storage.dumps_record(record) + '\n').encode('utf-8')
+        with self._lock:
+            if self._closing:
+                raise ValueError("Журнал закрыт")
+            if self._error is not None:
+                raise self._error
+            self._pending.append(line)
+            self._appended += 1
+            sequence = self._appended
+            self._wakeup.notify()
+        if self._sync:
+            self._commit_through(sequence)
+
+    def flush(self):
+        """
+        Дожидается фиксации на диске всех уже дописанных записей.
+        """
+        with self._lock:
+            sequence = self._appended
+        self._commit_through(sequence)
+
+    def _commit_through(self, sequence: int):
+        """
+        Фиксирует записи до указанного номера. Кто первым захватил запись в файл,
+        фиксирует заодно и записи остальных потоков.
+        :param sequence: номер записи
+        """
+        with self._io_lock:
+            if self._durable < sequence:
+                self._commit()
+        if self._error is not None:
+            raise self._error
+
+    def _commit(self):
+        """
+        Записывает накопленные записи одним fsync; вызывается под _io_lock.
+        """
+        with self._lock:
+            batch, self._pending = self._pending, []
+            sequence = self._appended
+        if not batch:
+            return
+        try:
+            data = b''.join(batch)
+            self._file.write(data)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        except OSError as error:
+            with self._lock:
+                self._error = error
+            raise
+        self._size += len(data)
+        self._durable = sequence
+        if self._size >= self._compact_threshold and not self._compacting():
+            self._compaction = threading.Thread(target=self._compact, args=(self._rotate(),),
+                                                name='recipebook-compaction', daemon=True)
+            self._compaction.start()
+
+    def _compacting(self) -> bool:
+        """
+        Идет ли сейчас фоновое сворачивание.
+        :return: True, если поток сворачивания работает
+        """
+        return self._compaction is not None and self._compaction.is_alive()
+
+    def _rotate(self) -> int:
+        """
+        Закрывает активный сегмент и открывает следующий; вызывается под _io_lock.
+        :return: номер закрытого сегмента
+        """
+        sealed = self._segment
+        self._file.close()
+        self._segment += 1
+        self._file = open(_segment_name(self._path, self._segment), 'ab')
+        self._size = 0
+        _fsync_directory(self._path)
+        return sealed
+
+    def _run(self):
+        """
+        Фоновый поток: копит записи в течение commit_interval и фиксирует их.
+        """
+        while True:
+            with self._lock:
+                while not self._pending and not self._closing:
+                    self._wakeup.wait()
+                if self._closing:
+                    return
+                self._wakeup.wait_for(lambda: self._closing, self._commit_interval)
+            try:
+                with self._io_lock:
+                    self._commit()
+            except OSError:
+                return
+
+    def _compact(self, upto: int):
+        """
+        Сворачивает сегменты до указанного номера в новый файл книги.
+        :param upto: последний закрытый сегмент
+        """
+        with self._checkpoint_lock:
+            if storage.read_meta(self._filename).get(_META_FIELD, 0) < upto:
+                state = _build_state(self._filename, self._path, upto)
+                storage.write_records(self._filename, state.values(), {_META_FIELD: upto})
+            self._remove_segments(upto)
+
+    def _remove_segments(self, upto: int):
+        """
+        Удаляет сегменты, уже вошедшие в файл книги.
+        :param upto: последний вошедший сегмент
+        """
+        for number in _segments(self._path):
+            if number <= upto:
+                os.unlink(_segment_name(self._path, number))
+        _fsync_directory(self._path)
+
+    def checkpoint(self, recipes: Iterable[Recipe]):
+        """
+        Сохраняет текущее содержимое книги в файл книги и очищает журнал.
+        :param recipes: все рецепты книги
+        """
+        with self._checkpoint_lock:
+            with self._io_lock:
+                self._commit()
+                sealed = self._rotate()
+            storage.write_recipes(self._filename, recipes, {_META_FIELD: sealed})
+            self._remove_segments(sealed)
+
+    def close(self):
+        """
+        Фиксирует оставшиеся записи, дожидается сворачивания, сворачивает
+        все сегменты в файл книги и закрывает журнал. После закрытия файл
+        книги содержит все изменения, и его можно сохранять и без журнала.
+        """
+        with self._lock:
+            if self._closing:
+                return
+            self._closing = True
+            self._wakeup.notify()
+        self._writer.join()
+        with self._io_lock:
+            try:
+                self._commit()
+            finally:
+                self._file.close()
+            if self._size == 0:
+                os.unlink(_segment_name(self._path, self._segment))
+        if self._compaction is not None:
+            self._compaction.join()
+        self._compact(self._segment)
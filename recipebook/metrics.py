@@ -0,0 +1,425 @@
+"""
+Модуль метрик и профилирования операций кулинарной книги.
+
+enable() оборачивает публичные методы Cookbook и Recipe (или других
+классов) функциями, которые замеряют время вызова, размер результата и
+число просмотренных при поиске рецептов, и передают событие приемнику
+(sink). disable() возвращает исходные методы, поэтому выключенные метрики
+ничего не стоят; индексы сообщают о просмотренных рецептах только при
+включенных метриках (одна проверка флага enabled).
+
+Приемники: InMemorySink (сводка в памяти: счетчики, гистограммы задержек,
+размеры результатов), JsonFileSink (та же сводка, периодически
+сохраняемая в JSON) и CallbackSink (каждое событие - в функцию).
+profile_request() снимает профиль cProfile одного запроса и сохраняет
+его, только если запрос оказался медленным.
+"""
+
+import bisect
+import cProfile
+import functools
+import io
+import json
+import os
+import pstats
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+
+# Включены ли метрики; проверяется в местах, считающих просмотренные рецепты.
+enabled = False
+
+# Верхние границы корзин гистограммы задержек в микросекундах.
+LATENCY_BUCKETS: Tuple[float, ...] = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000,
+                                      10000, 20000, 50000, 100000, 200000, 500000, 1000000)
+
+_SIZED = (list, dict, set, frozenset)
+
+
+class CallEvent(NamedTuple):
+    """Один замеренный вызов метода."""
+
+    name: str
+    seconds: float
+    result_size: Optional[int]
+    scanned: Optional[int]
+    error: Optional[str]
+
+
+class CallStats:
+    """Сводка вызовов одного метода."""
+
+    __slots__ = ('count', 'errors', 'total_seconds', 'max_seconds', 'buckets',
+                 'sized_calls', 'result_total', 'scanned_calls', 'scanned_total')
+
+    def __init__(self):
+        """
+        Создает пустую сводку.
+        """
+        self.count = 0
+        self.errors = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.sized_calls = 0
+        self.result_total = 0
+        self.scanned_calls = 0
+        self.scanned_total = 0
+
+    def add(self, event: CallEvent):
+        """
+        Учитывает вызов.
+        :param event: событие вызова
+        """
+        self.count += 1
+        if event.error is not None:
+            self.errors += 1
+        self.total_seconds += event.seconds
+        self.max_seconds = max(self.max_seconds, event.seconds)
+        self.buckets[bisect.bisect_left(LATENCY_BUCKETS, event.seconds * 1e6)] += 1
+        if event.result_size is not None:
+            self.sized_calls += 1
+            self.result_total += event.result_size
+        if event.scanned is not None:
+            self.scanned_calls += 1
+            self.scanned_total += event.scanned
+
+    def quantile_us(self, fraction: float) -> float:
+        """
+        Оценивает квантиль задержки по гистограмме (верхняя граница корзины).
+        :param fraction: доля от 0 до 1
+        :return: задержка в микросекундах
+        """
+        if not self.count:
+            return 0.0
+        rank = fraction * self.count
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS, self.buckets):
+            seen += count
+            if seen >= rank:
+                return float(bound)
+        return self.max_seconds * 1e6
+
+    def to_dict(self) -> dict:
+        """
+        Преобразует сводку в словарь для JSON.
+        :return: словарь
+        """
+        data = {
+            'count': self.count,
+            'errors': self.errors,
+            'total_ms': self.total_seconds * 1e3,
+            'mean_us': self.total_seconds / self.count * 1e6 if self.count else 0.0,
+            'max_us': self.max_seconds * 1e6,
+            'p50_us': self.quantile_us(0.5),
+            'p99_us': self.quantile_us(0.99),
+            'histogram_us': {('<=' + str(bound)): count
+                             for bound, count in zip(LATENCY_BUCKETS, self.buckets) if count},
+        }
+        if self.buckets[-1]:
+            data['histogram_us'][f'>{LATENCY_BUCKETS[-1]}'] = self.buckets[-1]
+        if self.sized_calls:
+            data['mean_result_size'] = self.result_total / self.sized_calls
+        if self.scanned_calls:
+            data['mean_scanned'] = self.scanned_total / self.scanned_calls
+        return data
+
+
+class InMemorySink:
+    """Приемник, собирающий сводку по методам в памяти."""
+
+    def __init__(self):
+        """
+        Создает пустую сводку.
+        """
+        self._lock = threading.Lock()
+        self._stats: Dict[str, CallStats] = {}
+
+    def record(self, event: CallEvent):
+        """
+        Учитывает событие.
+        :param event: событие вызова
+        """
+        with self._lock:
+            stats = self._stats.get(event.name)
+            if stats is None:
+                stats = self._stats[event.name] = CallStats()
+            stats.add(event)
+
+    def stats(self, name: str) -> Optional[CallStats]:
+        """
+        Возвращает сводку одного метода.
+        :param name: имя вида 'Cookbook.find_recipes_by_ingredient'
+        :return: сводка или None, если вызовов не было
+        """
+        return self._stats.get(name)
+
+    def snapshot(self) -> Dict[str, dict]:
+        """
+        Возвращает сводку всех методов.
+        :return: имя метода -> словарь сводки
+        """
+        with self._lock:
+            return {name: stats.to_dict() for name, stats in sorted(self._stats.items())}
+
+    def reset(self):
+        """
+        Очищает сводку.
+        """
+        with self._lock:
+            self._stats.clear()
+
+    def close(self):
+        """
+        Ничего не делает; есть для единообразия приемников.
+        """
+
+
+class JsonFileSink(InMemorySink):
+    """Приемник, периодически сохраняющий сводку в JSON-файл."""
+
+    def __init__(self, filename: str, interval: float = 10.0, clock: Callable[[], float] = time.monotonic):
+        """
+        Создает приемник.
+        :param filename: файл сводки (перезаписывается атомарно)
+        :param interval: не чаще чем раз в столько секунд
+        :param clock: источник времени в секундах
+        """
+        super().__init__()
+        self._filename = filename
+        self._interval = interval
+        self._clock = clock
+        self._next_dump = clock() + interval
+
+    def record(self, event: CallEvent):
+        """
+        Учитывает событие и сохраняет сводку, если подошло время.
+        :param event: событие вызова
+        """
+        super().record(event)
+        if self._clock() >= self._next_dump:
+            self.dump()
+
+    def dump(self):
+        """
+        Сохраняет сводку в файл.
+        """
+        self._next_dump = self._clock() + self._interval
+        data = {'created': time.strftime('%Y-%m-%dT%H:%M:%S%z'), 'methods': self.snapshot()}
+        directory = os.path.dirname(os.path.abspath(self._filename))
+        fd, tmp_name = tempfile.mkstemp(prefix='.recipebook-metrics-', suffix='.tmp', dir=directory)
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as file:
+                json.dump(data, file, ensure_ascii=False, indent=1)
+            os.replace(tmp_name, self._filename)
+        except BaseException:
+            try:
+                os.unlink(tmp_name)
+            except OSError:
+                pass
+            raise
+
+    def close(self):
+        """
+        Сохраняет итоговую сводку.
+        """
+        self.dump()
+
+
+class CallbackSink:
+    """Приемник, передающий каждое событие в функцию."""
+
+    def __init__(self, callback: Callable[[CallEvent], None]):
+        """
+        Создает приемник.
+        :param callback: функция, вызываемая для каждого события
+        """
+        self._callback = callback
+
+    def record(self, event: CallEvent):
+        """
+        Передает событие в функцию.
+        :param event: событие вызова
+        """
+        self._callback(event)
+
+    def close(self):
+        """
+        Ничего не делает; есть для единообразия приемников.
+        """
+
+
+_local = threading.local()
+_patched: List[Tuple[type, str, object]] = []
+_sink = None
+
+
+def add_scanned(count: int):
+    """
+    Сообщает, сколько рецептов просмотрел текущий замеряемый вызов.
+    Вызывается только при включенных метриках (if metrics.enabled).
+    :param count: число просмотренных рецептов
+    """
+    frames = getattr(_local, 'frames', None)
+    if frames:
+        frames[-1][0] += count
+
+
+def _result_size(result) -> Optional[int]:
+    """
+    Определяет размер результата-коллекции.
+    :param result: результат вызова
+    :return: длина или None
+    """
+    if type(result) in _SIZED:
+        return len(result)
+    return None
+
+
+def _wrap(name: str, function: Callable) -> Callable:
+    """
+    Оборачивает функцию замером.
+    :param name: имя метода для событий
+    :param function: исходная функция
+    :return: обертка
+    """
+    @functools.wraps(function)
+    def measured(*args, **kwargs):
+        frames = getattr(_local, 'frames', None)
+        if frames is None:
+            frames = _local.frames = []
+        frame = [0]
+        frames.append(frame)
+        result = None
+        error = None
+        start = time.perf_counter()
+        try:
+            result = function(*args, **kwargs)
+            return result
+        except BaseException as failure:
+            error = type(failure).__name__
+            raise
+        finally:
+            seconds = time.perf_counter() - start
+            frames.pop()
+            sink = _sink
+            if sink is not None:
+                sink.record(CallEvent(name, seconds, _result_size(result),
+                                      frame[0] if frame[0] else None, error))
+    return measured
+
+
+def _public_methods(cls: type) -> Iterator[Tuple[str, object]]:
+    """
+    Перебирает публичные методы, объявленные в самом классе.
+    :param cls: класс
+    :return: пары (имя, атрибут класса)
+    """
+    for name, attribute in vars(cls).items():
+        if name.startswith('_') or isinstance(attribute, property):
+            continue
+        if isinstance(attribute, (classmethod, staticmethod)) or callable(attribute):
+            yield name, attribute
+
+
+def enable(sink=None, targets: Optional[Iterable[type]] = None):
+    """
+    Включает метрики: оборачивает публичные методы классов замером.
+    :param sink: приемник событий (по умолчанию - новый InMemorySink)
+    :param targets: классы (по умолчанию Cookbook и Recipe)
+    :return: приемник
+    """
+    global enabled, _sink
+    if targets is None:
+        from .cookbook import Cookbook
+        from .recipe import Recipe
+        targets = (Cookbook, Recipe)
+    disable()
+    _sink = sink if sink is not None else InMemorySink()
+    for cls in targets:
+        for name, attribute in list(_public_methods(cls)):
+            label = f"{cls.__name__}.{name}"
+            if isinstance(attribute, classmethod):
+                replacement = classmethod(_wrap(label, attribute.__func__))
+            elif isinstance(attribute, staticmethod):
+                replacement = staticmethod(_wrap(label, attribute.__func__))
+            else:
+                replacement = _wrap(label, attribute)
+            _patched.append((cls, name, attribute))
+            setattr(cls, name, replacement)
+    enabled = True
+    return _sink
+
+
+def disable():
+    """
+    Выключает метрики: возвращает исходные методы и закрывает приемник.
+    """
+    global enabled, _sink
+    enabled = False
+    while _patched:
+        cls, name, attribute = _patched.pop()
+        setattr(cls, name, attribute)
+    sink, _sink = _sink, None
+    if sink is not None:
+        sink.close()
+
+
+class ProfileCapture:
+    """Итог profile_request: длительность запроса и, если он медленный, его профиль."""
+
+    def __init__(self):
+        """
+        Создает пустой итог.
+        """
+        self.seconds: float = 0.0
+        self.stats: Optional[pstats.Stats] = None
+
+    @property
+    def slow(self) -> bool:
+        """Сохранен ли профиль (запрос оказался медленным).
+
+        :return: True, если профиль есть
+        """
+        return self.stats is not None
+
+    def report(self, limit: int = 25, sort: str = 'cumulative') -> str:
+        """
+        Оформляет профиль текстом.
+        :param limit: сколько функций показать
+        :param sort: ключ сортировки pstats
+        :return: текст отчета (пустой, если профиля нет)
+        """
+        if self.stats is None:
+            return ""
+        stream = io.StringIO()
+        self.stats.stream = stream
+        self.stats.sort_stats(sort).print_stats(limit)
+        return stream.getvalue()
+
+
+@contextmanager
+def profile_request(threshold: float = 0.0, filename: Optional[str] = None) -> Iterator[ProfileCapture]:
+    """
+    Профилирует блок кода (один запрос) через cProfile.
+    Профиль сохраняется, только если блок выполнялся не меньше threshold секунд.
+    :param threshold: порог медленного запроса в секундах
+    :param filename: файл для профиля в формате pstats (например, для snakeviz)
+    :return: итог, заполняемый после выхода из блока
+    """
+    capture = ProfileCapture()
+    profiler = cProfile.Profile()
+    start = time.perf_counter()
+    profiler.enable()
+    try:
+        yield capture
+    finally:
+        profiler.disable()
+        capture.seconds = time.perf_counter() - start
+        if capture.seconds >= threshold:
+            capture.stats = pstats.Stats(profiler)
+            if filename is not None:
+                capture.stats.dump_stats(filename)
@@ -0,0 +1,127 @@
+"""
+Модуль для массового подсчета калорий. Содержит класс NutritionEngine
+
+Если установлен NumPy, суммы по рецептам и рационам считаются векторно;
+иначе используется обычный Python с теми же результатами.
+"""
+
+from array import array
+from typing import Dict, Iterable, List, Optional
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from .text import fold
+
+
+class NutritionEngine:
+    """Упакованные в непрерывные массивы количества и калорийность
+    ингредиентов кулинарной книги со смещениями рецептов.
+
+    Движок отражает книгу на момент создания; после изменений книги
+    вызовите refresh().
+    """
+
+    def __init__(self, cookbook, use_numpy: Optional[bool] = None):
+        """
+        Упаковывает книгу.
+        :param cookbook: кулинарная книга (любой объект со свойством recipes)
+        :param use_numpy: использовать NumPy (по умолчанию - если установлен)
+        """
+        if use_numpy and numpy is None:
+            raise ValueError("NumPy не установлен")
+        self._cookbook = cookbook
+        self._use_numpy = numpy is not None if use_numpy is None else use_numpy
+        self.refresh()
+
+    @property
+    def uses_numpy(self) -> bool:
+        """
+        Считает ли движок через NumPy.
+        :return: True, если используется NumPy
+        """
+        return self._use_numpy
+
+    def refresh(self):
+        """
+        Заново упаковывает рецепты книги.
+        """
+        quantities = array('d')
+        calories = array('d')
+        offsets = [0]
+        self._names: List[str] = []
+        self._rows: Dict[str, int] = {}
+        for recipe in self._cookbook.recipes:
+            self._rows[fold(recipe.name)] = len(self._names)
+            self._names.append(recipe.name)
+            for _, quantity, _, calories_per_unit in recipe._ingredient_rows():
+                quantities.append(quantity)
+                calories.append(calories_per_unit)
+            offsets.append(len(quantities))
+        self._totals = self._segment_sums(quantities, calories, offsets)
+
+    def _segment_sums(self, quantities: array, calories: array, offsets: List[int]):
+        """
+        Суммирует произведения количества на калорийность по рецептам.
+        :param quantities: количества всех ингредиентов подряд
+        :param calories: калории на единицу всех ингредиентов подряд
+        :param offsets: границы рецептов (на одну больше, чем рецептов)
+        :return: калорийность каждого рецепта
+        """
+        if not self._use_numpy:
+            return [sum((quantities[i] * calories[i] for i in range(start, end)), 0.0)
+                    for start, end in zip(offsets, offsets[1:])]
+        products = numpy.frombuffer(quantities, dtype=numpy.float64) * \
+            numpy.frombuffer(calories, dtype=numpy.float64)
+        bounds = numpy.asarray(offsets, dtype=numpy.intp)
+        starts = bounds[:-1]
+        lengths = bounds[1:] - starts
+        # Складываем k-е слагаемые всех рецептов за один шаг, в том же
+        # порядке, что и sum() по рецепту: результаты совпадают побитно.
+        order = numpy.argsort(-lengths, kind='stable')
+        sorted_starts = starts[order]
+        sorted_lengths = lengths[order]
+        sums = numpy.zeros(len(starts), dtype=numpy.float64)
+        for k in range(int(sorted_lengths[0]) if len(sorted_lengths) else 0):
+            active = int(numpy.count_nonzero(sorted_lengths > k))
+            sums[:active] += products[sorted_starts[:active] + k]
+        totals = numpy.empty_like(sums)
+        totals[order] = sums
+        return totals
+
+    def recipe_calories(self) -> Dict[str, float]:
+        """
+        Возвращает калорийность каждого рецепта.
+        :return: название рецепта -> калории
+        """
+        return {name: float(total) for name, total in zip(self._names, self._totals)}
+
+    def plan_calories(self, plans: Iterable[List[str]]) -> List[float]:
+        """
+        Вычисляет калорийность сразу для многих наборов рецептов.
+        Неизвестные названия пропускаются, как в Cookbook.calculate_total_calories.
+        :param plans: наборы названий рецептов
+        :return: калорийность каждого набора в порядке входа
+        """
+        plan_ids = []
+        rows = []
+        plan_count = 0
+        for plan_id, plan in enumerate(plans):
+            plan_count = plan_id + 1
+            for name in plan:
+                row = self._rows.get(fold(name))
+                if row is not None:
+                    plan_ids.append(plan_id)
+                    rows.append(row)
+        if not self._use_numpy:
+            result = [0.0] * plan_count
+            for plan_id, row in zip(plan_ids, rows):
+                result[plan_id] += self._totals[row]
+            return result
+        weights = numpy.asarray(self._totals[numpy.asarray(rows, dtype=numpy.intp)], dtype=numpy.float64)
+        sums = numpy.bincount(numpy.asarray(plan_ids, dtype=numpy.intp), weights=weights,
+                              minlength=plan_count)
+        # Без строк bincount возвращает целые нули; приводим к float, как в запасном пути.
+        return sums.astype(numpy.float64).tolist()
@@ -0,0 +1,82 @@
+"""
+Модуль для компактного хранения ингредиентов рецепта в массивах.
+Содержит класс PackedIngredients
+"""
+
+from array import array
+from sys import intern
+from typing import Dict, Iterable, Iterator, List, Tuple
+from .ingredient import Ingredient
+
+
+class PackedIngredients:
+    """Ингредиенты рецепта в виде колонок: номера названий и единиц в
+    собственной таблице строк рецепта (uint32), количество и калории на
+    единицу (float64).
+
+    Таблица хранит интернированные строки (sys.intern), поэтому одинаковые
+    названия разных рецептов занимают память один раз и освобождаются
+    вместе с последним рецептом, который на них ссылается.
+
+    Около 24 байт на ингредиент вместо отдельного объекта Ingredient с
+    двумя float. Хранилище неизменяемо: чтобы править ингредиенты, рецепт
+    распаковывает его обратно в список Ingredient.
+    """
+
+    __slots__ = ('_strings', '_names', '_units', '_quantities', '_calories')
+
+    def __init__(self, ingredients: Iterable[Ingredient]):
+        """
+        Упаковывает ингредиенты.
+        :param ingredients: ингредиенты
+        """
+        self._names = array('I')
+        self._units = array('I')
+        self._quantities = array('d')
+        self._calories = array('d')
+        ids: Dict[str, int] = {}
+        for ingredient in ingredients:
+            self._names.append(ids.setdefault(intern(ingredient.name), len(ids)))
+            self._units.append(ids.setdefault(intern(ingredient.unit), len(ids)))
+            self._quantities.append(ingredient.quantity)
+            self._calories.append(ingredient.calories_per_unit)
+        self._strings: Tuple[str, ...] = tuple(ids)
+
+    def __len__(self) -> int:
+        """
+        Возвращает число ингредиентов.
+        :return: число ингредиентов
+        """
+        return len(self._names)
+
+    def __iter__(self) -> Iterator[Tuple[str, float, str, float]]:
+        """
+        Перебирает ингредиенты как кортежи.
+        :return: (название, количество, единица, калории на единицу)
+        """
+        strings = self._strings
+        for i in range(len(self._names)):
+            yield (strings[self._names[i]], self._quantities[i],
+                   strings[self._units[i]], self._calories[i])
+
+    def names(self) -> List[str]:
+        """
+        Возвращает названия ингредиентов.
+        :return: список названий
+        """
+        strings = self._strings
+        return [strings[sid] for sid in self._names]
+
+    def total_calories(self) -> float:
+        """
+        Вычисляет суммарную калорийность.
+        :return: калории
+        """
+        return sum(q * c for q, c in zip(self._quantities, self._calories))
+
+    def unpack(self) -> List[Ingredient]:
+        """
+        Создает объекты Ingredient.
+        :return: список ингредиентов
+        """
+        return [Ingredient(name, quantity, unit, calories) for name, quantity, unit, calories in self]
@@ -0,0 +1,283 @@
+"""
+Модуль для подбора рациона под калорийность. Содержит функцию plan_meals
+"""
+
+import time
+import weakref
+from bisect import bisect_left, bisect_right
+from typing import FrozenSet, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+from .recipe import Recipe
+from .text import fold
+
+
+class MealPlan(NamedTuple):
+    """Подобранный рацион."""
+
+    recipes: List[Recipe]
+    calories: float
+    shopping_items: int
+    pantry_used: int
+    optimal: bool = True
+
+
+class _Candidate(NamedTuple):
+    recipe: Recipe
+    calories: float
+    keys: FrozenSet[str]
+    pantry_hits: int
+
+
+class _Slot:
+    """Кандидаты для одного места в рационе."""
+
+    def __init__(self, candidates: List[_Candidate], objective: str):
+        """
+        :param candidates: все подходящие рецепты
+        :param objective: 'items' или 'pantry'
+        """
+        if objective == 'pantry':
+            self.ordered = sorted(candidates, key=lambda c: (-c.pantry_hits, len(c.keys) - c.pantry_hits))
+        else:
+            self.ordered = sorted(candidates, key=lambda c: len(c.keys))
+        self.by_calories = sorted(candidates, key=lambda c: c.calories)
+        self.calories = [c.calories for c in self.by_calories]
+        self.min_calories = self.calories[0] if candidates else 0.0
+        self.max_calories = self.calories[-1] if candidates else 0.0
+        self.max_pantry_hits = max((c.pantry_hits for c in candidates), default=0)
+
+    def ranked(self, low: float, high: float, beam: int) -> Tuple[List[_Candidate], bool]:
+        """
+        Отбирает лучших по эвристике кандидатов среди тех, чьи калории
+        попадают в окно, достижимое для этого места.
+        :param low: наименьшая допустимая калорийность
+        :param high: наибольшая допустимая калорийность
+        :param beam: сколько кандидатов оставить
+        :return: кандидаты и признак того, что часть подходящих отброшена
+        """
+        feasible = [c for c in self.ordered if low <= c.calories <= high]
+        return feasible[:beam], len(feasible) > beam
+
+
+class _Search:
+    """Поиск в глубину с отсечениями по калориям, целевой функции и времени.
+
+    Сначала перебираются только beam лучших по эвристике кандидатов каждого
+    места (быстро находит хороший рацион), затем, если время осталось, -
+    все кандидаты, чьи калории еще позволяют попасть в окно.
+    """
+
+    def __init__(self, slots: List[_Slot], low: float, high: float,
+                 pantry: FrozenSet[str], objective: str, deadline: float, beam: int):
+        self.slots = slots
+        self.low = low
+        self.high = high
+        self.pantry = pantry
+        self.objective = objective
+        self.deadline = deadline
+        self.nodes = 0
+        self.timed_out = False
+        self.best: Optional[Tuple] = None
+        self.best_plan: Optional[List[_Candidate]] = None
+        count = len(slots)
+        self.rest_min = [0.0] * (count + 1)
+        self.rest_max = [0.0] * (count + 1)
+        for i in range(count - 1, -1, -1):
+            self.rest_min[i] = self.rest_min[i + 1] + slots[i].min_calories
+            self.rest_max[i] = self.rest_max[i + 1] + slots[i].max_calories
+        self.exhaustive = False
+        self.truncated = False
+        self.ranked: List[List[_Candidate]] = []
+        computed = {}
+        for slot in slots:
+            if id(slot) not in computed:
+                computed[id(slot)] = slot.ranked(low - self.rest_max[0] + slot.max_calories,
+                                                 high - self.rest_min[0] + slot.min_calories, beam)
+            ranked, truncated = computed[id(slot)]
+            self.ranked.append(ranked)
+            self.truncated = self.truncated or truncated
+
+    def score(self, union: FrozenSet[str]) -> Tuple:
+        """Оценка рациона: чем меньше, тем лучше."""
+        if self.objective == 'pantry':
+            used = len(union & self.pantry)
+            return -used, len(union) - used
+        return (len(union),)
+
+    def bound(self, union: FrozenSet[str], depth: int) -> Tuple:
+        """Оптимистичная оценка любого продолжения частичного рациона."""
+        if self.objective == 'pantry':
+            used = len(union & self.pantry)
+            reachable = used + sum(slot.max_pantry_hits for slot in self.slots[depth:])
+            return -min(len(self.pantry), reachable), len(union) - used
+        return (len(union),)
+
+    def out_of_time(self) -> bool:
+        self.nodes += 1
+        if self.nodes & 63 == 0 and time.perf_counter() > self.deadline:
+            self.timed_out = True
+        return self.timed_out
+
+    def run(self, depth: int, chosen: List[_Candidate], total: float,
+            union: FrozenSet[str], start: int, shared_pool: bool):
+        if self.out_of_time():
+            return
+        if self.best is not None and self.bound(union, depth) >= self.best:
+            return
+        slot = self.slots[depth]
+        low = self.low - total - self.rest_max[depth + 1]
+        high = self.high - total - self.rest_min[depth + 1]
+        if depth == len(self.slots) - 1:
+            first = bisect_left(slot.calories, low)
+            last = bisect_right(slot.calories, high)
+            for candidate in slot.by_calories[first:last]:
+                if self.out_of_time():
+                    return
+                if any(candidate.recipe is c.recipe for c in chosen):
+                    continue
+                merged = union | candidate.keys
+                score = self.score(merged)
+                if self.best is None or score < self.best:
+                    self.best = score
+                    self.best_plan = chosen + [candidate]
+            return
+        if self.exhaustive:
+            candidates = slot.by_calories
+            first = bisect_left(slot.calories, low)
+            positions = range(max(first, start) if shared_pool else first, bisect_right(slot.calories, high))
+        else:
+            candidates = self.ranked[depth]
+            positions = range(start if shared_pool else 0, len(candidates))
+        for position in positions:
+            candidate = candidates[position]
+            if not low <= candidate.calories <= high:
+                continue
+            if any(candidate.recipe is c.recipe for c in chosen):
+                continue
+            chosen.append(candidate)
+            self.run(depth + 1, chosen, total + candidate.calories, union | candidate.keys,
+                     position + 1, shared_pool)
+            chosen.pop()
+            if self.timed_out:
+                return
+
+
+# Кандидаты без учета кладовой для каждой книги: (версия книги, категория -> место).
+_prepared: 'weakref.WeakKeyDictionary' = weakref.WeakKeyDictionary()
+
+# Как часто (в кандидатах) проверять время при подготовке.
+_PREPARE_CHECK = 1024
+
+
+def _base_slot(cookbook, category: Optional[str], deadline: float) -> Optional[_Slot]:
+    """
+    Готовит кандидатов без учета кладовой. Результат запоминается до
+    изменения книги (по cookbook.version), так что повторные запросы
+    не пересчитывают калории и ингредиенты всех рецептов; прерванная по
+    времени подготовка продолжается при следующем запросе.
+    :param cookbook: кулинарная книга
+    :param category: категория или None для всех рецептов
+    :param deadline: момент, после которого подготовка прерывается
+    :return: место с кандидатами или None, если время вышло
+    """
+    version = getattr(cookbook, 'version', None)
+    key = None if category is None else fold(category)
+    cached = _prepared.get(cookbook) if version is not None else None
+    if cached is None or cached[0] != version:
+        cached = (version, {})
+        if version is not None:
+            _prepared[cookbook] = cached
+    prepared = cached[1].get(key)
+    if isinstance(prepared, _Slot):
+        return prepared
+    if prepared is None:
+        recipes = cookbook.recipes if category is None else cookbook.find_recipes_by_category(category)
+        prepared = cached[1][key] = (recipes, [])
+    recipes, candidates = prepared
+    for number in range(len(candidates), len(recipes)):
+        if number % _PREPARE_CHECK == 0 and time.perf_counter() > deadline:
+            return None
+        recipe = recipes[number]
+        keys = frozenset(map(fold, recipe.get_ingredient_names()))
+        candidates.append(_Candidate(recipe, recipe.calculate_calories(), keys, 0))
+    slot = cached[1][key] = _Slot(candidates, 'items')
+    return slot
+
+
+def _pantry_slot(base: _Slot, pantry: FrozenSet[str], objective: str, deadline: float) -> Optional[_Slot]:
+    """
+    Добавляет к кандидатам совпадения с кладовой.
+    :param base: место без учета кладовой
+    :param pantry: продукты кладовой
+    :param objective: 'items' или 'pantry'
+    :param deadline: момент, после которого подготовка прерывается
+    :return: место или None, если время вышло
+    """
+    if not pantry:
+        return base
+    candidates = []
+    for number, c in enumerate(base.by_calories):
+        if number % _PREPARE_CHECK == 0 and time.perf_counter() > deadline:
+            return None
+        candidates.append(_Candidate(c.recipe, c.calories, c.keys, len(c.keys & pantry)))
+    return _Slot(candidates, objective)
+
+
+def plan_meals(cookbook, min_calories: float, max_calories: float,
+               count: Optional[int] = None, categories: Optional[Sequence[str]] = None,
+               pantry: Iterable[str] = (), objective: str = 'items',
+               time_budget: float = 1.0, beam: int = 500) -> Optional[MealPlan]:
+    """
+    Подбирает рецепты так, чтобы их суммарная калорийность попала в окно.
+
+    Поиск - перебор с возвратом и отсечениями (branch and bound): по
+    калориям (сколько еще можно набрать оставшимися местами; последнее
+    место выбирается двоичным поиском по калориям), по целевой функции и
+    по времени. Сначала для всех мест, кроме последнего, перебираются beam
+    лучших по эвристике кандидатов из тех, что укладываются в окно, затем,
+    пока не истек time_budget, - все кандидаты. Если время истекло раньше,
+    возвращается лучший найденный рацион с optimal=False, а None означает
+    лишь, что за это время рацион не найден. Подготовка кандидатов тоже
+    укладывается в time_budget и запоминается до изменения книги.
+
+    :param cookbook: кулинарная книга
+    :param min_calories: нижняя граница калорий включительно
+    :param max_calories: верхняя граница калорий включительно
+    :param count: число рецептов (если categories не заданы)
+    :param categories: по одному рецепту из каждой категории
+    :param pantry: продукты, которые уже есть
+    :param objective: 'items' - меньше разных покупок, 'pantry' - больше продуктов из кладовой
+    :param time_budget: ограничение времени в секундах
+    :param beam: сколько кандидатов перебирать на каждом месте в первом, быстром проходе
+    :return: рацион или None, если подходящего нет (или он не найден за time_budget)
+    """
+    if objective not in ('items', 'pantry'):
+        raise ValueError("objective должен быть 'items' или 'pantry'")
+    if categories is None and (count is None or count < 1):
+        raise ValueError("Нужно указать count или categories")
+    deadline = time.perf_counter() + time_budget
+    pantry_keys = frozenset(map(fold, pantry))
+
+    def prepare(category: Optional[str]) -> Optional[_Slot]:
+        base = _base_slot(cookbook, category, deadline)
+        return None if base is None else _pantry_slot(base, pantry_keys, objective, deadline)
+
+    if categories is not None:
+        slots = [prepare(category) for category in categories]
+        shared_pool = False
+    else:
+        slots = [prepare(None)] * count
+        shared_pool = True
+    if not slots or any(slot is None or not slot.calories for slot in slots):
+        return None
+
+    search = _Search(slots, min_calories, max_calories, pantry_keys, objective, deadline, beam)
+    search.run(0, [], 0.0, frozenset(), 0, shared_pool)
+    if search.truncated and not search.timed_out:
+        search.exhaustive = True
+        search.run(0, [], 0.0, frozenset(), 0, shared_pool)
+    if search.best_plan is None:
+        return None
+    union = frozenset().union(*(c.keys for c in search.best_plan))
+    return MealPlan([c.recipe for c in search.best_plan],
+                    sum(c.calories for c in search.best_plan),
+                    len(union), len(union & pantry_keys), not search.timed_out)
@@ -2,13 +2,18 @@
 Модуль для работы с рецептами. Содержит класс Recipe
 """
 
-from typing import List, Dict
+from sys import intern
+from typing import Iterable, Iterator, List, Dict, Tuple
 from .ingredient import Ingredient
+from .packed import PackedIngredients
 
 
 class Recipe:
     """Класс для представления кулинарного рецепта."""
 
+    __slots__ = ('_name', '_ingredients', '_description', '_instructions', '_category', '_observers',
+                 '_calories')
+
     def __init__(self, name: str, ingredients: List[Ingredient] = None,
                  description: str = "", instructions: str = "", category: str = "Основное"):
         """
@@ -23,7 +28,11 @@ class Recipe:
         self._ingredients = ingredients if ingredients is not None else []
         self._description = description
         self._instructions = instructions
-        self._category = category
+        self._category = intern(category)
+        self._observers = ()
+        self._calories = None
+        for ingredient in self._ingredients:
+            ingredient._attach(self)
 
     @property
     def name(self) -> str:
@@ -41,14 +50,52 @@ class Recipe:
         """
         if not value or not value.strip():
             raise ValueError("Название рецепта не может быть пустым")
-        self._name = value.strip()
+        value = value.strip()
+        for observer in self._observers:
+            observer._check_rename(self, value)
+        old_name = self._name
+        self._name = value
+        self._notify('name', old_name)
 
     @property
     def ingredients(self) -> List[Ingredient]:
         """
         Возвращает список ингредиентов.
+        Упакованный рецепт при этом распаковывается.
         :return: список ингридиентов
         """
+        return self._unpacked()
+
+    @property
+    def is_packed(self) -> bool:
+        """
+        Хранятся ли ингредиенты в компактных массивах.
+        :return: True, если рецепт упакован
+        """
+        return isinstance(self._ingredients, PackedIngredients)
+
+    def pack(self):
+        """
+        Переводит ингредиенты в компактное хранилище на массивах.
+        Подсчет калорий, названия ингредиентов и сериализация работают
+        без распаковки; изменение состава или обращение к ingredients
+        распаковывает рецепт обратно.
+        """
+        if self.is_packed:
+            return
+        for ingredient in self._ingredients:
+            ingredient._detach(self)
+        self._ingredients = PackedIngredients(self._ingredients)
+
+    def _unpacked(self) -> List[Ingredient]:
+        """
+        Возвращает список ингредиентов, распаковывая рецепт при необходимости.
+        :return: список ингредиентов
+        """
+        if self.is_packed:
+            self._ingredients = self._ingredients.unpack()
+            for ingredient in self._ingredients:
+                ingredient._attach(self)
         return self._ingredients
 
     @property
@@ -65,7 +112,9 @@ class Recipe:
         Устанавливает описание рецепта.
         :param value: описание рецепта
         """
+        old_description = self._description
         self._description = value
+        self._notify('description', old_description)
 
     @property
     def instructions(self) -> str:
@@ -81,7 +130,9 @@ class Recipe:
         Устанавливает инструкции по приготовлению.
         :param value: инструкции по приготовлению
         """
+        old_instructions = self._instructions
         self._instructions = value
+        self._notify('instructions', old_instructions)
 
     @property
     def category(self) -> str:
@@ -97,38 +148,96 @@ class Recipe:
         Устанавливает категорию рецепта.
         :param value: категория рецепта
         """
-        self._category = value
+        old_category = self._category
+        self._category = intern(value)
+        self._notify('category', old_category)
+
+    def _attach(self, observer):
+        """
+        Подписывает наблюдателя (например, кулинарную книгу) на изменения рецепта.
+        :param observer: объект с методами _check_rename и _on_recipe_changed
+        """
+        if not any(o is observer for o in self._observers):
+            self._observers += (observer,)
+
+    def _detach(self, observer):
+        """
+        Отписывает наблюдателя от изменений рецепта.
+        :param observer: ранее подписанный наблюдатель
+        """
+        self._observers = tuple(o for o in self._observers if o is not observer)
+
+    def _notify(self, event: str, old_value=None):
+        """
+        Сообщает наблюдателям об изменении рецепта.
+        :param event: что изменилось ('name', 'ingredients', 'calories', 'units', ...)
+        :param old_value: прежнее значение; для изменений состава - описание
+            изменения: ('add', ингредиент), ('remove', позиция) или
+            ('set', ингредиент, поле)
+        """
+        for observer in self._observers:
+            observer._on_recipe_changed(self, event, old_value)
 
     def add_ingredient(self, ingredient: Ingredient):
         """
         Добавляет ингредиент в рецепт.
         :param ingredient: ингридиент
         """
-        self._ingredients.append(ingredient)
+        self._unpacked().append(ingredient)
+        ingredient._attach(self)
+        self._calories = None
+        self._notify('ingredients', ('add', ingredient))
 
     def remove_ingredient(self, ingredient_name: str) -> bool:
         """
         Удаляет ингредиент из рецепта по названию.
         :param ingredient_name: ингридиент
         """
-        for i, ingredient in enumerate(self._ingredients):
+        for i, ingredient in enumerate(self._unpacked()):
             if ingredient.name.lower() == ingredient_name.lower():
                 del self._ingredients[i]
+                if not any(other is ingredient for other in self._ingredients):
+                    ingredient._detach(self)
+                self._calories = None
+                self._notify('ingredients', ('remove', i))
                 return True
         return False
 
+    def _on_ingredient_changed(self, ingredient: Ingredient, field: str, old_value):
+        """
+        Вызывается ингредиентом рецепта при изменении его полей.
+        :param ingredient: измененный ингредиент
+        :param field: измененное поле
+        :param old_value: прежнее значение
+        """
+        if field == 'name':
+            self._notify('ingredients', ('set', ingredient, field))
+        elif field == 'unit':
+            self._notify('units', ('set', ingredient, field))
+        else:
+            self._calories = None
+            self._notify('calories', ('set', ingredient, field))
+
     def calculate_calories(self) -> float:
         """
         Вычисляет общую калорийность рецепта.
+        Результат запоминается до изменения состава или ингредиентов рецепта.
         :return: общая каллорийность рецепта
         """
-        return sum(ingredient.total_calories() for ingredient in self._ingredients)
+        if self._calories is None:
+            if self.is_packed:
+                self._calories = self._ingredients.total_calories()
+            else:
+                self._calories = sum(ingredient.total_calories() for ingredient in self._ingredients)
+        return self._calories
 
     def get_ingredient_names(self) -> List[str]:
         """
         Возвращает список названий ингредиентов.
         :return: список названий ингридиентов
         """
+        if self.is_packed:
+            return self._ingredients.names()
         return [ingredient.name for ingredient in self._ingredients]
 
     def contains_ingredient(self, ingredient_name: str) -> bool:
@@ -136,15 +245,16 @@ class Recipe:
         Проверяет, содержит ли рецепт указанный ингредиент.
         :param ingredient_name: ингридиент
         """
-        return any(ingredient.name.lower() == ingredient_name.lower()
-                   for ingredient in self._ingredients)
+        return any(name.lower() == ingredient_name.lower()
+                   for name in self.get_ingredient_names())
 
     def str(self) -> str:
         """
         Строковое представление рецепта.
         :return: рецепт
         """
-        ingredients_str = "\n".join(f"  - {ingredient}" for ingredient in self._ingredients)
+        ingredients_str = "\n".join(f"  - {name}: {quantity} {unit}"
+                                    for name, quantity, unit, _ in self._ingredient_rows())
         return (f"Рецепт: {self._name}\n"
                 f"Категория: {self._category}\n"
                 f"Описание: {self._description}\n"
@@ -165,29 +275,53 @@ class Recipe:
         """
         return {
             'name': self._name,
-            'ingredients': [ingredient.to_dict() for ingredient in self._ingredients],
+            'ingredients': self._ingredient_dicts(),
             'description': self._description,
             'instructions': self._instructions,
             'category': self._category
         }
 
+    def _ingredient_rows(self) -> Iterator[Tuple[str, float, str, float]]:
+        """
+        Перебирает ингредиенты как кортежи без распаковки рецепта.
+        :return: (название, количество, единица, калории на единицу)
+        """
+        if self.is_packed:
+            return iter(self._ingredients)
+        return ((ingredient.name, ingredient.quantity, ingredient.unit, ingredient.calories_per_unit)
+                for ingredient in self._ingredients)
+
+    def _ingredient_dicts(self) -> List[dict]:
+        """
+        Преобразует ингредиенты в словари без распаковки рецепта.
+        :return: список словарей
+        """
+        return [{'name': name, 'quantity': quantity, 'unit': unit, 'calories_per_unit': calories}
+                for name, quantity, unit, calories in self._ingredient_rows()]
+
     @classmethod
     def from_dict(cls, data: dict) -> 'Recipe':
         """
         Создает рецепт из словаря.
         :param data: рецепт из словаря
         """
-        recipe = cls(
+        return cls(
             name=data['name'],
+            ingredients=[Ingredient.from_dict(ing_data) for ing_data in data['ingredients']],
             description=data.get('description', ''),
             instructions=data.get('instructions', ''),
             category=data.get('category', 'Основное')
         )
 
-        for ing_data in data['ingredients']:
-            recipe.add_ingredient(Ingredient.from_dict(ing_data))
-
-        return recipe
+    @classmethod
+    def from_dicts(cls, items: Iterable[dict]) -> Iterator['Recipe']:
+        """
+        Лениво создает рецепты из потока словарей (например, из JSON Lines).
+        :param items: словари рецептов
+        :return: итератор рецептов
+        """
+        for data in items:
+            yield cls.from_dict(data)
 
 
 
@@ -0,0 +1,281 @@
+"""
+Модуль asyncio-сервера запросов к кулинарной книге. Содержит класс CookbookServer
+
+Протокол - JSON, по одному объекту в строке (NDJSON), поверх Unix-сокета
+или TCP на localhost. Запрос: {"id": 1, "method": "get_recipe",
+"params": ["Омлет"]}; params - список позиционных аргументов или словарь
+именованных; id - число или строка. Ответ: {"id": 1, "result": ...} или
+{"id": 1, "error": "..."}; ответ получает каждый запрос, даже некорректный.
+Клиент может отправлять запросы, не дожидаясь ответов (pipelining);
+ответы приходят по мере готовности и сопоставляются по id.
+"""
+
+import asyncio
+import json
+import os
+import stat
+from typing import Any, Callable, Dict, Optional
+
+
+# Максимальная длина строки запроса в байтах.
+MAX_LINE = 1024 * 1024
+
+# Сколько запросов по всем соединениям обрабатывается одновременно.
+DEFAULT_MAX_CONCURRENCY = 64
+
+
+def _recipe_names(recipes) -> list:
+    """
+    Преобразует список рецептов в список названий.
+    :param recipes: рецепты
+    :return: названия
+    """
+    return [recipe.name for recipe in recipes]
+
+
+class CookbookServer:
+    """Асинхронный сервер, отвечающий на запросы к одной кулинарной книге.
+
+    Методы книги вызываются в цикле событий по одному, поэтому книгу не
+    нужно защищать блокировками; ограничение одновременных запросов
+    не дает медленным клиентам накопить неограниченную очередь.
+    """
+
+    def __init__(self, cookbook, max_concurrency: int = DEFAULT_MAX_CONCURRENCY):
+        """
+        Создает сервер.
+        :param cookbook: кулинарная книга (Cookbook или совместимая)
+        :param max_concurrency: сколько запросов обрабатывается одновременно
+        """
+        if max_concurrency <= 0:
+            raise ValueError("Ограничение одновременных запросов должно быть положительным")
+        self._cookbook = cookbook
+        self._max_concurrency = max_concurrency
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._methods: Dict[str, Callable[..., Any]] = {
+            'get_recipe': self._get_recipe,
+            'find_recipes_by_ingredient': self._find_recipes_by_ingredient,
+            'find_recipes_by_category': self._find_recipes_by_category,
+            'generate_shopping_list': cookbook.generate_shopping_list,
+            'calculate_total_calories': cookbook.calculate_total_calories,
+        }
+
+    def _get_recipe(self, recipe_name: str) -> Optional[dict]:
+        """
+        Находит рецепт по названию.
+        :param recipe_name: название рецепта
+        :return: словарь рецепта или None
+        """
+        recipe = self._cookbook.get_recipe(recipe_name)
+        return recipe.to_dict() if recipe is not None else None
+
+    def _find_recipes_by_ingredient(self, ingredient_name: str) -> list:
+        """
+        Находит рецепты с ингредиентом.
+        :param ingredient_name: название ингредиента
+        :return: названия рецептов
+        """
+        return _recipe_names(self._cookbook.find_recipes_by_ingredient(ingredient_name))
+
+    def _find_recipes_by_category(self, category: str) -> list:
+        """
+        Находит рецепты категории.
+        :param category: категория
+        :return: названия рецептов
+        """
+        return _recipe_names(self._cookbook.find_recipes_by_category(category))
+
+    async def start(self, path: Optional[str] = None, host: str = '127.0.0.1', port: int = 0):
+        """
+        Начинает принимать соединения.
+        :param path: путь Unix-сокета; если не указан, используется TCP
+        :param host: адрес TCP (по умолчанию только локальный)
+        :param port: порт TCP (0 - любой свободный)
+        """
+        self._slots = asyncio.Semaphore(self._max_concurrency)
+        if path is not None:
+            try:
+                mode = os.lstat(path).st_mode
+            except FileNotFoundError:
+                pass
+            else:
+                # Удаляем только оставшийся от прошлого запуска сокет, но не чужой файл.
+                if not stat.S_ISSOCK(mode):
+                    raise ValueError(f"{path}: файл существует и не является сокетом")
+                os.unlink(path)
+            self._server = await asyncio.start_unix_server(self._serve_connection, path, limit=MAX_LINE)
+        else:
+            self._server = await asyncio.start_server(self._serve_connection, host, port, limit=MAX_LINE)
+
+    @property
+    def address(self):
+        """Возвращает адрес, на котором слушает сервер.
+
+        :return: путь Unix-сокета или пара (хост, порт)
+        """
+        return self._server.sockets[0].getsockname()
+
+    async def serve_forever(self):
+        """
+        Обслуживает соединения до отмены задачи.
+        """
+        await self._server.serve_forever()
+
+    async def close(self):
+        """
+        Перестает принимать соединения и закрывает сервер.
+        """
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    def _call(self, request: Any) -> dict:
+        """
+        Выполняет один запрос.
+        :param request: разобранный запрос
+        :return: ответ
+        """
+        if not isinstance(request, dict):
+            return {'id': None, 'error': "Запрос должен быть объектом JSON"}
+        request_id = request.get('id')
+        if request_id is not None and (isinstance(request_id, bool) or not isinstance(request_id, (int, str))):
+            return {'id': None, 'error': "id запроса должен быть числом или строкой"}
+        name = request.get('method')
+        method = self._methods.get(name) if isinstance(name, str) else None
+        if method is None:
+            return {'id': request_id, 'error': f"Неизвестный метод: {name}"}
+        params = request.get('params', [])
+        if not isinstance(params, (list, dict)):
+            return {'id': request_id, 'error': "params должен быть списком или объектом JSON"}
+        try:
+            if isinstance(params, dict):
+                result = method(**params)
+            else:
+                result = method(*params)
+        except Exception as error:  # ошибка запроса не должна рвать соединение
+            return {'id': request_id, 'error': f"{type(error).__name__}: {error}"}
+        return {'id': request_id, 'result': result}
+
+    @staticmethod
+    def _encode(response: dict) -> bytes:
+        """
+        Кодирует ответ строкой NDJSON. Если результат нельзя записать в JSON,
+        вместо него отправляется ошибка с тем же id.
+        :param response: ответ
+        :return: строка ответа с переводом строки
+        """
+        try:
+            data = json.dumps(response, ensure_ascii=False, separators=(',', ':'))
+        except (TypeError, ValueError) as error:
+            data = json.dumps({'id': response.get('id'), 'error': f"{type(error).__name__}: {error}"},
+                              ensure_ascii=False, separators=(',', ':'))
+        return data.encode('utf-8') + b'\n'
+
+    @staticmethod
+    async def _read_line(reader: asyncio.StreamReader) -> Optional[bytes]:
+        """
+        Читает одну строку запроса. Слишком длинная строка пропускается
+        до следующего перевода строки, чтобы следующие запросы читались дальше.
+        :param reader: поток чтения
+        :return: строка (пустая в конце потока) или None, если строка длиннее MAX_LINE
+        """
+        try:
+            return await reader.readuntil(b'\n')
+        except asyncio.IncompleteReadError as error:
+            return error.partial
+        except asyncio.LimitOverrunError as error:
+            overrun = error
+        while True:
+            await reader.readexactly(overrun.consumed)
+            try:
+                await reader.readuntil(b'\n')
+                return None
+            except asyncio.IncompleteReadError:
+                return None
+            except asyncio.LimitOverrunError as error:
+                overrun = error
+
+    def _handle_line(self, line: Optional[bytes]) -> dict:
+        """
+        Разбирает строку запроса и выполняет его; любая ошибка становится ответом.
+        :param line: строка запроса или None, если она длиннее MAX_LINE
+        :return: ответ
+        """
+        if line is None:
+            return {'id': None, 'error': f"Строка запроса длиннее {MAX_LINE} байт"}
+        try:
+            request = json.loads(line)
+        except ValueError:
+            return {'id': None, 'error': "Некорректный JSON"}
+        try:
+            return self._call(request)
+        except Exception as error:  # каждый запрос должен получить ответ
+            request_id = request.get('id') if isinstance(request, dict) else None
+            return {'id': request_id, 'error': f"{type(error).__name__}: {error}"}
+
+    async def _serve_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """
+        Читает запросы соединения и отвечает на них.
+        :param reader: поток чтения
+        :param writer: поток записи
+        """
+        write_lock = asyncio.Lock()
+        tasks = set()
+
+        async def respond(line: Optional[bytes]):
+            try:
+                response = self._handle_line(line)
+                data = self._encode(response)
+                async with write_lock:
+                    writer.write(data)
+                    await writer.drain()
+            except ConnectionError:
+                pass
+            finally:
+                self._slots.release()
+
+        try:
+            while True:
+                try:
+                    line = await self._read_line(reader)
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                if line is not None and not line.strip():
+                    if not line:
+                        break
+                    continue
+                await self._slots.acquire()
+                task = asyncio.ensure_future(respond(line))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks)
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+
+async def serve(cookbook, path: Optional[str] = None, host: str = '127.0.0.1', port: int = 0,
+                max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+                ready: Optional[Callable[[CookbookServer], None]] = None):
+    """
+    Запускает сервер и обслуживает запросы до отмены.
+    :param cookbook: кулинарная книга
+    :param path: путь Unix-сокета; если не указан, используется TCP
+    :param host: адрес TCP
+    :param port: порт TCP
+    :param max_concurrency: сколько запросов обрабатывается одновременно
+    :param ready: вызывается с сервером, когда он начал слушать
+    """
+    server = CookbookServer(cookbook, max_concurrency)
+    await server.start(path, host, port)
+    if ready is not None:
+        ready(server)
+    try:
+        await server.serve_forever()
+    finally:
+        await server.close()
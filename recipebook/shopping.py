@@ -0,0 +1,87 @@
+"""
+Модуль для составления списков покупок. Содержит класс ShoppingListAggregator
+"""
+
+from typing import Dict, Iterable, List, Tuple, Union
+from .recipe import Recipe
+from .text import fold
+from .units import normalize_unit
+
+
+PlanEntry = Union[str, Tuple[str, float]]
+
+
+class ShoppingListAggregator:
+    """Потоковый сборщик списка покупок с пересчетом единиц.
+
+    Ингредиенты складываются по ключу (название без учета регистра,
+    размерность): 3 шт и 200 г одного продукта остаются разными строками,
+    а 1 кг и 200 г складываются в 1200 г. Рецепты принимаются по одному,
+    поэтому память зависит от числа разных продуктов, а не от размера плана.
+    """
+
+    def __init__(self, cookbook):
+        """
+        Создает пустой список покупок.
+        :param cookbook: книга, из которой берутся рецепты (нужен get_recipe)
+        """
+        self._cookbook = cookbook
+        self._totals: Dict[Tuple[str, str], List] = {}
+        self._normalized: Dict[int, Tuple[Recipe, List[Tuple[Tuple[str, str], str, str, float]]]] = {}
+
+    def _rows(self, recipe: Recipe) -> List[Tuple[Tuple[str, str], str, str, float]]:
+        """
+        Пересчитывает ингредиенты рецепта в базовые единицы (с запоминанием).
+        :param recipe: рецепт
+        :return: список (ключ, название, базовая единица, количество)
+        """
+        cached = self._normalized.get(id(recipe))
+        if cached is not None and cached[0] is recipe:
+            return cached[1]
+        rows = []
+        for name, quantity, unit, _ in recipe._ingredient_rows():
+            dimension, base_unit, factor = normalize_unit(unit)
+            rows.append(((fold(name), dimension), name, base_unit, quantity * factor))
+        self._normalized[id(recipe)] = (recipe, rows)
+        return rows
+
+    def add(self, recipe_name: str, servings: float = 1) -> bool:
+        """
+        Добавляет рецепт в список покупок.
+        :param recipe_name: название рецепта
+        :param servings: во сколько раз увеличить количества
+        :return: найден ли рецепт
+        """
+        if servings < 0:
+            raise ValueError("Количество порций не может быть отрицательным")
+        recipe = self._cookbook.get_recipe(recipe_name)
+        if recipe is None:
+            return False
+        totals = self._totals
+        for key, name, base_unit, quantity in self._rows(recipe):
+            entry = totals.get(key)
+            if entry is None:
+                totals[key] = [name, base_unit, quantity * servings]
+            else:
+                entry[2] += quantity * servings
+        return True
+
+    def consume(self, plan: Iterable[PlanEntry]) -> 'ShoppingListAggregator':
+        """
+        Добавляет рецепты из потока.
+        :param plan: названия рецептов или пары (название, порции)
+        :return: этот же сборщик
+        """
+        for entry in plan:
+            if isinstance(entry, str):
+                self.add(entry)
+            else:
+                self.add(*entry)
+        return self
+
+    def result(self) -> Dict[Tuple[str, str], float]:
+        """
+        Возвращает список покупок.
+        :return: (название, единица) -> количество, в порядке первого появления
+        """
+        return {(name, unit): quantity for name, unit, quantity in self._totals.values()}
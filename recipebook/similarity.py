@@ -0,0 +1,172 @@
+"""
+Модуль для поиска похожих рецептов по составу. Содержит класс SimilarityIndex
+"""
+
+import hashlib
+import heapq
+import random
+from typing import Dict, FrozenSet, List, Set, Tuple
+from .recipe import Recipe
+from .text import fold
+
+
+_PRIME = (1 << 61) - 1
+
+
+class SimilarityIndex:
+    """MinHash-подписи наборов ингредиентов и LSH-индекс по полосам.
+
+    Рецепты, попавшие в одну корзину хотя бы в одной полосе, считаются
+    кандидатами; затем кандидаты переранжируются по точному коэффициенту
+    Жаккара. Вероятность стать кандидатом для пары со сходством s равна
+    1 - (1 - s**ROWS)**BANDS.
+    """
+
+    BANDS = 20
+    ROWS = 3
+
+    def __init__(self, seed: int = 1):
+        """
+        Инициализирует пустой индекс.
+        :param seed: зерно для хеш-функций
+        """
+        rng = random.Random(seed)
+        size = self.BANDS * self.ROWS
+        self._coefficients = [(rng.randrange(1, _PRIME), rng.randrange(0, _PRIME)) for _ in range(size)]
+        self._element_hashes: Dict[str, Tuple[int, ...]] = {}
+        self._sets: Dict[Recipe, FrozenSet[str]] = {}
+        self._bands: Dict[Recipe, Tuple[Tuple[int, ...], ...]] = {}
+        self._buckets: Dict[Tuple[int, Tuple[int, ...]], Set[Recipe]] = {}
+
+    def _hashes(self, key: str) -> Tuple[int, ...]:
+        """
+        Возвращает значения всех хеш-функций для ингредиента (с запоминанием).
+        :param key: нормализованное название ингредиента
+        :return: кортеж значений
+        """
+        values = self._element_hashes.get(key)
+        if values is None:
+            base = int.from_bytes(hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest(), 'little')
+            values = tuple((a * base + b) % _PRIME for a, b in self._coefficients)
+            self._element_hashes[key] = values
+        return values
+
+    def signature(self, keys: FrozenSet[str]) -> Tuple[int, ...]:
+        """
+        Вычисляет MinHash-подпись набора ингредиентов.
+        :param keys: нормализованные названия
+        :return: подпись
+        """
+        return tuple(map(min, zip(*(self._hashes(key) for key in keys))))
+
+    def add(self, recipe: Recipe):
+        """
+        Добавляет рецепт в индекс.
+        :param recipe: рецепт
+        """
+        keys = frozenset(map(fold, recipe.get_ingredient_names()))
+        self._sets[recipe] = keys
+        if not keys:
+            return
+        signature = self.signature(keys)
+        bands = tuple(signature[i * self.ROWS:(i + 1) * self.ROWS] for i in range(self.BANDS))
+        self._bands[recipe] = bands
+        for number, band in enumerate(bands):
+            self._buckets.setdefault((number, band), set()).add(recipe)
+
+    def add_many(self, recipes: List[Recipe]):
+        """
+        Добавляет много рецептов сразу.
+        :param recipes: рецепты
+        """
+        for recipe in recipes:
+            self.add(recipe)
+
+    def discard(self, recipe: Recipe):
+        """
+        Удаляет рецепт из индекса.
+        :param recipe: рецепт
+        """
+        self._sets.pop(recipe, None)
+        bands = self._bands.pop(recipe, None)
+        if bands is None:
+            return
+        for number, band in enumerate(bands):
+            bucket = self._buckets[(number, band)]
+            bucket.discard(recipe)
+            if not bucket:
+                del self._buckets[(number, band)]
+
+    def on_change(self, recipe: Recipe, event: str, old_value):
+        """
+        Пересчитывает подпись при изменении состава.
+        :param recipe: измененный рецепт
+        :param event: что изменилось
+        :param old_value: прежнее значение
+        """
+        if event == 'ingredients' and recipe in self._sets:
+            self.discard(recipe)
+            self.add(recipe)
+
+    def _jaccard(self, first: Recipe, second: Recipe) -> float:
+        """
+        Точный коэффициент Жаккара наборов ингредиентов.
+        :param first: рецепт
+        :param second: рецепт
+        :return: сходство от 0 до 1
+        """
+        a, b = self._sets[first], self._sets[second]
+        union = len(a | b)
+        return len(a & b) / union if union else 0.0
+
+    def candidates(self, recipe: Recipe) -> Set[Recipe]:
+        """
+        Возвращает рецепты, делящие с данным хотя бы одну LSH-корзину.
+        :param recipe: рецепт из индекса
+        :return: множество кандидатов (без самого рецепта)
+        """
+        found: Set[Recipe] = set()
+        for number, band in enumerate(self._bands.get(recipe, ())):
+            found |= self._buckets[(number, band)]
+        found.discard(recipe)
+        return found
+
+    def similar(self, recipe: Recipe, limit: int = 10,
+                min_similarity: float = 0.0) -> List[Tuple[Recipe, float]]:
+        """
+        Находит рецепты, похожие по составу (приближенно, с точным переранжированием).
+        :param recipe: рецепт из индекса
+        :param limit: сколько рецептов вернуть
+        :param min_similarity: минимальный коэффициент Жаккара
+        :return: список (рецепт, сходство) по убыванию сходства
+        """
+        scored = ((other, self._jaccard(recipe, other)) for other in self.candidates(recipe))
+        return heapq.nlargest(limit, (item for item in scored if item[1] >= min_similarity),
+                              key=lambda item: item[1])
+
+    def graph(self, min_similarity: float = 0.5) -> Dict[Recipe, List[Tuple[Recipe, float]]]:
+        """
+        Строит граф сходства для всей книги: пары-кандидаты берутся из корзин,
+        а не из перебора всех пар рецептов.
+        :param min_similarity: минимальный коэффициент Жаккара для ребра
+        :return: рецепт -> список (соседний рецепт, сходство) по убыванию сходства
+        """
+        seen: Set[Tuple[int, int]] = set()
+        edges: Dict[Recipe, List[Tuple[Recipe, float]]] = {}
+        for bucket in self._buckets.values():
+            if len(bucket) < 2:
+                continue
+            members = list(bucket)
+            for i, first in enumerate(members):
+                for second in members[i + 1:]:
+                    pair = (id(first), id(second)) if id(first) < id(second) else (id(second), id(first))
+                    if pair in seen:
+                        continue
+                    seen.add(pair)
+                    similarity = self._jaccard(first, second)
+                    if similarity >= min_similarity:
+                        edges.setdefault(first, []).append((second, similarity))
+                        edges.setdefault(second, []).append((first, similarity))
+        for neighbours in edges.values():
+            neighbours.sort(key=lambda item: item[1], reverse=True)
+        return edges
@@ -0,0 +1,370 @@
+"""
+Модуль для бинарных снимков кулинарной книги, открываемых через mmap.
+Содержит функцию write_snapshot и класс SnapshotCookbook
+
+Формат снимка (все числа в порядке байт платформы, записавшей файл):
+заголовок, затем секции, выровненные по 8 байт:
+  - таблица строк: смещения (uint32) и общий блок UTF-8;
+  - рецепты: по 6 uint32 (название, описание, инструкции, категория,
+    первый ингредиент, число ингредиентов);
+  - колонки ингредиентов: название и единица (uint32, номера строк),
+    количество и калории на единицу (float64);
+  - три каталога (названия рецептов, ингредиенты, категории): записи
+    (ключ, начало, длина) по 3 uint32, отсортированные по ключу,
+    и списки номеров рецептов (uint32).
+"""
+
+import mmap
+import os
+import struct
+import tempfile
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+from .recipe import Recipe
+from .ingredient import Ingredient
+from .shopping import PlanEntry, ShoppingListAggregator
+from .text import fold
+
+
+_MAGIC = b'RBSNAP\x00\x01'
+_BYTE_ORDER_MARK = 0x01020304
+_SECTIONS = ('string_offsets', 'string_blob', 'recipes',
+             'ingredient_names', 'ingredient_units', 'ingredient_quantities', 'ingredient_calories',
+             'name_directory', 'name_postings',
+             'ingredient_directory', 'ingredient_postings',
+             'category_directory', 'category_postings')
+_FORMATS = {'string_offsets': 'I', 'string_blob': 'B', 'recipes': 'I',
+            'ingredient_names': 'I', 'ingredient_units': 'I',
+            'ingredient_quantities': 'd', 'ingredient_calories': 'd',
+            'name_directory': 'I', 'name_postings': 'I',
+            'ingredient_directory': 'I', 'ingredient_postings': 'I',
+            'category_directory': 'I', 'category_postings': 'I'}
+_HEADER = struct.Struct('=8sII' + 'QQ' * len(_SECTIONS))
+_RECIPE_FIELDS = 6
+
+
+class _StringTable:
+    """Таблица интернированных строк для записи снимка."""
+
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+        self.offsets = array('I', [0])
+        self.blob = bytearray()
+
+    def intern(self, value: str) -> int:
+        """
+        Возвращает номер строки, добавляя ее в таблицу при первом появлении.
+        :param value: строка
+        :return: номер строки
+        """
+        sid = self.ids.get(value)
+        if sid is None:
+            sid = len(self.ids)
+            self.ids[value] = sid
+            self.blob += value.encode('utf-8')
+            self.offsets.append(len(self.blob))
+        return sid
+
+
+def _directory(strings: _StringTable, groups: Dict[str, List[int]]) -> Tuple[array, array]:
+    """
+    Строит отсортированный каталог ключ -> номера рецептов.
+    :param strings: таблица строк
+    :param groups: ключ -> номера рецептов
+    :return: (записи каталога, списки номеров)
+    """
+    entries = array('I')
+    postings = array('I')
+    for key in sorted(groups):
+        members = groups[key]
+        entries.extend((strings.intern(key), len(postings), len(members)))
+        postings.extend(members)
+    return entries, postings
+
+
+def write_snapshot(filename: str, recipes: Iterable[Recipe]):
+    """
+    Записывает рецепты в бинарный снимок.
+    :param filename: путь к файлу
+    :param recipes: рецепты (названия должны быть уникальны без учета регистра)
+    """
+    strings = _StringTable()
+    columns = {name: array(_FORMATS[name]) for name in _SECTIONS}
+    by_name: Dict[str, List[int]] = {}
+    by_ingredient: Dict[str, List[int]] = {}
+    by_category: Dict[str, List[int]] = {}
+
+    for number, recipe in enumerate(recipes):
+        rows = list(recipe._ingredient_rows())
+        columns['recipes'].extend((
+            strings.intern(recipe.name), strings.intern(recipe.description),
+            strings.intern(recipe.instructions), strings.intern(recipe.category),
+            len(columns['ingredient_quantities']), len(rows)))
+        by_name.setdefault(fold(recipe.name), []).append(number)
+        by_category.setdefault(fold(recipe.category), []).append(number)
+        seen = set()
+        for name, quantity, unit, calories in rows:
+            columns['ingredient_names'].append(strings.intern(name))
+            columns['ingredient_units'].append(strings.intern(unit))
+            columns['ingredient_quantities'].append(quantity)
+            columns['ingredient_calories'].append(calories)
+            key = fold(name)
+            if key not in seen:
+                seen.add(key)
+                by_ingredient.setdefault(key, []).append(number)
+
+    for prefix, groups in (('name', by_name), ('ingredient', by_ingredient), ('category', by_category)):
+        columns[prefix + '_directory'], columns[prefix + '_postings'] = _directory(strings, groups)
+    columns['string_offsets'] = strings.offsets
+    columns['string_blob'] = array('B', bytes(strings.blob))
+
+    table = []
+    offset = _HEADER.size
+    payloads = []
+    for name in _SECTIONS:
+        offset += -offset % 8
+        data = columns[name].tobytes()
+        table.extend((offset, len(columns[name])))
+        payloads.append((offset, data))
+        offset += len(data)
+
+    # Снимок пишется во временный файл рядом и переименовывается поверх
+    # старого: открытые через mmap копии продолжают читать прежний файл.
+    directory = os.path.dirname(os.path.abspath(filename))
+    fd, tmp_name = tempfile.mkstemp(prefix='.recipebook-', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as file:
+            file.write(_HEADER.pack(_MAGIC, _BYTE_ORDER_MARK, len(_SECTIONS), *table))
+            for position, data in payloads:
+                file.write(b'\0' * (position - file.tell()))
+                file.write(data)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_name, filename)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except OSError:
+            pass
+        raise
+
+
+class SnapshotCookbook:
+    """Кулинарная книга только для чтения поверх mmap-снимка.
+
+    Открытие не разбирает рецепты: запросы читают колонки и каталоги
+    снимка напрямую, а объекты Recipe создаются лишь при обращении к
+    конкретному рецепту и кешируются.
+    """
+
+    def __init__(self, filename: str):
+        """
+        Открывает снимок.
+        :param filename: путь к файлу снимка
+        """
+        self._filename = filename
+        with open(filename, 'rb') as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        header = _HEADER.unpack_from(self._mmap, 0)
+        magic, byte_order, section_count = header[:3]
+        if magic != _MAGIC or section_count != len(_SECTIONS):
+            raise ValueError(f"{filename}: не является снимком кулинарной книги")
+        if byte_order != _BYTE_ORDER_MARK:
+            raise ValueError(f"{filename}: снимок записан с другим порядком байт")
+        view = memoryview(self._mmap)
+        self._views = {}
+        for number, name in enumerate(_SECTIONS):
+            offset, length = header[3 + 2 * number], header[4 + 2 * number]
+            size = array(_FORMATS[name]).itemsize
+            self._views[name] = view[offset:offset + length * size].cast(_FORMATS[name])
+        self._strings: Dict[int, str] = {}
+        self._materialized: Dict[int, Recipe] = {}
+
+    @property
+    def filename(self) -> str:
+        """Возвращает путь к файлу снимка.
+
+        :return: путь к файлу
+        """
+        return self._filename
+
+    def close(self):
+        """Освобождает отображение файла. Рецепты, уже созданные из снимка, остаются рабочими."""
+        for part in self._views.values():
+            part.release()
+        self._views = {}
+        self._mmap.close()
+
+    def _string(self, sid: int) -> str:
+        """
+        Возвращает строку из таблицы строк.
+        :param sid: номер строки
+        :return: строка
+        """
+        value = self._strings.get(sid)
+        if value is None:
+            offsets = self._views['string_offsets']
+            value = bytes(self._views['string_blob'][offsets[sid]:offsets[sid + 1]]).decode('utf-8')
+            self._strings[sid] = value
+        return value
+
+    def _lookup(self, prefix: str, key: str) -> memoryview:
+        """
+        Ищет ключ в отсортированном каталоге двоичным поиском.
+        :param prefix: 'name', 'ingredient' или 'category'
+        :param key: нормализованный ключ
+        :return: номера рецептов (пусто, если ключа нет)
+        """
+        directory = self._views[prefix + '_directory']
+        postings = self._views[prefix + '_postings']
+        low, high = 0, len(directory) // 3
+        while low < high:
+            middle = (low + high) // 2
+            current = self._string(directory[3 * middle])
+            if current < key:
+                low = middle + 1
+            elif current > key:
+                high = middle
+            else:
+                start, length = directory[3 * middle + 1], directory[3 * middle + 2]
+                return postings[start:start + length]
+        return postings[0:0]
+
+    def _recipe_at(self, number: int) -> Recipe:
+        """
+        Создает (или берет из кеша) рецепт по его номеру в снимке.
+        :param number: номер рецепта
+        :return: рецепт
+        """
+        recipe = self._materialized.get(number)
+        if recipe is None:
+            fields = self._views['recipes'][_RECIPE_FIELDS * number:_RECIPE_FIELDS * (number + 1)]
+            name, description, instructions, category, start, length = fields
+            names, units = self._views['ingredient_names'], self._views['ingredient_units']
+            quantities, calories = self._views['ingredient_quantities'], self._views['ingredient_calories']
+            recipe = Recipe(self._string(name),
+                            [Ingredient(self._string(names[i]), quantities[i],
+                                        self._string(units[i]), calories[i])
+                             for i in range(start, start + length)],
+                            description=self._string(description),
+                            instructions=self._string(instructions),
+                            category=self._string(category))
+            self._materialized[number] = recipe
+        return recipe
+
+    def _ingredient_range(self, number: int) -> range:
+        """
+        Возвращает диапазон ингредиентов рецепта в колонках.
+        :param number: номер рецепта
+        :return: диапазон номеров ингредиентов
+        """
+        start = self._views['recipes'][_RECIPE_FIELDS * number + 4]
+        return range(start, start + self._views['recipes'][_RECIPE_FIELDS * number + 5])
+
+    def _number(self, recipe_name: str) -> Optional[int]:
+        """
+        Ищет номер рецепта по названию.
+        :param recipe_name: название рецепта
+        :return: номер или None
+        """
+        found = self._lookup('name', fold(recipe_name))
+        return found[0] if len(found) else None
+
+    @property
+    def count(self) -> int:
+        """Возвращает количество рецептов.
+
+        :return: количество рецептов
+        """
+        return len(self._views['recipes']) // _RECIPE_FIELDS
+
+    @property
+    def recipes(self) -> List[Recipe]:
+        """Возвращает список рецептов (создает все объекты Recipe).
+
+        :return: список рецептов
+        """
+        return [self._recipe_at(number) for number in range(self.count)]
+
+    def get_recipe(self, recipe_name: str) -> Optional[Recipe]:
+        """Находит рецепт по названию.
+
+        :return: рецепт или None
+        """
+        number = self._number(recipe_name)
+        return None if number is None else self._recipe_at(number)
+
+    def find_recipes_by_ingredient(self, ingredient_name: str) -> List[Recipe]:
+        """Находит рецепты, содержащие указанный ингредиент.
+
+        :return: рецепты с ингредиентом
+        """
+        return [self._recipe_at(number) for number in self._lookup('ingredient', fold(ingredient_name))]
+
+    def find_recipes_by_category(self, category: str) -> List[Recipe]:
+        """Находит рецепты по категории.
+
+        :return: рецепты категории
+        """
+        return [self._recipe_at(number) for number in self._lookup('category', fold(category))]
+
+    def generate_shopping_list(self, recipe_names: List[str]) -> Dict[str, float]:
+        """Генерирует список покупок для указанных рецептов, не создавая объектов Recipe.
+
+        :return: список покупок
+        """
+        names, quantities = self._views['ingredient_names'], self._views['ingredient_quantities']
+        totals: Dict[int, float] = {}
+        for recipe_name in recipe_names:
+            number = self._number(recipe_name)
+            if number is None:
+                continue
+            for i in self._ingredient_range(number):
+                totals[names[i]] = totals.get(names[i], 0.0) + quantities[i]
+        return {self._string(sid): quantity for sid, quantity in totals.items()}
+
+    def build_shopping_list(self, plan: Iterable[PlanEntry]) -> Dict[Tuple[str, str], float]:
+        """Генерирует список покупок с учетом единиц измерения и порций.
+
+        :param plan: названия рецептов или пары (название, порции)
+        :return: (ингредиент, единица) -> количество
+        """
+        return ShoppingListAggregator(self).consume(plan).result()
+
+    def calculate_total_calories(self, recipe_names: List[str]) -> float:
+        """Вычисляет общую калорийность для указанных рецептов, не создавая объектов Recipe.
+
+        :return: общая калорийность
+        """
+        quantities, calories = self._views['ingredient_quantities'], self._views['ingredient_calories']
+        total = 0.0
+        for recipe_name in recipe_names:
+            number = self._number(recipe_name)
+            if number is not None:
+                total += sum(quantities[i] * calories[i] for i in self._ingredient_range(number))
+        return total
+
+    def get_all_categories(self) -> List[str]:
+        """Возвращает список всех категорий рецептов.
+
+        :return: список всех категорий рецептов
+        """
+        directory, postings = self._views['category_directory'], self._views['category_postings']
+        recipes = self._views['recipes']
+        return [self._string(recipes[_RECIPE_FIELDS * postings[directory[i + 1]] + 3])
+                for i in range(0, len(directory), 3)]
+
+    def __str__(self) -> str:
+        """Строковое представление кулинарной книги.
+
+        :return: строковое представление кулинарной книги
+        """
+        if not self.count:
+            return "Кулинарная книга пуста"
+
+        recipes = self._views['recipes']
+        result = f"Кулинарная книга ({self.count} рецептов):\n"
+        for number in range(self.count):
+            base = _RECIPE_FIELDS * number
+            result += f"\n- {self._string(recipes[base])} ({self._string(recipes[base + 3])})"
+        return result
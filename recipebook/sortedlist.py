@@ -0,0 +1,135 @@
+"""
+Модуль с отсортированным списком для индексов. Содержит класс SortedList
+"""
+
+from bisect import bisect_left, bisect_right, insort
+from typing import Any, Iterable, Iterator, List
+
+
+class SortedList:
+    """Отсортированный список из коротких подсписков.
+
+    Вставка и удаление стоят O(log n) сравнений плюс сдвиг внутри одного
+    подсписка длиной не больше 2 * LOAD, поэтому не зависят от размера
+    всего списка так, как insort в один большой список.
+    """
+
+    LOAD = 512
+
+    def __init__(self, values: Iterable = ()):
+        """
+        Создает список из значений.
+        :param values: начальные значения
+        """
+        self._lists: List[list] = []
+        self._maxes: List[Any] = []
+        self._len = 0
+        self.update(values)
+
+    def __len__(self) -> int:
+        """
+        Возвращает число элементов.
+        :return: число элементов
+        """
+        return self._len
+
+    def __iter__(self) -> Iterator:
+        """
+        Перебирает элементы по возрастанию.
+        :return: итератор
+        """
+        for sub in self._lists:
+            yield from sub
+
+    def __reversed__(self) -> Iterator:
+        """
+        Перебирает элементы по убыванию.
+        :return: итератор
+        """
+        for sub in reversed(self._lists):
+            yield from reversed(sub)
+
+    def update(self, values: Iterable):
+        """
+        Добавляет много значений сразу: список пересобирается одной сортировкой.
+        :param values: значения
+        """
+        values = list(values)
+        if not values:
+            return
+        values.extend(self)
+        values.sort()
+        self._lists = [values[i:i + self.LOAD] for i in range(0, len(values), self.LOAD)]
+        self._maxes = [sub[-1] for sub in self._lists]
+        self._len = len(values)
+
+    def add(self, value):
+        """
+        Вставляет значение.
+        :param value: значение
+        """
+        if not self._lists:
+            self._lists.append([value])
+            self._maxes.append(value)
+            self._len = 1
+            return
+        i = bisect_left(self._maxes, value)
+        if i == len(self._maxes):
+            i -= 1
+            self._lists[i].append(value)
+        else:
+            insort(self._lists[i], value)
+        sub = self._lists[i]
+        self._maxes[i] = sub[-1]
+        self._len += 1
+        if len(sub) > 2 * self.LOAD:
+            self._lists[i:i + 1] = [sub[:self.LOAD], sub[self.LOAD:]]
+            self._maxes[i:i + 1] = [sub[self.LOAD - 1], sub[-1]]
+
+    def remove(self, value):
+        """
+        Удаляет значение.
+        :param value: значение
+        :raises ValueError: если значения нет
+        """
+        i = bisect_left(self._maxes, value)
+        if i < len(self._maxes):
+            sub = self._lists[i]
+            j = bisect_left(sub, value)
+            if j < len(sub) and sub[j] == value:
+                del sub[j]
+                self._len -= 1
+                if sub:
+                    self._maxes[i] = sub[-1]
+                else:
+                    del self._lists[i]
+                    del self._maxes[i]
+                return
+        raise ValueError(f"{value!r} нет в списке")
+
+    def irange(self, low) -> Iterator:
+        """
+        Перебирает элементы не меньше low по возрастанию.
+        :param low: нижняя граница
+        :return: итератор
+        """
+        i = bisect_left(self._maxes, low)
+        if i == len(self._maxes):
+            return
+        sub = self._lists[i]
+        yield from sub[bisect_left(sub, low):]
+        for sub in self._lists[i + 1:]:
+            yield from sub
+
+    def rank(self, value, right: bool = False) -> int:
+        """
+        Возвращает число элементов меньше value (или не больше, если right).
+        :param value: граница
+        :param right: считать ли равные value
+        :return: число элементов
+        """
+        search = bisect_right if right else bisect_left
+        i = search(self._maxes, value)
+        if i == len(self._maxes):
+            return self._len
+        return sum(len(sub) for sub in self._lists[:i]) + search(self._lists[i], value)
@@ -0,0 +1,338 @@
+"""
+Модуль для хранения кулинарной книги в базе SQLite. Содержит класс SQLiteCookbook
+"""
+
+import sqlite3
+from typing import Dict, Iterable, List, Optional, Tuple
+from .recipe import Recipe
+from .ingredient import Ingredient
+from .shopping import PlanEntry
+from .text import fold
+from .units import normalize_unit
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS recipes (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    name_key TEXT NOT NULL UNIQUE,
+    description TEXT NOT NULL DEFAULT '',
+    instructions TEXT NOT NULL DEFAULT '',
+    category TEXT NOT NULL,
+    category_key TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS recipes_category ON recipes (category_key);
+CREATE TABLE IF NOT EXISTS ingredients (
+    recipe_id INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    name_key TEXT NOT NULL,
+    quantity NOT NULL,
+    unit TEXT NOT NULL,
+    calories_per_unit NOT NULL,
+    PRIMARY KEY (recipe_id, position)
+);
+CREATE INDEX IF NOT EXISTS ingredients_name ON ingredients (name_key, recipe_id);
+CREATE TEMP TABLE IF NOT EXISTS request_names (
+    pos INTEGER NOT NULL,
+    name_key TEXT NOT NULL,
+    servings REAL NOT NULL DEFAULT 1
+);
+"""
+
+# Множитель для упорядочивания (номер рецепта в запросе, позиция ингредиента)
+# одним числом: в рецепте меньше 2**20 ингредиентов.
+_POSITION_SHIFT = 1 << 20
+
+
+class SQLiteCookbook:
+    """Кулинарная книга, хранящая рецепты в индексированной базе SQLite.
+
+    Рецепты не держатся в памяти: объекты Recipe создаются только для
+    результатов get_recipe и find_recipes_by_*, а списки покупок и калории
+    считаются агрегатами SQL. Возвращаемые рецепты - копии, их изменение
+    не попадает в базу.
+    """
+
+    def __init__(self, database: str = ":memory:"):
+        """
+        Открывает (или создает) базу кулинарной книги.
+        :param database: путь к файлу базы или ':memory:'
+        """
+        self._connection = sqlite3.connect(database)
+        self._connection.executescript(_SCHEMA)
+
+    def close(self):
+        """Закрывает соединение с базой."""
+        self._connection.close()
+
+    @property
+    def recipes(self) -> List[Recipe]:
+        """Возвращает список рецептов.
+
+        :return: список рецептов
+        """
+        return self._materialize("SELECT id FROM recipes", ())
+
+    @property
+    def count(self) -> int:
+        """Возвращает количество рецептов.
+
+        :return: количество рецептов
+        """
+        return self._connection.execute("SELECT COUNT(*) FROM recipes").fetchone()[0]
+
+    def add_recipe(self, recipe: Recipe) -> bool:
+        """Добавляет рецепт в кулинарную книгу.
+
+        :param recipe: рецепт в кулинарной книге
+        :return: добавлен ли рецепт (False, если название уже занято)
+        """
+        with self._connection:
+            try:
+                cursor = self._connection.execute(
+                    "INSERT INTO recipes (name, name_key, description, instructions, category, category_key)"
+                    " VALUES (?, ?, ?, ?, ?, ?)",
+                    (recipe.name, fold(recipe.name), recipe.description, recipe.instructions,
+                     recipe.category, fold(recipe.category)))
+            except sqlite3.IntegrityError:
+                return False
+            recipe_id = cursor.lastrowid
+            self._connection.executemany(
+                "INSERT INTO ingredients (recipe_id, position, name, name_key, quantity, unit, calories_per_unit)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                ((recipe_id, position, name, fold(name), quantity, unit, calories_per_unit)
+                 for position, (name, quantity, unit, calories_per_unit)
+                 in enumerate(recipe._ingredient_rows())))
+        return True
+
+    def remove_recipe(self, recipe_name: str) -> bool:
+        """Удаляет рецепт по названию.
+
+        :return: найден ли рецепт при попытке его удалить
+        """
+        with self._connection:
+            row = self._connection.execute(
+                "SELECT id FROM recipes WHERE name_key = ?", (fold(recipe_name),)).fetchone()
+            if row is None:
+                return False
+            self._connection.execute("DELETE FROM ingredients WHERE recipe_id = ?", row)
+            self._connection.execute("DELETE FROM recipes WHERE id = ?", row)
+        return True
+
+    def get_recipe(self, recipe_name: str) -> Optional[Recipe]:
+        """Находит рецепт по названию.
+
+        :return: рецепт или None
+        """
+        found = self._materialize("SELECT id FROM recipes WHERE name_key = ?", (fold(recipe_name),))
+        return found[0] if found else None
+
+    def find_recipes_by_ingredient(self, ingredient_name: str) -> List[Recipe]:
+        """Находит рецепты, содержащие указанный ингредиент.
+
+        :return: рецепты с ингредиентом
+        """
+        return self._materialize("SELECT recipe_id FROM ingredients WHERE name_key = ?",
+                                 (fold(ingredient_name),))
+
+    def find_recipes_by_all_ingredients(self, ingredient_names: List[str]) -> List[Recipe]:
+        """Находит рецепты, содержащие все указанные ингредиенты.
+
+        :param ingredient_names: названия ингредиентов
+        :return: рецепты со всеми ингредиентами
+        """
+        keys = sorted(set(map(fold, ingredient_names)))
+        if not keys:
+            return []
+        placeholders = ", ".join("?" * len(keys))
+        return self._materialize(
+            f"SELECT recipe_id FROM ingredients WHERE name_key IN ({placeholders})"
+            " GROUP BY recipe_id HAVING COUNT(DISTINCT name_key) = ?",
+            (*keys, len(keys)))
+
+    def find_recipes_by_any_ingredient(self, ingredient_names: List[str]) -> List[Recipe]:
+        """Находит рецепты, содержащие хотя бы один из указанных ингредиентов.
+
+        :param ingredient_names: названия ингредиентов
+        :return: рецепты хотя бы с одним ингредиентом
+        """
+        keys = sorted(set(map(fold, ingredient_names)))
+        placeholders = ", ".join("?" * len(keys))
+        return self._materialize(
+            f"SELECT recipe_id FROM ingredients WHERE name_key IN ({placeholders})", keys)
+
+    def find_recipes_by_category(self, category: str) -> List[Recipe]:
+        """Находит рецепты по категории.
+
+        :return: рецепты категории
+        """
+        return self._materialize("SELECT id FROM recipes WHERE category_key = ?", (fold(category),))
+
+    def generate_shopping_list(self, recipe_names: List[str]) -> Dict[str, float]:
+        """Генерирует список покупок для указанных рецептов.
+
+        :return: список покупок
+        """
+        with self._requested(recipe_names):
+            rows = self._connection.execute(
+                "SELECT i.name, SUM(i.quantity) FROM request_names q"
+                " JOIN recipes r ON r.name_key = q.name_key"
+                " JOIN ingredients i ON i.recipe_id = r.id"
+                " GROUP BY i.name ORDER BY MIN(q.pos * ? + i.position)",
+                (_POSITION_SHIFT,)).fetchall()
+        return dict(rows)
+
+    def build_shopping_list(self, plan: Iterable[PlanEntry]) -> Dict[Tuple[str, str], float]:
+        """Генерирует список покупок с учетом единиц измерения и порций.
+
+        Суммы по (ингредиент, единица) считает SQL, пересчет в базовые
+        единицы выполняется над уже сгруппированными строками.
+
+        :param plan: названия рецептов или пары (название, порции)
+        :return: (ингредиент, единица) -> количество
+        """
+        with self._requested(plan):
+            rows = self._connection.execute(
+                "SELECT i.name, i.name_key, i.unit, SUM(i.quantity * q.servings),"
+                " MIN(q.pos * ? + i.position) AS first_seen"
+                " FROM request_names q"
+                " JOIN recipes r ON r.name_key = q.name_key"
+                " JOIN ingredients i ON i.recipe_id = r.id"
+                " GROUP BY i.name_key, i.unit ORDER BY first_seen",
+                (_POSITION_SHIFT,)).fetchall()
+        totals: Dict[Tuple[str, str], List] = {}
+        for name, name_key, unit, quantity, _ in rows:
+            dimension, base_unit, factor = normalize_unit(unit)
+            entry = totals.get((name_key, dimension))
+            if entry is None:
+                totals[(name_key, dimension)] = [name, base_unit, quantity * factor]
+            else:
+                entry[2] += quantity * factor
+        return {(name, unit): quantity for name, unit, quantity in totals.values()}
+
+    def calculate_total_calories(self, recipe_names: List[str]) -> float:
+        """Вычисляет общую калорийность для указанных рецептов.
+
+        :return: общая калорийность
+        """
+        with self._requested(recipe_names):
+            total = self._connection.execute(
+                "SELECT SUM(i.quantity * i.calories_per_unit) FROM request_names q"
+                " JOIN recipes r ON r.name_key = q.name_key"
+                " JOIN ingredients i ON i.recipe_id = r.id").fetchone()[0]
+        return float(total or 0.0)
+
+    def get_all_categories(self) -> List[str]:
+        """Возвращает список всех категорий рецептов.
+
+        :return: список всех категорий рецептов
+        """
+        return [row[0] for row in self._connection.execute("SELECT DISTINCT category FROM recipes")]
+
+    def __str__(self) -> str:
+        """Строковое представление кулинарной книги.
+
+        :return: строковое представление кулинарной книги
+        """
+        rows = self._connection.execute("SELECT name, category FROM recipes ORDER BY id").fetchall()
+        if not rows:
+            return "Кулинарная книга пуста"
+
+        result = f"Кулинарная книга ({len(rows)} рецептов):\n"
+        for name, category in rows:
+            result += f"\n- {name} ({category})"
+        return result
+
+    def print_shopping_list(self, recipe_names: List[str]):
+        """Печатает список покупок для указанных рецептов.
+
+        :param recipe_names: названия рецептов
+        """
+        shopping_list = self.build_shopping_list(recipe_names)
+
+        if not shopping_list:
+            print("Список покупок пуст")
+            return
+
+        print("Список покупок:")
+        for (ingredient, unit), quantity in shopping_list.items():
+            print(f"{ingredient}: {quantity} {unit}")
+
+    def _requested(self, recipe_names: Iterable[PlanEntry]) -> '_RequestedNames':
+        """
+        Заполняет временную таблицу названиями рецептов из запроса.
+        :param recipe_names: названия рецептов или пары (название, порции); повторы учитываются
+        :return: контекст, очищающий таблицу по выходе
+        """
+        return _RequestedNames(self._connection, recipe_names)
+
+    def _materialize(self, id_query: str, params: Iterable) -> List[Recipe]:
+        """
+        Создает объекты Recipe для рецептов, отобранных запросом.
+        :param id_query: SQL-запрос, возвращающий id рецептов
+        :param params: параметры запроса
+        :return: рецепты в порядке добавления
+        """
+        rows = self._connection.execute(
+            "SELECT r.id, r.name, r.description, r.instructions, r.category,"
+            " i.name, i.quantity, i.unit, i.calories_per_unit"
+            " FROM recipes r LEFT JOIN ingredients i ON i.recipe_id = r.id"
+            f" WHERE r.id IN ({id_query}) ORDER BY r.id, i.position",
+            tuple(params))
+        recipes: List[Recipe] = []
+        current_id = None
+        for (recipe_id, name, description, instructions, category,
+             ing_name, quantity, unit, calories_per_unit) in rows:
+            if recipe_id != current_id:
+                current_id = recipe_id
+                recipes.append(Recipe(name, description=description,
+                                      instructions=instructions, category=category))
+            if ing_name is not None:
+                recipes[-1].add_ingredient(Ingredient(ing_name, quantity, unit, calories_per_unit))
+        return recipes
+
+
+class _RequestedNames:
+    """Контекст временной таблицы с названиями рецептов из запроса."""
+
+    def __init__(self, connection: sqlite3.Connection, recipe_names: Iterable[PlanEntry]):
+        """
+        :param connection: соединение с базой
+        :param recipe_names: названия рецептов или пары (название, порции)
+        """
+        self._connection = connection
+        self._recipe_names = recipe_names
+
+    def _rows(self) -> List[Tuple[int, str, float]]:
+        """
+        Проверяет запрос и строит все строки временной таблицы до вставки,
+        чтобы ошибка в середине запроса не оставила в таблице лишних строк.
+        :return: (позиция, ключ названия, порции)
+        """
+        rows = []
+        for pos, entry in enumerate(self._recipe_names):
+            if isinstance(entry, str):
+                rows.append((pos, fold(entry), 1.0))
+            else:
+                name, servings = entry
+                if servings < 0:
+                    raise ValueError("Количество порций не может быть отрицательным")
+                rows.append((pos, fold(name), servings))
+        return rows
+
+    def __enter__(self):
+        rows = self._rows()
+        try:
+            self._connection.executemany(
+                "INSERT INTO request_names (pos, name_key, servings) VALUES (?, ?, ?)", rows)
+        except BaseException:
+            self._connection.execute("DELETE FROM request_names")
+            self._connection.commit()
+            raise
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._connection.execute("DELETE FROM request_names")
+        self._connection.commit()
+        return False
@@ -0,0 +1,157 @@
+"""
+Модуль для хранения кулинарной книги в файле формата JSON Lines
+(один рецепт в строке). Содержит функции чтения, сохранения и дозаписи
+"""
+
+import json
+import os
+import tempfile
+from typing import Iterable, Iterator, Optional
+from .recipe import Recipe
+
+
+# Ключ служебной строки-заголовка (например, номер последнего сегмента журнала,
+# уже примененного к файлу). Такие строки не считаются рецептами.
+META_KEY = '@meta'
+
+
+def dumps_record(record: dict) -> str:
+    """
+    Сериализует запись в одну компактную строку JSON.
+    :param record: словарь
+    :return: строка без перевода строки
+    """
+    return json.dumps(record, ensure_ascii=False, separators=(',', ':'))
+
+
+def iter_records(filename: str) -> Iterator[dict]:
+    """
+    Читает записи JSON Lines по одной, не загружая файл в память целиком.
+    Оборванная последняя строка (прерванная дозапись) пропускается.
+    :param filename: путь к файлу
+    :return: итератор словарей
+    """
+    with open(filename, 'r', encoding='utf-8') as file:
+        for line_number, line in enumerate(file, start=1):
+            if not line.strip():
+                continue
+            try:
+                data = json.loads(line)
+            except ValueError:
+                if not line.endswith('\n'):
+                    return
+                raise ValueError(f"{filename}:{line_number}: некорректная запись")
+            yield data
+
+
+def iter_recipe_dicts(filename: str) -> Iterator[dict]:
+    """
+    Читает словари рецептов из файла книги, пропуская служебный заголовок.
+    :param filename: путь к файлу
+    :return: итератор словарей рецептов
+    """
+    for data in iter_records(filename):
+        if META_KEY not in data:
+            yield data
+
+
+def iter_recipes(filename: str) -> Iterator[Recipe]:
+    """
+    Читает рецепты из файла по одному, не загружая файл в память целиком.
+    Оборванная последняя строка (прерванная дозапись) пропускается.
+    :param filename: путь к файлу
+    :return: итератор рецептов
+    """
+    return Recipe.from_dicts(iter_recipe_dicts(filename))
+
+
+def read_meta(filename: str) -> dict:
+    """
+    Читает служебный заголовок файла книги (первую строку с ключом META_KEY).
+    :param filename: путь к файлу
+    :return: словарь заголовка; пустой, если заголовка или файла нет
+    """
+    try:
+        for data in iter_records(filename):
+            return data.get(META_KEY, {})
+    except FileNotFoundError:
+        pass
+    return {}
+
+
+def write_records(filename: str, records: Iterable[dict], meta: Optional[dict] = None):
+    """
+    Атомарно перезаписывает файл: данные пишутся во временный файл рядом,
+    который затем переименовывается поверх старого.
+    :param filename: путь к файлу
+    :param records: словари для сохранения, по одному в строке
+    :param meta: служебный заголовок, записывается первой строкой
+    """
+    directory = os.path.dirname(os.path.abspath(filename))
+    fd, tmp_name = tempfile.mkstemp(prefix='.recipebook-', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as file:
+            if meta is not None:
+                file.write(dumps_record({META_KEY: meta}))
+                file.write('\n')
+            for record in records:
+                file.write(dumps_record(record))
+                file.write('\n')
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_name, filename)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except OSError:
+            pass
+        raise
+
+
+def write_recipes(filename: str, recipes: Iterable[Recipe], meta: Optional[dict] = None):
+    """
+    Атомарно перезаписывает файл рецептами.
+    :param filename: путь к файлу
+    :param recipes: рецепты для сохранения
+    :param meta: служебный заголовок, записывается первой строкой
+    """
+    write_records(filename, (recipe.to_dict() for recipe in recipes), meta)
+
+
+def _drop_torn_tail(file):
+    """
+    Отрезает оборванную последнюю строку, оставшуюся от прерванной дозаписи.
+    :param file: файл, открытый в режиме 'r+b'
+    """
+    end = file.seek(0, os.SEEK_END)
+    if end == 0:
+        return
+    file.seek(end - 1)
+    if file.read(1) == b'\n':
+        return
+    position = end
+    while position > 0:
+        start = max(0, position - 65536)
+        file.seek(start)
+        chunk = file.read(position - start)
+        newline = chunk.rfind(b'\n')
+        if newline != -1:
+            file.truncate(start + newline + 1)
+            return
+        position = start
+    file.truncate(0)
+
+
+def append_recipe(filename: str, recipe: Recipe):
+    """
+    Дописывает один рецепт в конец файла без перезаписи остальных.
+    :param filename: путь к файлу
+    :param recipe: рецепт
+    """
+    mode = 'r+b' if os.path.exists(filename) else 'w+b'
+    with open(filename, mode) as file:
+        _drop_torn_tail(file)
+        file.seek(0, os.SEEK_END)
+        file.write(dumps_record(recipe.to_dict()).encode('utf-8') + b'\n')
+        file.flush()
+        os.fsync(file.fileno())
@@ -0,0 +1,73 @@
+"""
+Модуль для нормализации строк. Содержит функции, общие для индексов кулинарной книги
+"""
+
+import re
+from functools import lru_cache
+from typing import List, Set
+
+
+def fold(value: str) -> str:
+    """
+    Приводит строку к ключу для сравнения без учета регистра.
+    :param value: исходная строка
+    :return: нормализованный ключ
+    """
+    return value.casefold()
+
+
+def trigrams(key: str) -> Set[str]:
+    """
+    Разбивает нормализованную строку на триграммы (с отступами по краям,
+    чтобы начало и конец слова тоже давали совпадения).
+    :param key: нормализованная строка
+    :return: множество триграмм
+    """
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+_WORD = re.compile(r"\w+")
+
+# Окончания для упрощенного стемминга русских слов (длинные проверяются первыми).
+# Личные окончания глаголов (-ет, -ат, ...) не отрезаются: они портят
+# существительные вроде «омлет» и «салат».
+_REFLEXIVE = ('ся', 'сь')
+_ENDINGS = tuple(sorted((
+    'ами', 'ями', 'иями', 'ого', 'его', 'ому', 'ему', 'ыми', 'ими', 'ых', 'их',
+    'ая', 'яя', 'ое', 'ее', 'ые', 'ие', 'ый', 'ий', 'ой', 'ом', 'ем', 'ам', 'ям',
+    'ах', 'ях', 'ов', 'ев', 'ей', 'ую', 'юю', 'ию', 'ия', 'ии', 'ью',
+    'ать', 'ять', 'ить', 'еть', 'ть',
+    'а', 'я', 'о', 'е', 'ы', 'и', 'у', 'ю', 'ь', 'й',
+), key=len, reverse=True))
+_MIN_STEM = 3
+
+
+@lru_cache(maxsize=65536)
+def stem(word: str) -> str:
+    """
+    Отрезает у русского слова типичные окончания (упрощенный стеммер).
+    Слова не на кириллице возвращаются без изменений.
+    :param word: слово в нижнем регистре
+    :return: основа слова
+    """
+    if not ('а' <= word[-1] <= 'я' or word[-1] == 'ё'):
+        return word
+    word = word.replace('ё', 'е')
+    for ending in _REFLEXIVE:
+        if word.endswith(ending) and len(word) - len(ending) >= _MIN_STEM:
+            word = word[:-len(ending)]
+            break
+    for ending in _ENDINGS:
+        if word.endswith(ending) and len(word) - len(ending) >= _MIN_STEM:
+            return word[:-len(ending)]
+    return word
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Разбивает текст на нормализованные основы слов.
+    :param text: текст
+    :return: список основ в порядке появления
+    """
+    return [stem(word) for word in _WORD.findall(fold(text))]
@@ -0,0 +1,59 @@
+"""
+Модуль для единиц измерения. Содержит таблицу пересчета в базовые единицы
+и функцию normalize_unit
+"""
+
+from typing import Dict, Tuple
+from .text import fold
+
+
+# Размерность -> базовая единица, в которой выдается список покупок.
+BASE_UNITS: Dict[str, str] = {
+    'масса': 'г',
+    'объем': 'мл',
+    'штуки': 'шт',
+}
+
+# Единица (в нормализованном виде) -> (размерность, множитель к базовой единице).
+_FACTORS: Dict[str, Tuple[str, float]] = {
+    'г': ('масса', 1.0),
+    'гр': ('масса', 1.0),
+    'g': ('масса', 1.0),
+    'кг': ('масса', 1000.0),
+    'kg': ('масса', 1000.0),
+    'мг': ('масса', 0.001),
+    'mg': ('масса', 0.001),
+    'мл': ('объем', 1.0),
+    'ml': ('объем', 1.0),
+    'л': ('объем', 1000.0),
+    'l': ('объем', 1000.0),
+    'ст.л.': ('объем', 15.0),
+    'ст. л.': ('объем', 15.0),
+    'ч.л.': ('объем', 5.0),
+    'ч. л.': ('объем', 5.0),
+    'стакан': ('объем', 250.0),
+    'шт': ('штуки', 1.0),
+    'шт.': ('штуки', 1.0),
+    'pcs': ('штуки', 1.0),
+    'десяток': ('штуки', 10.0),
+}
+
+# Готовая таблица: единица -> (размерность, базовая единица, множитель).
+_TABLE: Dict[str, Tuple[str, str, float]] = {
+    unit: (dimension, BASE_UNITS[dimension], factor)
+    for unit, (dimension, factor) in _FACTORS.items()
+}
+
+
+def normalize_unit(unit: str) -> Tuple[str, str, float]:
+    """
+    Находит размерность единицы и множитель к базовой единице.
+    Неизвестная единица образует собственную размерность без пересчета.
+    :param unit: единица измерения
+    :return: (размерность, базовая единица, множитель)
+    """
+    key = fold(unit.strip())
+    found = _TABLE.get(key)
+    if found is None:
+        return key, unit, 1.0
+    return found
@@ -0,0 +1,548 @@
+"""
+Модуль для конкурентного чтения кулинарной книги. Содержит классы
+VersionedCookbook, CookbookVersion и WriteBatch
+
+Читатели получают неизменяемую версию книги (CookbookVersion) и работают
+с ней без блокировок: версия не меняется, сколько бы записей ни прошло
+после ее получения. Писатели копят изменения в пакете (WriteBatch) и
+публикуют новую версию одной заменой ссылки.
+
+Версии разделяют неизмененную структуру: словари версии (рецепты,
+названия, ингредиенты, а также сами списки рецептов ингредиента и
+категории) разбиты на части по хешу ключа, и новая версия копирует только
+части, затронутые пакетом. Части растут примерно как корень из размера
+словаря, поэтому запись одного рецепта стоит O(sqrt(N)), а не O(N);
+изменения все равно выгодно собирать в пакеты.
+"""
+
+import threading
+from itertools import chain
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
+from .recipe import Recipe
+from .shopping import PlanEntry, ShoppingListAggregator
+from .text import fold
+
+
+# Пометка удаляемого ключа в изменениях _PersistentMap.updated.
+_REMOVED = object()
+
+# Общая пустая часть; части никогда не изменяются после публикации.
+_EMPTY: dict = {}
+
+# Сколько позиций рецептов в одном куске порядка книги.
+_ORDER_CHUNK = 1024
+
+
+def _shard_count(size: int) -> int:
+    """
+    Выбирает число частей словаря: степень двойки около sqrt(size) / 4.
+    :param size: число ключей
+    :return: число частей
+    """
+    return 1 << max(0, (size.bit_length() - 4) // 2)
+
+
+class _PersistentMap:
+    """Неизменяемый словарь, разбитый на части по хешу ключа.
+
+    updated() возвращает новый словарь, который разделяет с исходным все
+    части, кроме затронутых изменениями.
+    """
+
+    __slots__ = ('_shards', '_mask', '_size')
+
+    def __init__(self, shards: Tuple[dict, ...] = (_EMPTY,), size: int = 0):
+        """
+        :param shards: части (их число - степень двойки)
+        :param size: общее число ключей
+        """
+        self._shards = shards
+        self._mask = len(shards) - 1
+        self._size = size
+
+    @classmethod
+    def from_items(cls, items: Iterable[tuple], size: int) -> '_PersistentMap':
+        """
+        Раскладывает пары по частям.
+        :param items: пары (ключ, значение) без повторов ключей
+        :param size: число пар
+        :return: новый словарь
+        """
+        count = _shard_count(size)
+        shards: List[dict] = [{} for _ in range(count)]
+        mask = count - 1
+        for key, value in items:
+            shards[hash(key) & mask][key] = value
+        return cls(tuple(shards), size)
+
+    def get(self, key, default=None):
+        return self._shards[hash(key) & self._mask].get(key, default)
+
+    def __getitem__(self, key):
+        return self._shards[hash(key) & self._mask][key]
+
+    def __contains__(self, key) -> bool:
+        return key in self._shards[hash(key) & self._mask]
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __bool__(self) -> bool:
+        return self._size > 0
+
+    def __iter__(self) -> Iterator:
+        return chain.from_iterable(self._shards)
+
+    def items(self) -> Iterator[tuple]:
+        return chain.from_iterable(shard.items() for shard in self._shards)
+
+    def updated(self, changes: dict) -> '_PersistentMap':
+        """
+        Строит новый словарь с изменениями, копируя только затронутые части.
+        :param changes: ключ -> новое значение или _REMOVED
+        :return: новый словарь
+        """
+        if not changes:
+            return self
+        shards = list(self._shards)
+        mask = self._mask
+        size = self._size
+        copied: Set[int] = set()
+        for key, value in changes.items():
+            number = hash(key) & mask
+            if number not in copied:
+                copied.add(number)
+                shards[number] = dict(shards[number])
+            shard = shards[number]
+            if value is _REMOVED:
+                if key in shard:
+                    del shard[key]
+                    size -= 1
+            else:
+                if key not in shard:
+                    size += 1
+                shard[key] = value
+        if _shard_count(size) > len(shards):
+            return _PersistentMap.from_items(chain.from_iterable(shard.items() for shard in shards), size)
+        return _PersistentMap(tuple(shards), size)
+
+
+_EMPTY_MAP = _PersistentMap()
+
+
+class CookbookVersion:
+    """Неизменяемая версия кулинарной книги для чтения из многих потоков.
+
+    Рецепты версии - собственные копии книги, общие для всех читателей;
+    их нельзя изменять.
+    """
+
+    __slots__ = ('_version', '_recipes', '_order', '_by_name', '_ingredients', '_categories', '_spellings')
+
+    def __init__(self, version: int, recipes: _PersistentMap, order: Tuple[Dict[int, Recipe], ...],
+                 by_name: _PersistentMap, ingredients: _PersistentMap, categories: Dict[str, _PersistentMap],
+                 spellings: Dict[str, Dict[str, int]]):
+        """
+        Создает версию из готовых словарей (их больше никто не изменяет).
+        :param version: номер версии
+        :param recipes: рецепт -> позиция в книге
+        :param order: куски по _ORDER_CHUNK позиций: позиция -> рецепт
+        :param by_name: нормализованное название -> рецепт
+        :param ingredients: нормализованный ингредиент -> рецепты (рецепт -> None)
+        :param categories: нормализованная категория -> рецепты и написание их категории
+        :param spellings: нормализованная категория -> написание -> число рецептов
+        """
+        self._version = version
+        self._recipes = recipes
+        self._order = order
+        self._by_name = by_name
+        self._ingredients = ingredients
+        self._categories = categories
+        self._spellings = spellings
+
+    @property
+    def version(self) -> int:
+        """Возвращает номер версии (растет с каждой публикацией).
+
+        :return: номер версии
+        """
+        return self._version
+
+    @property
+    def recipes(self) -> List[Recipe]:
+        """Возвращает список рецептов.
+
+        :return: список рецептов
+        """
+        return [recipe for chunk in self._order for recipe in chunk.values()]
+
+    @property
+    def count(self) -> int:
+        """Возвращает количество рецептов.
+
+        :return: количество рецептов
+        """
+        return len(self._recipes)
+
+    def get_recipe(self, recipe_name: str) -> Optional[Recipe]:
+        """Находит рецепт по названию.
+
+        :return: рецепт или None
+        """
+        return self._by_name.get(fold(recipe_name))
+
+    def _in_book_order(self, recipes: Iterable[Recipe]) -> List[Recipe]:
+        """Упорядочивает рецепты в порядке их добавления в книгу.
+
+        :param recipes: рецепты этой версии
+        :return: отсортированный список
+        """
+        return sorted(recipes, key=self._recipes.__getitem__)
+
+    def find_recipes_by_ingredient(self, ingredient_name: str) -> List[Recipe]:
+        """Находит рецепты, содержащие указанный ингредиент.
+
+        :return: рецепты с ингредиентом
+        """
+        return self._in_book_order(self._ingredients.get(fold(ingredient_name), ()))
+
+    def find_recipes_by_all_ingredients(self, ingredient_names: List[str]) -> List[Recipe]:
+        """Находит рецепты, содержащие все указанные ингредиенты.
+
+        :param ingredient_names: названия ингредиентов
+        :return: рецепты со всеми ингредиентами
+        """
+        postings = sorted((self._ingredients.get(key, _EMPTY_MAP) for key in set(map(fold, ingredient_names))),
+                          key=len)
+        if not postings:
+            return []
+        rest = postings[1:]
+        return self._in_book_order(recipe for recipe in postings[0]
+                                   if all(recipe in posting for posting in rest))
+
+    def find_recipes_by_any_ingredient(self, ingredient_names: List[str]) -> List[Recipe]:
+        """Находит рецепты, содержащие хотя бы один из указанных ингредиентов.
+
+        :param ingredient_names: названия ингредиентов
+        :return: рецепты хотя бы с одним ингредиентом
+        """
+        found: Set[Recipe] = set()
+        for key in set(map(fold, ingredient_names)):
+            found.update(self._ingredients.get(key, ()))
+        return self._in_book_order(found)
+
+    def find_recipes_by_category(self, category: str) -> List[Recipe]:
+        """Находит рецепты по категории.
+
+        :return: рецепты категории
+        """
+        return self._in_book_order(self._categories.get(fold(category), ()))
+
+    def count_recipes_in_category(self, category: str) -> int:
+        """Возвращает число рецептов в категории.
+
+        :param category: категория, без учета регистра
+        :return: число рецептов
+        """
+        return len(self._categories.get(fold(category), ()))
+
+    def get_all_categories(self) -> List[str]:
+        """Возвращает список всех категорий рецептов.
+
+        :return: список всех написаний категорий
+        """
+        return [category for spellings in self._spellings.values() for category in spellings]
+
+    def generate_shopping_list(self, recipe_names: List[str]) -> Dict[str, float]:
+        """Генерирует список покупок для указанных рецептов.
+
+        :return: название ингредиента -> количество
+        """
+        shopping_list: Dict[str, float] = {}
+        for recipe_name in recipe_names:
+            recipe = self.get_recipe(recipe_name)
+            if recipe:
+                for name, quantity, _, _ in recipe._ingredient_rows():
+                    shopping_list[name] = shopping_list.get(name, 0) + quantity
+        return shopping_list
+
+    def build_shopping_list(self, plan: Iterable[PlanEntry]) -> Dict[Tuple[str, str], float]:
+        """Генерирует список покупок с учетом единиц измерения и порций.
+
+        :param plan: названия рецептов или пары (название, порции)
+        :return: (ингредиент, единица) -> количество
+        """
+        return ShoppingListAggregator(self).consume(plan).result()
+
+    def calculate_total_calories(self, recipe_names: List[str]) -> float:
+        """Вычисляет общую калорийность для указанных рецептов.
+
+        :return: общая калорийность
+        """
+        total = 0.0
+        for recipe_name in recipe_names:
+            recipe = self.get_recipe(recipe_name)
+            if recipe:
+                total += recipe.calculate_calories()
+        return total
+
+
+class WriteBatch:
+    """Пакет изменений, публикуемый одной новой версией книги."""
+
+    def __init__(self, cookbook: 'VersionedCookbook'):
+        """
+        Создает пустой пакет.
+        :param cookbook: книга, в которую будет опубликован пакет
+        """
+        self._cookbook = cookbook
+        self._operations: List[Tuple[str, Union[Recipe, str]]] = []
+
+    def add_recipe(self, recipe: Recipe):
+        """
+        Добавляет рецепт (рецепт с уже существующим названием пропускается).
+        В книгу попадает копия рецепта, сделанная сейчас.
+        :param recipe: рецепт
+        """
+        self._operations.append(('add', _freeze(recipe)))
+
+    def replace_recipe(self, recipe: Recipe):
+        """
+        Заменяет рецепт с тем же названием, сохраняя его место в книге,
+        или добавляет рецепт, если такого нет.
+        :param recipe: новая редакция рецепта
+        """
+        self._operations.append(('replace', _freeze(recipe)))
+
+    def remove_recipe(self, recipe_name: str):
+        """
+        Удаляет рецепт по названию.
+        :param recipe_name: название рецепта
+        """
+        self._operations.append(('remove', recipe_name))
+
+    def __len__(self) -> int:
+        """
+        Возвращает число накопленных изменений.
+        :return: число изменений
+        """
+        return len(self._operations)
+
+    def commit(self) -> CookbookVersion:
+        """
+        Публикует накопленные изменения новой версией книги и очищает пакет.
+        :return: опубликованная версия
+        """
+        operations, self._operations = self._operations, []
+        return self._cookbook._publish(operations)[0]
+
+    def __enter__(self) -> 'WriteBatch':
+        """
+        Начинает блок with.
+        :return: этот же пакет
+        """
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """
+        Публикует пакет при выходе из блока; при исключении пакет отбрасывается.
+        """
+        if exc_type is None:
+            self.commit()
+
+
+def _freeze(recipe: Recipe) -> Recipe:
+    """
+    Делает собственную копию рецепта для версий книги и заранее считает
+    калорийность, чтобы читатели ничего в рецепте не изменяли.
+    :param recipe: рецепт
+    :return: копия рецепта
+    """
+    frozen = Recipe.from_dict(recipe.to_dict())
+    frozen.calculate_calories()
+    return frozen
+
+
+def _ingredient_keys(recipe: Recipe) -> Set[str]:
+    """
+    Возвращает нормализованные названия ингредиентов рецепта.
+    :param recipe: рецепт
+    :return: множество названий
+    """
+    return {fold(name) for name in recipe.get_ingredient_names()}
+
+
+class VersionedCookbook:
+    """Кулинарная книга с неизменяемыми версиями для конкурентного чтения.
+
+    Читатели берут snapshot() и работают с версией без блокировок.
+    Писатели (их может быть несколько, они выполняются по очереди) собирают
+    изменения в batch() и публикуют их атомарно.
+    """
+
+    def __init__(self, recipes: Iterable[Recipe] = ()):
+        """
+        Создает книгу и публикует первую версию.
+        :param recipes: начальные рецепты
+        """
+        self._write_lock = threading.Lock()
+        self._next_position = 0
+        self._current = CookbookVersion(0, _EMPTY_MAP, (), _EMPTY_MAP, _EMPTY_MAP, {}, {})
+        self._publish([('add', _freeze(recipe)) for recipe in recipes])
+
+    @classmethod
+    def from_cookbook(cls, cookbook) -> 'VersionedCookbook':
+        """
+        Создает книгу с версиями из обычной кулинарной книги.
+        :param cookbook: Cookbook
+        :return: новая книга
+        """
+        return cls(cookbook.recipes)
+
+    def snapshot(self) -> CookbookVersion:
+        """
+        Возвращает текущую версию книги; вызывать можно из любого потока.
+        :return: неизменяемая версия
+        """
+        return self._current
+
+    def batch(self) -> WriteBatch:
+        """
+        Создает пакет изменений; в блоке with он публикуется при выходе.
+        :return: пустой пакет
+        """
+        return WriteBatch(self)
+
+    def add_recipe(self, recipe: Recipe) -> bool:
+        """
+        Добавляет рецепт отдельной версией.
+        :param recipe: рецепт
+        :return: добавлен ли рецепт
+        """
+        return self._publish([('add', _freeze(recipe))])[1] == 1
+
+    def remove_recipe(self, recipe_name: str) -> bool:
+        """
+        Удаляет рецепт отдельной версией.
+        :param recipe_name: название рецепта
+        :return: найден ли рецепт
+        """
+        return self._publish([('remove', recipe_name)])[1] == 1
+
+    def _publish(self, operations: List[Tuple[str, Union[Recipe, str]]]) -> Tuple[CookbookVersion, int]:
+        """
+        Строит из текущей версии новую с примененными изменениями и публикует ее.
+        Копируются только части словарей, затронутые изменениями.
+        :param operations: список (операция, рецепт или название)
+        :return: опубликованная версия и число примененных изменений
+        """
+        with self._write_lock:
+            base = self._current
+            if not operations:
+                return base, 0
+            positions: Dict[Recipe, object] = {}
+            names: Dict[str, object] = {}
+            order: Dict[int, object] = {}
+            ingredient_changes: Dict[str, Dict[Recipe, object]] = {}
+            category_changes: Dict[str, Dict[Recipe, object]] = {}
+            spelling_changes: Dict[str, Dict[str, int]] = {}
+
+            def lookup(key: str) -> Optional[Recipe]:
+                recipe = names.get(key, _REMOVED) if key in names else base._by_name.get(key)
+                return None if recipe is _REMOVED else recipe
+
+            def position_of(recipe: Recipe) -> int:
+                position = positions.get(recipe)
+                return base._recipes[recipe] if position is None else position
+
+            def change_category(recipe: Recipe, value):
+                key = fold(recipe.category)
+                category_changes.setdefault(key, {})[recipe] = value
+                counts = spelling_changes.setdefault(key, {})
+                counts[recipe.category] = counts.get(recipe.category, 0) + (-1 if value is _REMOVED else 1)
+
+            def link(recipe: Recipe, position: int):
+                positions[recipe] = position
+                names[fold(recipe.name)] = recipe
+                order[position] = recipe
+                for key in _ingredient_keys(recipe):
+                    ingredient_changes.setdefault(key, {})[recipe] = None
+                change_category(recipe, recipe.category)
+
+            def unlink(recipe: Recipe) -> int:
+                position = position_of(recipe)
+                positions[recipe] = _REMOVED
+                names[fold(recipe.name)] = _REMOVED
+                order[position] = _REMOVED
+                for key in _ingredient_keys(recipe):
+                    ingredient_changes.setdefault(key, {})[recipe] = _REMOVED
+                change_category(recipe, _REMOVED)
+                return position
+
+            applied = 0
+            for action, item in operations:
+                if action == 'remove':
+                    recipe = lookup(fold(item))
+                    if recipe is None:
+                        continue
+                    unlink(recipe)
+                else:
+                    old = lookup(fold(item.name))
+                    if old is None:
+                        position = self._next_position
+                        self._next_position += 1
+                    elif action == 'replace':
+                        position = unlink(old)
+                    else:
+                        continue
+                    link(item, position)
+                applied += 1
+
+            ingredients = base._ingredients.updated({
+                key: base._ingredients.get(key, _EMPTY_MAP).updated(changes) or _REMOVED
+                for key, changes in ingredient_changes.items()})
+            categories = dict(base._categories)
+            spellings = dict(base._spellings)
+            for key, changes in category_changes.items():
+                members = categories.get(key, _EMPTY_MAP).updated(changes)
+                counts = dict(spellings.get(key, {}))
+                for spelling, delta in spelling_changes[key].items():
+                    counts[spelling] = counts.get(spelling, 0) + delta
+                    if not counts[spelling]:
+                        del counts[spelling]
+                if members:
+                    categories[key] = members
+                    spellings[key] = counts
+                else:
+                    categories.pop(key, None)
+                    spellings.pop(key, None)
+            self._current = CookbookVersion(base._version + 1, base._recipes.updated(positions),
+                                            _updated_order(base._order, order), base._by_name.updated(names),
+                                            ingredients, categories, spellings)
+            return self._current, applied
+
+
+def _updated_order(chunks: Tuple[Dict[int, Recipe], ...], changes: Dict[int, object]) -> Tuple[Dict[int, Recipe], ...]:
+    """
+    Строит новый порядок книги, копируя только затронутые куски.
+    :param chunks: куски прежней версии
+    :param changes: позиция -> рецепт или _REMOVED
+    :return: новые куски
+    """
+    if not changes:
+        return chunks
+    result = list(chunks)
+    copied: Set[int] = set()
+    for position in sorted(changes):
+        number = position // _ORDER_CHUNK
+        while number >= len(result):
+            result.append(_EMPTY)
+        if number not in copied:
+            copied.add(number)
+            result[number] = dict(result[number])
+        value = changes[position]
+        if value is _REMOVED:
+            result[number].pop(position, None)
+        else:
+            result[number][position] = value
+    return tuple(result)
@@ -0,0 +1,30 @@
+"""
+Общие данные тестов: небольшая книга с разными единицами, категориями
+и повторяющимися ингредиентами.
+"""
+
+import pytest
+
+from recipebook import Cookbook, Ingredient, Recipe
+
+
+def sample_recipes():
+    return [
+        Recipe("Омлет", [Ingredient("Яйца", 3, "шт", 70), Ingredient("Молоко", 100, "мл", 0.6),
+                         Ingredient("Соль", 2, "г", 0)], "Пышный омлет", "Взбить и запечь", "Завтрак"),
+        Recipe("Блины", [Ingredient("Мука", 0.2, "кг", 3600), Ingredient("Молоко", 0.5, "л", 600),
+                         Ingredient("Яйца", 2, "шт", 70)], "", "Жарить тонко", "Завтрак"),
+        Recipe("Борщ", [Ingredient("Свекла", 300, "г", 0.4), Ingredient("Капуста", 200, "г", 0.3),
+                        Ingredient("Соль", 1, "ч.л.", 0)], "", "", "Суп"),
+        Recipe("Салат", [Ingredient("Огурец", 2, "шт", 15), Ingredient("Томат", 2, "шт", 20),
+                         Ingredient("соль", 1, "г", 0)], "", "", "Салат"),
+        Recipe("Каша", [Ingredient("Гречка", 100, "г", 3.1), Ingredient("Молоко", 1, "стакан", 150)],
+               "", "", "каша"),
+    ]
+
+
+@pytest.fixture
+def cookbook() -> Cookbook:
+    book = Cookbook()
+    book.add_recipes(sample_recipes())
+    return book
@@ -0,0 +1,80 @@
+"""
+Тесты кулинарной книги.
+"""
+
+import sys
+
+import pytest
+
+from recipebook import Cookbook, Ingredient, Recipe
+
+
+def test_failed_bulk_import_leaves_book_unchanged(tmp_path, cookbook):
+    version = cookbook.version
+    names = [recipe.name for recipe in cookbook.recipes]
+
+    def recipes():
+        yield Recipe("Кисель", [Ingredient("Крахмал", 20, "г", 3.0)], "", "", "Напиток")
+        yield {'ingredients': []}
+
+    with pytest.raises(Exception):
+        cookbook.add_recipes(recipes())
+    assert cookbook.version == version
+    assert [recipe.name for recipe in cookbook.recipes] == names
+    assert cookbook.get_recipe("Кисель") is None
+    assert cookbook.add_recipe(Recipe("Кисель", [Ingredient("Крахмал", 20, "г", 3.0)], "", "", "Напиток"))
+    assert [recipe.name for recipe in cookbook.find_recipes_by_ingredient("крахмал")] == ["Кисель"]
+
+
+def test_load_stops_at_corrupt_line(tmp_path, cookbook):
+    filename = str(tmp_path / "book.json")
+    cookbook.save(filename)
+    with open(filename, encoding='utf-8') as file:
+        lines = file.readlines()
+    lines.insert(2, '{"name": "Обрыв", \n')
+    with open(filename, 'w', encoding='utf-8') as file:
+        file.writelines(lines)
+
+    book = Cookbook(filename)
+    with pytest.raises(ValueError):
+        book.load()
+    assert book.count == 0 and book.version == 0
+    assert book.get_all_categories() == []
+
+
+def test_bulk_import_rejects_duplicates(cookbook):
+    report = cookbook.add_recipes([Recipe("омлет", []), {'name': "Кисель", 'ingredients': []},
+                                   Recipe("КИСЕЛЬ", [])])
+    assert report.added == 1 and report.rejected == ["омлет", "КИСЕЛЬ"]
+    assert cookbook.get_recipe("кисель") is not None
+
+
+def test_search_indexes_built_on_first_use_follow_changes(cookbook):
+    cookbook.get_recipe("Борщ").name = "Борщ украинский"
+    cookbook.remove_recipe("Салат")
+    assert cookbook.search_recipes_fuzzy("борщ украински")[0][0].name == "Борщ украинский"
+    assert cookbook.search_recipes_text("тонко")[0][0].name == "Блины"
+    assert "Салат" not in [recipe.name for recipe, _ in cookbook.find_similar_recipes("Омлет")]
+    assert [recipe.name for recipe, _ in cookbook.find_similar_recipes("Омлет", limit=1)] == ["Блины"]
+
+    cookbook.add_recipe(Recipe("Яичница", [Ingredient("Яйца", 3, "шт", 70), Ingredient("Соль", 1, "г", 0)],
+                               "", "Жарить на сковороде", "Завтрак"))
+    cookbook.get_recipe("Блины").instructions = "Печь блины"
+    assert cookbook.search_recipes_fuzzy("яичнца")[0][0].name == "Яичница"
+    assert cookbook.search_recipes_text("сковорода")[0][0].name == "Яичница"
+    assert not cookbook.search_recipes_text("тонко")
+    assert "Яичница" in [recipe.name for recipe, _ in cookbook.find_similar_recipes("Омлет")]
+
+
+def test_removed_recipe_does_not_pin_ingredient_names(cookbook):
+    name = "".join(["Шафран", " ", "иранский"])
+    unit = "".join(["щеп", "отка"])
+    baseline = sys.getrefcount(name), sys.getrefcount(unit)
+    cookbook.add_recipe(Recipe("Плов", [Ingredient(name, 1, unit, 2)], "", "Варить", "Обед"))
+    cookbook.pack()
+    assert [(i.name, i.unit) for i in cookbook.get_recipe("Плов").ingredients] == [(name, unit)]
+    cookbook.get_recipe("Плов").pack()
+    assert sys.getrefcount(name) > baseline[0]
+
+    cookbook.remove_recipe("Плов")
+    assert (sys.getrefcount(name), sys.getrefcount(unit)) == baseline
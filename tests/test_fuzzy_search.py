@@ -0,0 +1,68 @@
+"""
+Тесты поиска по названиям с опечатками.
+"""
+
+import random
+
+from recipebook import Cookbook, Recipe
+from recipebook.index import NameTrigramIndex
+from recipebook.text import fold, trigrams
+
+WORDS = ["суп", "салат", "пирог", "рагу", "омлет", "каша", "борщ", "блины", "соус", "кекс",
+         "грибной", "куриный", "летний", "острый", "сырный", "домашний"]
+
+
+def _names(count: int, seed: int = 3):
+    rng = random.Random(seed)
+    names = set()
+    while len(names) < count:
+        names.add(" ".join(rng.sample(WORDS, rng.randint(1, 3))) + f" {rng.randint(0, 999)}")
+    return sorted(names)
+
+
+def _brute_force(names, query, limit, min_similarity):
+    query_grams = trigrams(fold(query))
+    scored = []
+    for name in names:
+        grams = trigrams(fold(name))
+        shared = len(query_grams & grams)
+        similarity = shared / (len(query_grams) + len(grams) - shared)
+        if similarity >= min_similarity:
+            scored.append((-similarity, fold(name)))
+    return [(key, -similarity) for similarity, key in sorted(scored)[:limit]]
+
+
+def _index(names):
+    index = NameTrigramIndex()
+    for name in names:
+        index.add(Recipe(name, []))
+    return index
+
+
+def test_matches_brute_force():
+    names = _names(3000)
+    index = _index(names)
+    for query in ["суп грибной", "омлтет 12", "пирог острый 7", "кекс", names[100]]:
+        for min_similarity in (0.2, 0.5):
+            found = [(fold(recipe.name), similarity)
+                     for recipe, similarity in index.search(query, 5, min_similarity, max_candidates=None)]
+            assert found == _brute_force(names, query, 5, min_similarity)
+
+
+def test_candidate_limit_is_deterministic_and_keeps_exact_match():
+    names = _names(3000)
+    target = names[1234]
+    forward = _index(names)
+    backward = _index(reversed(names))
+    results = [index.search(target, 5, 0.1, max_candidates=50) for index in (forward, backward)]
+    assert [recipe.name for recipe, _ in results[0]] == [recipe.name for recipe, _ in results[1]]
+    assert results[0][0] == (forward.search(target, 1)[0][0], 1.0)
+    assert results[0][0][0].name == target
+
+
+def test_cookbook_fuzzy_search_follows_renames():
+    book = Cookbook()
+    book.add_recipe(Recipe("Борщ украинский", []))
+    book.get_recipe("Борщ украинский").name = "Борщ московский"
+    assert book.search_recipes_fuzzy("борщ московски")[0][0].name == "Борщ московский"
+    assert not book.search_recipes_fuzzy("украинский", min_similarity=0.6)
@@ -0,0 +1,60 @@
+"""
+Тесты журнала изменений кулинарной книги.
+"""
+
+import os
+
+from recipebook import Cookbook, Ingredient, Recipe, journal
+
+
+def _names(book: Cookbook, recipe_name: str):
+    return [ingredient.name for ingredient in book.get_recipe(recipe_name).ingredients]
+
+
+def _open(filename: str) -> Cookbook:
+    book = Cookbook(filename)
+    book.open_journal(commit_interval=0)
+    return book
+
+
+def test_save_after_close_does_not_replay_journal(tmp_path):
+    filename = str(tmp_path / "book.json")
+    book = _open(filename)
+    book.add_recipe(Recipe("Омлет", [Ingredient("Яйца", 2, "шт", 70)], "", "", "Завтрак"))
+    book.get_recipe("Омлет").add_ingredient(Ingredient("Молоко", 50, "мл", 0.6))
+    book.close_journal()
+    book.save()
+
+    reopened = _open(filename)
+    assert _names(reopened, "Омлет") == ["Яйца", "Молоко"]
+    reopened.close_journal()
+
+
+def test_close_folds_segments_into_book(tmp_path):
+    filename = str(tmp_path / "book.json")
+    book = _open(filename)
+    book.add_recipe(Recipe("Чай", [Ingredient("Вода", 200, "мл", 0)], "", "", "Напиток"))
+    book.remove_recipe("Чай")
+    book.add_recipe(Recipe("Кофе", [Ingredient("Вода", 100, "мл", 0)], "", "", "Напиток"))
+    book.close_journal()
+
+    assert not [name for name in os.listdir(tmp_path) if ".journal." in name]
+    loaded = Cookbook(filename)
+    loaded.load()
+    assert [recipe.name for recipe in loaded.recipes] == ["Кофе"]
+
+
+def test_replay_after_checkpoint(tmp_path):
+    filename = str(tmp_path / "book.json")
+    book = _open(filename)
+    book.add_recipe(Recipe("Суп", [Ingredient("Вода", 1, "л", 0)], "", "", "Суп"))
+    book.save()
+    recipe = book.get_recipe("Суп")
+    recipe.add_ingredient(Ingredient("Соль", 5, "г", 0))
+    recipe.category = "Первое"
+    book.flush_journal()
+
+    restored = list(journal.replay(filename, filename + ".journal"))
+    assert [item['name'] for item in restored[0]['ingredients']] == ["Вода", "Соль"]
+    assert restored[0]['category'] == "Первое"
+    book.close_journal()
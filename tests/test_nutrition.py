@@ -0,0 +1,40 @@
+"""
+Тесты движка калорийности: совпадение NumPy и запасного пути с Cookbook.
+"""
+
+import pytest
+
+from recipebook import Cookbook, NutritionEngine, Recipe
+from recipebook import nutrition
+
+PLANS = [["Омлет", "Блины"], ["каша"], [], ["Нет такого", "Неизвестный"], ["Борщ", "борщ", "Нет"]]
+
+ENGINES = [False] + ([True] if nutrition.numpy is not None else [])
+
+
+@pytest.mark.parametrize('use_numpy', ENGINES)
+def test_matches_cookbook(cookbook, use_numpy):
+    cookbook.add_recipe(Recipe("Вода", []))
+    engine = NutritionEngine(cookbook, use_numpy=use_numpy)
+    calories = engine.recipe_calories()
+    assert calories == {recipe.name: recipe.calculate_calories() for recipe in cookbook.recipes}
+    assert all(type(value) is float for value in calories.values())
+    totals = engine.plan_calories(PLANS)
+    assert totals == [cookbook.calculate_total_calories(plan) for plan in PLANS]
+    assert all(type(value) is float for value in totals)
+
+
+@pytest.mark.parametrize('use_numpy', ENGINES)
+def test_plans_without_known_recipes(cookbook, use_numpy):
+    engine = NutritionEngine(cookbook, use_numpy=use_numpy)
+    for plans in ([[], []], [["Нет"], ["Тоже нет"]], []):
+        result = engine.plan_calories(plans)
+        assert result == [0.0] * len(plans)
+        assert all(type(value) is float for value in result)
+
+
+@pytest.mark.parametrize('use_numpy', ENGINES)
+def test_empty_book(use_numpy):
+    engine = NutritionEngine(Cookbook(), use_numpy=use_numpy)
+    assert engine.recipe_calories() == {}
+    assert engine.plan_calories([["Омлет"], []]) == [0.0, 0.0]
@@ -0,0 +1,91 @@
+"""
+Тесты подбора рациона.
+"""
+
+import random
+import time
+
+from recipebook import Cookbook, Ingredient, Recipe
+
+
+def _recipe(name: str, calories: float, ingredients=None, category: str = "Основное") -> Recipe:
+    names = ingredients or [name]
+    per_item = calories / len(names)
+    return Recipe(name, [Ingredient(item, 1, "шт", per_item) for item in names], "", "", category)
+
+
+def test_finds_plan_outside_heuristic_beam():
+    book = Cookbook()
+    for i in range(600):
+        book.add_recipe(_recipe(f"light {i}", 1))
+    book.add_recipe(_recipe("heavy 0", 500, ["a", "b", "c"]))
+    book.add_recipe(_recipe("heavy 1", 500, ["d", "e", "f"]))
+
+    plan = book.plan_meals(900, 1100, count=2)
+    assert plan is not None
+    assert sorted(recipe.name for recipe in plan.recipes) == ["heavy 0", "heavy 1"]
+    assert plan.calories == book.calculate_total_calories(["heavy 0", "heavy 1"])
+
+
+def test_exhaustive_search_beyond_small_beam():
+    book = Cookbook()
+    for i in range(30):
+        book.add_recipe(_recipe(f"r{i}", 100 + i, [f"x{i}", f"y{i}", "общий"]))
+    book.add_recipe(_recipe("цель", 200, ["общий"]))
+    book.add_recipe(_recipe("пара", 229, ["общий"]))
+
+    plan = book.plan_meals(429, 429, count=2, beam=1)
+    assert plan is not None and plan.optimal
+    assert sorted(recipe.name for recipe in plan.recipes) == ["пара", "цель"]
+    assert plan.shopping_items == 1
+
+
+def test_one_recipe_per_category():
+    book = Cookbook()
+    book.add_recipe(_recipe("суп", 300, ["вода", "лук"], "Суп"))
+    book.add_recipe(_recipe("борщ", 400, ["вода", "свекла"], "Суп"))
+    book.add_recipe(_recipe("каша", 350, ["вода", "гречка"], "Каша"))
+
+    plan = book.plan_meals(640, 660, categories=["Суп", "Каша"])
+    assert [recipe.name for recipe in plan.recipes] == ["суп", "каша"]
+    assert book.plan_meals(10000, 20000, categories=["Суп", "Каша"]) is None
+
+
+def test_pantry_objective():
+    book = Cookbook()
+    book.add_recipe(_recipe("a", 100, ["мука", "яйцо"]))
+    book.add_recipe(_recipe("b", 100, ["рис", "рыба"]))
+    book.add_recipe(_recipe("c", 100, ["рис", "соль"]))
+
+    plan = book.plan_meals(200, 200, count=2, pantry=["рис", "рыба", "соль"], objective='pantry')
+    assert sorted(recipe.name for recipe in plan.recipes) == ["b", "c"]
+    assert plan.pantry_used == 3
+
+
+def test_large_catalog_within_budget():
+    rng = random.Random(7)
+    products = [f"продукт {i}" for i in range(2000)]
+    book = Cookbook()
+    book.add_recipes(_recipe(f"рецепт {i}", rng.uniform(50, 900), rng.sample(products, rng.randint(3, 10)))
+                     for i in range(50000))
+
+    for budget, low, high in ((0.05, 1800, 2200), (0.3, 100000, 200000), (0.5, 1800, 2200)):
+        start = time.perf_counter()
+        plan = book.plan_meals(low, high, count=3, time_budget=budget)
+        assert time.perf_counter() - start < budget + 0.05
+    assert plan is not None and 1800 <= plan.calories <= 2200
+
+    start = time.perf_counter()
+    plan = book.plan_meals(1800, 2200, count=3, time_budget=0.05)
+    assert time.perf_counter() - start < 0.1
+    assert plan is not None and 1800 <= plan.calories <= 2200
+
+
+def test_prepared_candidates_follow_changes():
+    book = Cookbook()
+    book.add_recipe(_recipe("a", 100))
+    book.add_recipe(_recipe("b", 150))
+    assert book.plan_meals(300, 300, count=2) is None
+    book.get_recipe("b").ingredients[0].calories_per_unit = 200
+    plan = book.plan_meals(300, 300, count=2)
+    assert sorted(recipe.name for recipe in plan.recipes) == ["a", "b"]
@@ -0,0 +1,122 @@
+"""
+Тесты сервера запросов и клиента.
+"""
+
+import asyncio
+import json
+
+import pytest
+
+from recipebook import Cookbook, CookbookClient, CookbookServer, Ingredient, Recipe
+from recipebook.server import MAX_LINE
+
+
+def _book() -> Cookbook:
+    book = Cookbook()
+    book.add_recipe(Recipe("Омлет", [Ingredient("Яйца", 2, "шт", 70), Ingredient("Молоко", 50, "мл", 0.6)],
+                           "", "", "Завтрак"))
+    book.add_recipe(Recipe("Блины", [Ingredient("Мука", 200, "г", 3.6), Ingredient("Молоко", 300, "мл", 0.6)],
+                           "", "", "Завтрак"))
+    return book
+
+
+async def _exchange(server: CookbookServer, lines):
+    host, port = server.address[:2]
+    reader, writer = await asyncio.open_connection(host, port)
+    for line in lines:
+        writer.write(line.encode('utf-8') + b'\n')
+    await writer.drain()
+    responses = [json.loads(await asyncio.wait_for(reader.readline(), 5)) for _ in lines]
+    writer.close()
+    await writer.wait_closed()
+    return responses
+
+
+def _run(book, scenario):
+    async def main():
+        server = CookbookServer(book)
+        await server.start()
+        try:
+            return await scenario(server)
+        finally:
+            await server.close()
+    return asyncio.run(main())
+
+
+def test_malformed_requests_get_error_replies():
+    lines = [
+        '{"id":1,"method":["get_recipe"]}',
+        '{"id":[1],"method":"get_recipe","params":["Омлет"]}',
+        '{"id":3,"method":"get_recipe","params":5}',
+        '{"id":4,"method":"get_recipe","params":{"unknown":1}}',
+        '{"id":5,"method":"нет_такого"}',
+        'не json',
+        '[1, 2]',
+        '{"id":7,"method":"get_recipe","params":["' + 'х' * MAX_LINE + '"]}',
+        '{"id":8,"method":"get_recipe","params":["Омлет"]}',
+    ]
+    responses = _run(_book(), lambda server: _exchange(server, lines))
+    by_id = {response['id']: response for response in responses}
+    assert [response['id'] for response in responses].count(None) == 4
+    assert all('error' in by_id[request_id] for request_id in (1, 3, 4, 5))
+    assert by_id[8]['result']['name'] == "Омлет"
+
+
+def test_unserializable_result_gets_error_reply():
+    book = _book()
+    book.generate_shopping_list = lambda names: {"Молоко": {1, 2}}
+    responses = _run(book, lambda server: _exchange(
+        server, ['{"id":1,"method":"generate_shopping_list","params":[["Омлет"]]}',
+                 '{"id":2,"method":"calculate_total_calories","params":[["Омлет"]]}']))
+    by_id = {response['id']: response for response in responses}
+    assert 'error' in by_id[1]
+    assert by_id[2]['result'] == 170.0
+
+
+def test_client_matches_cookbook():
+    book = _book()
+
+    async def scenario(server):
+        host, port = server.address[:2]
+        async with CookbookClient(host=host, port=port, pool_size=2) as client:
+            recipes = await asyncio.gather(*(client.get_recipe("Омлет") for _ in range(20)))
+            return (recipes, await client.find_recipes_by_ingredient("молоко"),
+                    await client.find_recipes_by_category("Завтрак"),
+                    await client.generate_shopping_list(["Омлет", "Блины"]),
+                    await client.calculate_total_calories(["Омлет", "Блины"]),
+                    await client.get_recipe("Нет"))
+
+    recipes, by_ingredient, by_category, shopping, calories, missing = _run(book, scenario)
+    assert all(recipe.to_dict() == book.get_recipe("Омлет").to_dict() for recipe in recipes)
+    assert by_ingredient == [recipe.name for recipe in book.find_recipes_by_ingredient("молоко")]
+    assert by_category == [recipe.name for recipe in book.find_recipes_by_category("Завтрак")]
+    assert shopping == book.generate_shopping_list(["Омлет", "Блины"])
+    assert calories == book.calculate_total_calories(["Омлет", "Блины"])
+    assert missing is None
+
+
+def test_socket_path_must_not_be_a_regular_file(tmp_path):
+    path = str(tmp_path / "book.json")
+    with open(path, 'w', encoding='utf-8') as file:
+        file.write("данные")
+
+    async def main():
+        server = CookbookServer(_book())
+        with pytest.raises(ValueError):
+            await server.start(path)
+
+    asyncio.run(main())
+    with open(path, encoding='utf-8') as file:
+        assert file.read() == "данные"
+
+
+def test_stale_socket_is_replaced(tmp_path):
+    path = str(tmp_path / "book.sock")
+
+    async def main():
+        for _ in range(2):
+            server = CookbookServer(_book())
+            await server.start(path)
+            await server.close()
+
+    asyncio.run(main())
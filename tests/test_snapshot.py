@@ -0,0 +1,55 @@
+"""
+Тесты бинарных снимков: совпадение с Cookbook и атомарная перезапись.
+"""
+
+import os
+
+from recipebook import Ingredient, Recipe, SnapshotCookbook
+
+PLAN = ["Омлет", "блины", "Нет такого", "Каша"]
+
+
+def _names(recipes):
+    return [recipe.name for recipe in recipes]
+
+
+def test_snapshot_matches_cookbook(tmp_path, cookbook):
+    filename = str(tmp_path / "book.snap")
+    cookbook.save_snapshot(filename)
+    snapshot = SnapshotCookbook(filename)
+    try:
+        assert snapshot.count == cookbook.count
+        assert [recipe.to_dict() for recipe in snapshot.recipes] == [recipe.to_dict() for recipe in cookbook.recipes]
+        assert snapshot.get_recipe("ОМЛЕТ").to_dict() == cookbook.get_recipe("омлет").to_dict()
+        assert snapshot.get_recipe("Нет такого") is None
+        for ingredient in ("молоко", "Соль", "Нет"):
+            assert _names(snapshot.find_recipes_by_ingredient(ingredient)) == \
+                _names(cookbook.find_recipes_by_ingredient(ingredient))
+        for category in ("завтрак", "Каша", "Нет"):
+            assert _names(snapshot.find_recipes_by_category(category)) == \
+                _names(cookbook.find_recipes_by_category(category))
+        assert snapshot.generate_shopping_list(PLAN) == cookbook.generate_shopping_list(PLAN)
+        assert snapshot.build_shopping_list(PLAN) == cookbook.build_shopping_list(PLAN)
+        assert snapshot.calculate_total_calories(PLAN) == cookbook.calculate_total_calories(PLAN)
+        assert sorted(snapshot.get_all_categories()) == sorted(cookbook.get_all_categories())
+    finally:
+        snapshot.close()
+
+
+def test_rewrite_keeps_open_snapshot_readable(tmp_path, cookbook):
+    filename = str(tmp_path / "book.snap")
+    cookbook.save_snapshot(filename)
+    snapshot = SnapshotCookbook(filename)
+    try:
+        small = type(cookbook)()
+        small.add_recipe(Recipe("Чай", [Ingredient("Вода", 200, "мл", 0)], "", "", "Напиток"))
+        small.save_snapshot(filename)
+
+        assert snapshot.count == cookbook.count
+        assert snapshot.get_recipe("Борщ").to_dict() == cookbook.get_recipe("Борщ").to_dict()
+        reopened = SnapshotCookbook(filename)
+        assert _names(reopened.recipes) == ["Чай"]
+        reopened.close()
+    finally:
+        snapshot.close()
+    assert os.listdir(tmp_path) == ["book.snap"]
@@ -0,0 +1,84 @@
+"""
+Тесты SQLite-хранилища: совпадение с Cookbook.
+"""
+
+from recipebook import Ingredient, Recipe, SQLiteCookbook
+
+from conftest import sample_recipes
+
+PLAN = ["Омлет", "блины", "Нет такого", "Каша", ("Борщ", 2)]
+
+
+def _names(recipes):
+    return [recipe.name for recipe in recipes]
+
+
+def _assert_same(database: SQLiteCookbook, book):
+    assert database.count == book.count
+    assert [recipe.to_dict() for recipe in database.recipes] == [recipe.to_dict() for recipe in book.recipes]
+    for recipe in book.recipes:
+        assert database.get_recipe(recipe.name.upper()).to_dict() == recipe.to_dict()
+        for ingredient in recipe.get_ingredient_names():
+            assert _names(database.find_recipes_by_ingredient(ingredient)) == \
+                _names(book.find_recipes_by_ingredient(ingredient))
+        assert _names(database.find_recipes_by_category(recipe.category)) == \
+            _names(book.find_recipes_by_category(recipe.category))
+    for names in (["молоко", "яйца"], ["соль"], ["соль", "нет"], []):
+        assert _names(database.find_recipes_by_all_ingredients(names)) == \
+            _names(book.find_recipes_by_all_ingredients(names))
+        assert _names(database.find_recipes_by_any_ingredient(names)) == \
+            _names(book.find_recipes_by_any_ingredient(names))
+    names = [entry for entry in PLAN if isinstance(entry, str)]
+    assert database.generate_shopping_list(names) == book.generate_shopping_list(names)
+    assert database.build_shopping_list(PLAN) == book.build_shopping_list(PLAN)
+    assert database.calculate_total_calories(names) == book.calculate_total_calories(names)
+    assert sorted(database.get_all_categories()) == sorted(book.get_all_categories())
+
+
+def test_matches_cookbook(cookbook):
+    database = SQLiteCookbook()
+    try:
+        for recipe in sample_recipes():
+            assert database.add_recipe(recipe)
+        assert not database.add_recipe(Recipe("омлет", []))
+        _assert_same(database, cookbook)
+
+        assert database.remove_recipe("САЛАТ") == cookbook.remove_recipe("Салат")
+        assert database.remove_recipe("Салат") == cookbook.remove_recipe("Салат")
+        kissel = Recipe("Кисель", [Ingredient("Крахмал", 20, "г", 3.0)], "", "", "Напиток")
+        assert database.add_recipe(kissel) == cookbook.add_recipe(kissel)
+        _assert_same(database, cookbook)
+    finally:
+        database.close()
+
+
+def test_reopen_file(tmp_path, cookbook):
+    filename = str(tmp_path / "book.db")
+    database = SQLiteCookbook(filename)
+    for recipe in sample_recipes():
+        database.add_recipe(recipe)
+    database.close()
+
+    reopened = SQLiteCookbook(filename)
+    try:
+        _assert_same(reopened, cookbook)
+    finally:
+        reopened.close()
+
+
+def test_failed_query_leaves_no_requested_names():
+    database = SQLiteCookbook()
+    try:
+        for recipe in sample_recipes():
+            database.add_recipe(recipe)
+        database.add_recipe(Recipe("Чай", [Ingredient("Вода", 200, "мл", 0)], "", "", "Напиток"))
+        try:
+            database.build_shopping_list(["Омлет", ("Чай", -1)])
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("ожидалась ошибка для отрицательных порций")
+        assert database.generate_shopping_list(["Чай"]) == {"Вода": 200}
+        assert database.calculate_total_calories(["Чай"]) == 0
+    finally:
+        database.close()
@@ -0,0 +1,136 @@
+"""
+Тесты книги с версиями: совпадение с Cookbook и согласованность версий
+при конкурентной записи.
+"""
+
+import random
+import threading
+
+from recipebook import Cookbook, Ingredient, Recipe, VersionedCookbook
+
+from conftest import sample_recipes
+
+PLAN = ["Омлет", "блины", "Нет такого", "Каша"]
+VOCABULARY = [f"Продукт {i}" for i in range(40)]
+CATEGORIES = ["Суп", "суп", "Салат", "Завтрак"]
+
+
+def _names(recipes):
+    return [recipe.name for recipe in recipes]
+
+
+def _assert_same(version, book: Cookbook):
+    assert version.count == book.count
+    assert [recipe.to_dict() for recipe in version.recipes] == [recipe.to_dict() for recipe in book.recipes]
+    for recipe in book.recipes:
+        assert version.get_recipe(recipe.name.upper()).to_dict() == recipe.to_dict()
+        for ingredient in recipe.get_ingredient_names():
+            assert _names(version.find_recipes_by_ingredient(ingredient)) == \
+                _names(book.find_recipes_by_ingredient(ingredient))
+        assert _names(version.find_recipes_by_category(recipe.category)) == \
+            _names(book.find_recipes_by_category(recipe.category))
+        assert version.count_recipes_in_category(recipe.category) == \
+            book.count_recipes_in_category(recipe.category)
+    assert _names(version.find_recipes_by_all_ingredients(["молоко", "яйца"])) == \
+        _names(book.find_recipes_by_all_ingredients(["молоко", "яйца"]))
+    assert _names(version.find_recipes_by_any_ingredient(["соль", "мука"])) == \
+        _names(book.find_recipes_by_any_ingredient(["соль", "мука"]))
+    assert sorted(version.get_all_categories()) == sorted(book.get_all_categories())
+    assert version.generate_shopping_list(PLAN) == book.generate_shopping_list(PLAN)
+    assert version.build_shopping_list(PLAN) == book.build_shopping_list(PLAN)
+    assert version.calculate_total_calories(PLAN) == book.calculate_total_calories(PLAN)
+
+
+def _random_recipe(number: int, rng: random.Random) -> Recipe:
+    return Recipe(f"Рецепт {number}",
+                  [Ingredient(name, rng.randint(1, 9), "г", 1.5) for name in rng.sample(VOCABULARY, 4)],
+                  category=rng.choice(CATEGORIES))
+
+
+def test_matches_cookbook(cookbook):
+    versioned = VersionedCookbook.from_cookbook(cookbook)
+    _assert_same(versioned.snapshot(), cookbook)
+
+    before = versioned.snapshot()
+    soup = Recipe("Борщ", [Ingredient("Свекла", 500, "г", 0.4)], "", "", "Суп")
+    with versioned.batch() as batch:
+        batch.replace_recipe(soup)
+        batch.remove_recipe("салат")
+        batch.add_recipe(Recipe("Омлет", []))
+        batch.add_recipe(Recipe("Кисель", [Ingredient("Крахмал", 20, "г", 3.0)], "", "", "Напиток"))
+    cookbook.get_recipe("Борщ").remove_ingredient("Капуста")
+    cookbook.get_recipe("Борщ").remove_ingredient("Соль")
+    cookbook.get_recipe("Борщ").ingredients[0].quantity = 500
+    cookbook.remove_recipe("Салат")
+    cookbook.add_recipe(Recipe("Кисель", [Ingredient("Крахмал", 20, "г", 3.0)], "", "", "Напиток"))
+
+    _assert_same(versioned.snapshot(), cookbook)
+    assert before.count == len(sample_recipes())
+    assert before.get_recipe("Салат") is not None
+    assert versioned.snapshot().version == before.version + 1
+
+
+def test_many_versions_match_cookbook():
+    rng = random.Random(5)
+    book = Cookbook()
+    versioned = VersionedCookbook()
+    live = []
+    for number in range(3000):
+        if live and rng.random() < 0.3:
+            name = live.pop(rng.randrange(len(live)))
+            assert versioned.remove_recipe(name) == book.remove_recipe(name)
+        else:
+            recipe = _random_recipe(number, rng)
+            live.append(recipe.name)
+            versioned.add_recipe(recipe)
+            book.add_recipe(recipe)
+    _assert_same(versioned.snapshot(), book)
+
+
+def test_snapshots_stay_consistent_under_concurrent_writes():
+    rng = random.Random(1)
+    versioned = VersionedCookbook(_random_recipe(number, rng) for number in range(500))
+    stop = threading.Event()
+    failures = []
+
+    def writer():
+        writer_rng = random.Random(2)
+        number = 500
+        while not stop.is_set() and number < 5000:
+            with versioned.batch() as batch:
+                for _ in range(10):
+                    batch.remove_recipe(f"Рецепт {number - 500}")
+                    batch.add_recipe(_random_recipe(number, writer_rng))
+                    number += 1
+
+    def reader(seed: int):
+        reader_rng = random.Random(seed)
+        try:
+            for _ in range(300):
+                version = versioned.snapshot()
+                count = version.count
+                ingredient = reader_rng.choice(VOCABULARY)
+                found = version.find_recipes_by_ingredient(ingredient)
+                for recipe in found:
+                    assert version.get_recipe(recipe.name) is recipe
+                    assert ingredient in recipe.get_ingredient_names()
+                recipes = version.recipes
+                assert len(recipes) == count == 500
+                assert sum(version.count_recipes_in_category(category)
+                           for category in {"суп", "салат", "завтрак"}) == count
+                numbers = [int(recipe.name.split()[1]) for recipe in recipes]
+                assert numbers == sorted(numbers)
+                assert version.count == count and version.find_recipes_by_ingredient(ingredient) == found
+        except AssertionError as error:
+            failures.append(error)
+
+    threads = [threading.Thread(target=writer)] + [threading.Thread(target=reader, args=(seed,))
+                                                   for seed in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads[1:]:
+        thread.join()
+    stop.set()
+    threads[0].join()
+    assert not failures
+    assert versioned.snapshot().version > 1